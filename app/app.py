@@ -6,12 +6,17 @@ from app.core.handlers import register_exception_handlers
 from app.core.logger import configure_logging
 from app.core.security import api_key_auth
 from app.core.database import db_manager
+from app.core.executor import executor
+from app.core.metrics import route_label
+from app.utils.intake import UploadIntakeMiddleware, route_template, upload_intake
+from app.modules.jobs.service import job_worker
 from app.core.settings import settings
 from app.api.v1.api import api_router
+from app.modules.metrics.router import router as metrics_router
 
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Request
 
 # Logging
 configure_logging()
@@ -28,11 +33,27 @@ async def lifespan(app: FastAPI):
     
     app.state.db_manager = db_manager
 
+    logger.info("Warming up database pools...")
+    await db_manager.warm_up_all()
+
+    executor.start()
+    app.state.executor = executor
+
+    if settings.JOBS_INPROCESS_WORKERS:
+        job_worker.start(db_manager)
+
     logger.info("Application ready.")
     yield
 
+    if settings.JOBS_INPROCESS_WORKERS:
+        logger.info("Stopping job workers...")
+        await job_worker.stop()
+
+    logger.info("Shutting down executor pools...")
+    executor.shutdown()
+
     logger.info("Shutting down database connections...")
-    db_manager.dispose_all()
+    await db_manager.dispose_all_async()
     logger.info("Shutdown complete.")
 
 def create_app() -> FastAPI:
@@ -65,7 +86,21 @@ def create_app() -> FastAPI:
             allowed_hosts=settings.ALLOWED_HOST,  # mover a settings si quieres
         )
 
+    @app.middleware("http")
+    async def set_route_label(request: Request, call_next):
+        # Etiqueta `route` de las métricas registradas durante la petición: la plantilla
+        # de la ruta y no la URL, para no crear una serie por cada valor de sus parámetros
+        route_label.set(route_template(request.scope))
+        return await call_next(request)
+
+    # Cupo de cargas simultáneas y límite de tamaño sobre el `receive` original, de modo
+    # que el cuerpo se corta mientras llega y no después de que Starlette lo haya volcado
+    app.add_middleware(UploadIntakeMiddleware, intake=upload_intake)
+
     # Routes
+    # /metrics queda sin autenticación para el scraper de Prometheus
+    app.include_router(metrics_router, tags=["Metrics"])
+
     app.include_router(
         api_router,
         prefix="/api/v1",
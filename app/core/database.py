@@ -1,39 +1,105 @@
-from contextlib import contextmanager
-from .settings import settings
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager, contextmanager
+from .settings import DatabaseConfig, settings
 from threading import Lock
 from typing import Dict
+import asyncio
 import logging
+import time
 
 from .exceptions import DatabaseAliasNotRegisteredError
+from .metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_WAIT_SECONDS,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    registry,
+)
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.engine import Engine
-from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 logger = logging.getLogger(__name__)
 
+# Driver async equivalente a cada esquema sync admitido en `DATABASES`
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que registra la espera de cada checkout en `db_pool_checkout_wait_seconds`."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start, alias=self.logging_name)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - start, alias=self.logging_name)
+
+
+def to_async_uri(uri: str) -> str:
+    """Traduce una URI sync (`mysql+pymysql://`, `postgresql://`, `sqlite://`) a su driver async."""
+    url = make_url(uri)
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        raise ValueError(f"No async driver registered for '{url.drivername}'")
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
 class DBManager:
     def __init__(self):
         self._engines: Dict[str, Engine] = {}
         self._session_factories: Dict[str, sessionmaker] = {} 
+        self._async_engines: Dict[str, AsyncEngine] = {}
+        self._async_session_factories: Dict[str, async_sessionmaker] = {}
         self._lock = Lock()
 
     # Internal
-    def _create_engine(self, alias: str):
+    def _config(self, alias: str) -> DatabaseConfig:
         if alias not in settings.DATABASES:
             raise DatabaseAliasNotRegisteredError(alias)
+        return settings.DATABASES[alias]
 
-        uri = settings.DATABASES[alias]
+    def _engine_options(self, alias: str, poolclass: type[QueuePool] = TimedQueuePool) -> dict:
+        config = self._config(alias)
 
-        pool_size = 5 if settings.APP_ENV == "DEV" else 15
-        max_overflow = 10 if settings.APP_ENV == "DEV" else 30
+        # SQLite en memoria usa SingletonThreadPool/StaticPool, que no aceptan tamaño de pool
+        if make_url(config.uri).get_backend_name() == "sqlite":
+            return {}
+
+        pool_size, max_overflow = self.pool_limits(alias)
+        return {
+            "poolclass": poolclass,
+            "pool_logging_name": alias,
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": config.pool_timeout,
+            "pool_pre_ping": config.pool_pre_ping,
+            "pool_recycle": config.pool_recycle,
+        }
+
+    def _create_engine(self, alias: str):
+        uri = self._config(alias).uri
 
         engine = create_engine(
             uri,
-            pool_size=pool_size,
-            max_overflow=max_overflow,
-            pool_pre_ping=True,
-            pool_recycle=1800,
-            future=True
+            future=True,
+            **self._engine_options(alias),
         )
 
         self._engines[alias] = engine
@@ -47,13 +113,110 @@ class DBManager:
 
         logger.info(f"[DBManager] Engine created for alias: {alias}")
 
+    def _create_async_engine(self, alias: str):
+        uri = self._config(alias).uri
+
+        engine = create_async_engine(
+            to_async_uri(uri),
+            **self._engine_options(alias, poolclass=TimedAsyncAdaptedQueuePool),
+        )
+
+        self._async_engines[alias] = engine
+
+        self._async_session_factories[alias] = async_sessionmaker(
+            bind=engine,
+            autoflush=False,
+            expire_on_commit=False
+        )
+
+        logger.info(f"[DBManager] Async engine created for alias: {alias}")
+
     def _ensure_engine(self, alias: str):
         if alias not in self._engines:
             with self._lock:
                 if alias not in self._engines:
                     self._create_engine(alias)
+
+    def _ensure_async_engine(self, alias: str):
+        if alias not in self._async_engines:
+            with self._lock:
+                if alias not in self._async_engines:
+                    self._create_async_engine(alias)
     
     # Public 
+    def pool_limits(self, alias: str | None = None) -> tuple[int, int]:
+        """
+        Devuelve (pool_size, max_overflow) del engine de `alias`; los valores no
+        definidos en `DATABASES` (o sin alias) toman el valor por defecto según APP_ENV.
+        """
+        pool_size, max_overflow = (5, 10) if settings.APP_ENV == "DEV" else (15, 30)
+
+        if alias is None:
+            return pool_size, max_overflow
+
+        config = self._config(alias)
+        return (
+            config.pool_size if config.pool_size is not None else pool_size,
+            config.max_overflow if config.max_overflow is not None else max_overflow,
+        )
+
+    def warm_up(self, alias: str) -> int:
+        """
+        Crea el engine de `alias` y abre en paralelo `warmup_connections` conexiones
+        (acotadas a pool_size), que quedan disponibles en el pool. Devuelve las abiertas.
+        """
+        engine = self.get_engine(alias)
+        config = self._config(alias)
+        wanted = config.warmup_connections
+        if wanted is None:
+            wanted = settings.DB_WARMUP_CONNECTIONS
+        wanted = min(wanted, self.pool_limits(alias)[0])
+
+        if wanted <= 0:
+            return 0
+
+        def open_connection():
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            return conn
+
+        # Se mantienen todas abiertas hasta el final para que el pool no reutilice la misma
+        opened = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=wanted, thread_name_prefix=f"warmup-{alias}") as pool:
+            for future in as_completed([pool.submit(open_connection) for _ in range(wanted)]):
+                try:
+                    opened.append(future.result())
+                except Exception as e:
+                    errors.append(e)
+
+        for conn in opened:
+            conn.close()
+
+        if errors:
+            logger.warning(f"[DBManager] Warm-up of '{alias}' opened {len(opened)}/{wanted} connections: {errors[0]}")
+        else:
+            logger.info(f"[DBManager] Warm-up of '{alias}': {len(opened)} connections ready")
+
+        return len(opened)
+
+    async def warm_up_all(self) -> dict[str, int]:
+        """Precalienta en paralelo todos los alias configurados (los fallos solo se registran)."""
+        aliases = list(settings.DATABASES)
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self.warm_up, alias) for alias in aliases),
+            return_exceptions=True,
+        )
+
+        status = {}
+        for alias, result in zip(aliases, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"[DBManager] Warm-up of '{alias}' failed: {result}")
+                status[alias] = 0
+            else:
+                status[alias] = result
+        return status
+
     @contextmanager
     def get_session(self, alias: str): 
         """Context manager que entrega una sesión lista con commit/rollback automático."""
@@ -78,6 +241,43 @@ class DBManager:
         self._ensure_engine(alias)
         return self._engines[alias]
 
+    @asynccontextmanager
+    async def get_async_session(self, alias: str):
+        """Equivalente async de `get_session` (commit/rollback automático)."""
+        self._ensure_async_engine(alias)
+
+        session: AsyncSession = self._async_session_factories[alias]()
+
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            logger.exception(
+                f"[DBManager] Transaction rollback in alias '{alias}'"
+            )
+            raise
+        finally:
+            await session.close()
+
+    def get_async_engine(self, alias: str) -> AsyncEngine:
+        """Devuelve el engine async (aiomysql / asyncpg / aiosqlite) asociado al alias."""
+        self._ensure_async_engine(alias)
+        return self._async_engines[alias]
+
+    def pool_status(self) -> dict[str, dict[str, int]]:
+        """Tamaño, conexiones en uso y overflow del pool sync de cada engine creado."""
+        status = {}
+        for alias, engine in list(self._engines.items()):
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                status[alias] = {
+                    "size": pool.size(),
+                    "checked_out": pool.checkedout(),
+                    "overflow": max(pool.overflow(), 0),
+                }
+        return status
+
     def health_check(self) -> dict:
         """
         Verifica conectividad básica a todas las DB configuradas.
@@ -100,5 +300,22 @@ class DBManager:
             engine.dispose()
         self._engines.clear()
         self._session_factories.clear()
+
+    async def dispose_all_async(self):
+        """Cierra los engines async y después los sync."""
+        for alias, engine in self._async_engines.items():
+            await engine.dispose()
+        self._async_engines.clear()
+        self._async_session_factories.clear()
+        self.dispose_all()
         
-db_manager = DBManager()
\ No newline at end of file
+db_manager = DBManager()
+
+
+def _collect_pool_metrics():
+    for alias, status in db_manager.pool_status().items():
+        DB_POOL_SIZE.set(status["size"], alias=alias)
+        DB_POOL_CHECKED_OUT.set(status["checked_out"], alias=alias)
+        DB_POOL_OVERFLOW.set(status["overflow"], alias=alias)
+
+registry.add_collector(_collect_pool_metrics)
@@ -12,14 +12,29 @@ class AppException(Exception):
         error_code: str,
         status_code: int = 400,
         details: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
     ):
         self.message = message
         self.error_code = error_code
         self.status_code = status_code
         self.details = details or {}
+        # Cabeceras HTTP adicionales de la respuesta de error (p. ej. Retry-After)
+        self.headers = headers
 
         super().__init__(message)
 
+    def __reduce__(self):
+        # Las subclases tienen firmas distintas; se reconstruye desde el estado para
+        # poder propagar la excepción desde el pool de procesos.
+        return (_rebuild_app_exception, (self.__class__, self.__dict__.copy()))
+
+
+def _rebuild_app_exception(cls: type, state: Dict[str, Any]) -> "AppException":
+    exc = cls.__new__(cls)
+    Exception.__init__(exc, state.get("message"))
+    exc.__dict__.update(state)
+    return exc
+
 
 #? =========================
 #? TRANSFORMATION ERRORS
@@ -116,6 +131,15 @@ class DatabaseDeleteError(AppException):
             status_code = 400, 
             details = details)
 
+class SheetUploadError(AppException):
+    def __init__(self, failed: Dict[str, Dict[str, Any]], uploaded: Dict[str, int], status_code: int = 500):
+        super().__init__(
+            message=f"{len(failed)} sheet(s) could not be uploaded.",
+            error_code="DB_005",
+            status_code=status_code,
+            details={"failed_sheets": failed, "uploaded_sheets": uploaded},
+        )
+
 #? =========================
 #? FILE HANDLING ERRORS
 #? =========================
@@ -157,6 +181,53 @@ class FileExistsError(AppException):
             details=details or {"filename": filename},
         )
 
+class UploadTooLargeError(AppException):
+    def __init__(self, max_bytes: int, received_bytes: int):
+        super().__init__(
+            message=f"The uploaded file exceeds the maximum allowed size of {max_bytes} bytes.",
+            error_code="FILE_005",
+            status_code=413,
+            details={"max_bytes": max_bytes, "received_bytes": received_bytes},
+        )
+
+class InvalidFileContentError(AppException):
+    def __init__(self, filename: str, extension: str):
+        super().__init__(
+            message=f"The content of '{filename}' does not match a '.{extension}' file.",
+            error_code="FILE_006",
+            status_code=415,
+            details={"filename": filename, "extension": extension},
+        )
+
+
+#? =========================
+#? UPLOAD INTAKE ERRORS
+#? =========================
+
+class UploadCapacityError(AppException):
+    def __init__(self, max_concurrent: int, retry_after: int):
+        super().__init__(
+            message="Too many uploads in progress. Retry later.",
+            error_code="UPLOAD_001",
+            status_code=503,
+            details={"max_concurrent_uploads": max_concurrent, "retry_after_seconds": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+#? =========================
+#? JOB ERRORS
+#? =========================
+
+class JobNotFoundError(AppException):
+    def __init__(self, job_id: str):
+        super().__init__(
+            message=f"Job '{job_id}' not found.",
+            error_code="JOB_001",
+            status_code=404,
+            details={"job_id": job_id},
+        )
+
 
 #? =========================
 #? CONFIGURATION ERRORS
@@ -0,0 +1,153 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+import multiprocessing
+import asyncio
+import logging
+import time
+
+from .database import db_manager
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Pool:
+    """Pool con concurrencia acotada por semáforo y métricas de cola/espera."""
+
+    def __init__(self, name: str, workers: int, factory: Callable[[int], Executor]):
+        self.name = name
+        self.workers = workers
+        self._factory = factory
+        self._executor: Executor | None = None
+        # El semáforo se crea en `start` ligado al loop en curso (un asyncio.Semaphore
+        # solo sirve en el primer loop que espera en él; p. ej. cada `asyncio.run`)
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def start(self):
+        if self._executor is None:
+            self._executor = self._factory(self.workers)
+            logger.info(f"[Executor] {self.name} pool started with {self.workers} workers")
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.workers)
+            self._loop = loop
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        self.start()
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore
+
+        submitted = time.perf_counter()
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        wait = time.perf_counter() - submitted
+        self.total_wait_seconds += wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        self.running += 1
+
+        try:
+            result = await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            semaphore.release()
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.total_wait_seconds / finished, 4) if finished else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 4),
+        }
+
+
+class TaskExecutor:
+    """
+    Capa de ejecución fuera del event loop:
+    - `run_cpu`: lectura/transformación. Por defecto en hilos (Polars y calamine liberan el
+      GIL y los DataFrames no se copian); con EXECUTOR_CPU_MODE="process" en procesos spawn,
+      a costa de serializar cada frame que entra y sale del pool.
+    - `run_io`: I/O bloqueante de base de datos (pool de hilos del tamaño del pool de DBManager).
+    """
+
+    def __init__(self):
+        # Tantos hilos como conexiones admite el mayor pool configurado
+        io_workers = settings.EXECUTOR_IO_WORKERS or max(
+            (sum(db_manager.pool_limits(alias)) for alias in settings.DATABASES),
+            default=sum(db_manager.pool_limits()),
+        )
+        cpu_workers = settings.EXECUTOR_CPU_WORKERS
+
+        self._io = _Pool(
+            "io",
+            io_workers,
+            lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="db-io"),
+        )
+
+        if settings.EXECUTOR_CPU_MODE == "process":
+            # spawn: polars no es seguro tras fork()
+            self._cpu = _Pool(
+                "cpu",
+                cpu_workers,
+                lambda n: ProcessPoolExecutor(max_workers=n, mp_context=multiprocessing.get_context("spawn")),
+            )
+        else:
+            self._cpu = _Pool(
+                "cpu",
+                cpu_workers,
+                lambda n: ThreadPoolExecutor(max_workers=n, thread_name_prefix="cpu"),
+            )
+
+    def start(self):
+        self._cpu.start()
+        self._io.start()
+
+    def shutdown(self):
+        self._cpu.shutdown()
+        self._io.shutdown()
+
+    async def run_cpu(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta trabajo CPU-bound. `fn` y sus argumentos deben ser serializables (pickle)."""
+        return await self._cpu.run(fn, *args, **kwargs)
+
+    async def run_io(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta I/O bloqueante (SQLAlchemy síncrono) en el pool de hilos."""
+        return await self._io.run(fn, *args, **kwargs)
+
+    def stats(self) -> dict:
+        return {"cpu": self._cpu.stats(), "io": self._io.stats()}
+
+
+executor = TaskExecutor()
@@ -7,25 +7,34 @@ from .exceptions import AppException
 logger = logging.getLogger(__name__)
 
 
+def app_exception_response(exc: AppException) -> JSONResponse:
+    """
+    Respuesta de error estándar de un AppException; también la usan los middlewares,
+    que corren fuera de los exception handlers.
+    """
+    logger.warning(
+        f"[{exc.error_code}] {exc.message} | Details: {exc.details}"
+    )
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "success": False,
+            "error_code": exc.error_code,
+            "message": exc.message,
+            "details": exc.details,
+        },
+        headers=exc.headers,
+    )
+
+
 def register_exception_handlers(app: FastAPI) -> None:
     """
     Register all global exception handlers.
     """
     @app.exception_handler(AppException)
     async def app_exception_handler(request: Request, exc: AppException):
-        logger.warning(
-            f"[{exc.error_code}] {exc.message} | Details: {exc.details}"
-        )
-
-        return JSONResponse(
-            status_code=exc.status_code,
-            content={
-                "success": False,
-                "error_code": exc.error_code,
-                "message": exc.message,
-                "details": exc.details,
-            },
-        )
+        return app_exception_response(exc)
 
     @app.exception_handler(Exception)
     async def unhandled_exception_handler(request: Request, exc: Exception):
@@ -0,0 +1,241 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Iterable
+import math
+import time
+
+# Ruta (o `job:<kind>`) que origina la operación; lo fija el middleware HTTP / el worker de trabajos
+route_label: ContextVar[str] = ContextVar("metrics_route", default="")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+    @abstractmethod
+    def samples(self) -> list[str]:
+        ...
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # clave -> [conteos por bucket (no acumulados)..., suma, total]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Registro en memoria de métricas del proceso, expuesto en formato de texto de Prometheus.
+    Los `collectors` se invocan en cada lectura para refrescar gauges (p. ej. estado de los pools).
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+#? =========================
+#? UPLOAD PIPELINE
+#? =========================
+
+UPLOAD_RECEIVE_SECONDS = registry.histogram(
+    "upload_receive_seconds", "Time spent receiving and spooling the uploaded file", ("route",)
+)
+UPLOAD_RECEIVED_BYTES = registry.counter(
+    "upload_received_bytes_total", "Bytes received in uploaded files", ("route",)
+)
+UPLOAD_RECEIVE_BYTES_PER_SECOND = registry.gauge(
+    "upload_receive_bytes_per_second", "Throughput of the last received upload", ("route",)
+)
+UPLOAD_PARSE_SECONDS = registry.histogram(
+    "upload_parse_seconds", "Time spent parsing the uploaded file", ("route", "reader")
+)
+UPLOAD_TRANSFORM_SECONDS = registry.histogram(
+    "upload_transform_seconds", "Time spent in each BaseTransformer step", ("route", "transformer", "step")
+)
+UPLOAD_INSERT_SECONDS = registry.histogram(
+    "upload_insert_seconds", "Time spent writing transformed rows to the database", ("route", "transformer", "table")
+)
+UPLOAD_ROWS = registry.counter(
+    "upload_rows_total", "Rows written to the database", ("route", "transformer", "table")
+)
+UPLOAD_ROWS_PER_SECOND = registry.gauge(
+    "upload_rows_per_second", "Insert throughput of the last upload", ("route", "transformer", "table")
+)
+UPLOAD_IN_FLIGHT = registry.gauge(
+    "upload_in_flight", "Upload requests currently holding an intake slot"
+)
+UPLOAD_REJECTED = registry.counter(
+    "upload_rejected_total", "Uploads rejected by the intake layer", ("route", "reason")
+)
+
+
+#? =========================
+#? DATABASE POOLS
+#? =========================
+
+DB_POOL_CHECKOUT_WAIT_SECONDS = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time waiting for a connection from the pool",
+    ("alias",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_SIZE = registry.gauge("db_pool_size", "Configured pool size", ("alias",))
+DB_POOL_CHECKED_OUT = registry.gauge("db_pool_checked_out", "Connections currently in use", ("alias",))
+DB_POOL_OVERFLOW = registry.gauge("db_pool_overflow", "Connections opened beyond pool_size", ("alias",))
@@ -1,7 +1,24 @@
-from pydantic import Field, computed_field, field_validator, SecretStr
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from .exceptions import ConfigurationError
-from typing import Literal, Dict
+from typing import Any, Literal, Dict
+
+class DatabaseConfig(BaseModel):
+    """
+    Configuración de una base de datos en `DATABASES`. Se acepta la URI sola
+    (`"alias": "mysql+pymysql://..."`) o un objeto con los ajustes del pool.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    uri: str
+    # None = valor por defecto según APP_ENV (DBManager.pool_limits)
+    pool_size: int | None = Field(default=None, gt=0)
+    max_overflow: int | None = Field(default=None, ge=0)
+    pool_timeout: float = Field(default=30, gt=0)
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    # Conexiones abiertas al arrancar (None = DB_WARMUP_CONNECTIONS)
+    warmup_connections: int | None = Field(default=None, ge=0)
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -33,29 +50,84 @@ class Settings(BaseSettings):
     SECURITY_DEFAULT_API_KEY: SecretStr  
 
     # Database
-    DATABASES: Dict[str, str] = Field(default_factory=dict)
+    DATABASES: Dict[str, DatabaseConfig] = Field(default_factory=dict)
+    DB_WARMUP_CONNECTIONS: int = Field(default=2, ge=0)
+
+    # Upload
+    BULK_INSERT_BATCH_SIZE: int = Field(default=5000, gt=0)
+    UPLOAD_CHUNK_SIZE: int = Field(default=20000, gt=0)
+    UPLOAD_TRANSACTION_MODE: Literal["chunk", "load"] = "load"
+    UPLOAD_SPOOL_DIR: str | None = None
+    REPLACE_PARTITION_DELETE_BATCH: int = Field(default=10000, gt=0)
+    EP_SHEET_PARALLELISM: int = Field(default=3, gt=0)
+    EP_SINGLE_INSERT: bool = False
+    UPLOAD_ASYNC_ENGINE: bool = False
+    CSV_STREAMING_ENABLED: bool = True
+    CSV_STREAMING_MIN_BYTES: int = Field(default=256 * 1024 * 1024, ge=0)
+
+    # Upload intake (límites y backpressure antes de leer el cuerpo)
+    UPLOAD_MAX_BYTES: int = Field(default=4 * 1024 ** 3, gt=0)
+    UPLOAD_MAX_BYTES_BY_ROUTE: Dict[str, int] = Field(default_factory=dict)
+    UPLOAD_MAX_CONCURRENT: int = Field(default=4, gt=0)
+    UPLOAD_QUEUE_WAIT_SECONDS: float = Field(default=0.0, ge=0)
+    UPLOAD_RETRY_AFTER_SECONDS: int = Field(default=30, gt=0)
+
+    # Validación previa (/validate): muestra leída del archivo
+    DRY_RUN_SAMPLE_ROWS: int = Field(default=1000, gt=0)
+    DRY_RUN_MAX_HEAD_BYTES: int = Field(default=8 * 1024 * 1024, gt=0)
+
+    # Upload ledger (deduplicación por contenido)
+    UPLOAD_LEDGER_ENABLED: bool = True
+    UPLOAD_LEDGER_PATH: str = "data/upload_ledger.sqlite3"
+    UPLOAD_LEDGER_TTL_SECONDS: int = Field(default=86400, gt=0)
+    UPLOAD_LEDGER_MAX_ENTRIES: int = Field(default=1000, gt=0)
+    # Confirma cada acierto con un COUNT(*) de la tabla destino (uno más al registrar la carga)
+    UPLOAD_LEDGER_VERIFY_ROWS: bool = False
+
+    # Executor
+    EXECUTOR_CPU_MODE: Literal["thread", "process"] = "thread"
+    EXECUTOR_CPU_WORKERS: int = Field(default=2, gt=0)
+    EXECUTOR_IO_WORKERS: int | None = Field(default=None, gt=0)
+
+    # Jobs
+    JOBS_DB_PATH: str = "data/jobs.sqlite3"
+    JOBS_UPLOAD_DIR: str = "data/uploads"
+    JOBS_CONCURRENCY: int = Field(default=2, gt=0)
+    JOBS_INPROCESS_WORKERS: bool = True
+    JOBS_LEASE_SECONDS: float = Field(default=300, gt=0)
+    JOBS_MAX_ATTEMPTS: int = Field(default=3, gt=0)
 
     @computed_field
     @property
     def ENVIRONMENT_DEBUG(self) -> bool:
         return self.APP_ENV == "DEV"
     
+    @field_validator("DATABASES", mode="before")
+    @classmethod
+    def parse_databases(cls, databases: Any):
+        if isinstance(databases, dict):
+            return {
+                alias: {"uri": config} if isinstance(config, str) else config
+                for alias, config in databases.items()
+            }
+        return databases
+
     @field_validator("DATABASES")
     @classmethod
-    def validate_databases(cls, databases: Dict[str, str]):
+    def validate_databases(cls, databases: Dict[str, DatabaseConfig]):
 
         if not databases:
             raise ConfigurationError("At least one database must be configured")
 
-        for alias, uri in databases.items():
+        for alias, config in databases.items():
 
             if not alias.isidentifier():
                 raise ValueError(
                     f"Invalid database alias '{alias}'"
                 )
 
-            if not uri.startswith(
-                ("postgresql://", "mysql+pymysql://")
+            if not config.uri.startswith(
+                ("postgresql://", "mysql+pymysql://", "sqlite://")
             ):
                 raise ConfigurationError(
                     f"Invalid URI scheme for database '{alias}'"
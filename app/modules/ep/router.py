@@ -1,6 +1,16 @@
-from fastapi import APIRouter, Depends, File, Request, UploadFile
-from app.utils.schema import UploadResponse
-from .service import ejecucion_presupuestal_service
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile
+from app.utils.schema import UploadResponse, ValidationResponse
+from app.modules.jobs.router import ASYNC_QUERY, accept_job
+from app.utils.loader_file import get_extension, spooled_upload
+from app.utils.upload_ledger import FORCE_QUERY
+from app.utils.profiling import PROFILE_QUERY, profiling
+from .service import (
+    DESTINATION_TABLE,
+    count_sheets,
+    ejecucion_presupuestal_service,
+    sheets_summary,
+    validate_ejecucion_presupuestal,
+)
 
 router = APIRouter()
 
@@ -14,19 +24,58 @@ def get_db_manager(request: Request):
 )
 async def upload_ejecucion_presupuestal(
     file: UploadFile = File(...),
-    db_manager = Depends(get_db_manager)
+    db_manager = Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    single_insert: bool | None = Query(None, description="Concatena todas las hojas en una sola carga"),
+    profile: bool = PROFILE_QUERY
 ):
-    results = await ejecucion_presupuestal_service(file, db_manager)
-    total_rows = sum(results.values())
-    sheets_summary = [
-        {"sheet": sheet, "rows_uploaded": rows}
-        for sheet, rows in results.items()
-    ]
-    
+    if run_async:
+        return await accept_job(
+            file, "ep.upload", {"force": force, "single_insert": single_insert, "profile": profile}
+        )
+
+    get_extension(file.filename)
+
+    with profiling(profile) as upload_profile:
+        async with spooled_upload(file) as upload:
+            results = await ejecucion_presupuestal_service(
+                upload.path, upload.filename, upload.sha256, db_manager, force=force, single_insert=single_insert
+            )
+
+    timings = upload_profile.as_dict() if upload_profile else None
+
+    if results is None:
+        return {
+            "status": True,
+            "message": "No hay cambios que subir (archivo ya procesado)",
+            "rows_uploaded": 0,
+            "destination_table": DESTINATION_TABLE,
+            "duplicate": True,
+            "timings": timings,
+        }
+
+    total_rows = sum(result.rows for result in results.values())
+    # Las hojas se cargan en paralelo: el throughput se mide sobre la más lenta
+    total_seconds = max((result.elapsed_seconds for result in results.values()), default=0.0)
+
     return {
         "status": True,
-        "message": f"Procesadas {len(results)} entidades",
+        "message": f"Procesadas {count_sheets(results)} entidades",
         "rows_uploaded": total_rows,
-        "destination_table": "ejecucion_presupuestal_p",
-        "detail": sheets_summary,
+        "rows_per_second": round(total_rows / total_seconds, 2) if total_seconds > 0 else 0.0,
+        "destination_table": DESTINATION_TABLE,
+        "detail": sheets_summary(results),
+        "timings": timings,
     }
+
+@router.post(
+        "/validate",
+        response_model=ValidationResponse,
+        description="Valida el archivo de Ejecución Presupuestal sin cargarlo, sobre una muestra de cada hoja"
+)
+async def validate_ejecucion_presupuestal_upload(file: UploadFile = File(...)):
+    get_extension(file.filename)
+
+    async with spooled_upload(file) as upload:
+        return await validate_ejecucion_presupuestal(upload.path, upload.filename)
@@ -1,29 +1,274 @@
 from .transform import EjecucionPresupuestalTransformer
-from app.utils.uploader import upload_dataframe
+from app.utils.uploader import observe_upload, run_upload, transform_frame, upload_dataframe, UploadResult
 from app.core.database import DBManager
-from app.utils.loader_file import load_all_sheets
-from fastapi import UploadFile
+from app.core.exceptions import AppException, SheetUploadError
+from app.core.settings import settings
+from app.utils.loader_file import FileSample, LoadedSheets, load_saved_sheets, read_sheets
+from app.utils.dry_run import project
+from app.core.executor import executor
+from app.utils.upload_ledger import already_uploaded, record_upload, upload_ledger
+from app.utils.profiling import profile_scope, profiling, run_io_profiled
+from app.modules.jobs.service import StageRecorder, register_job_handler
+from app.modules.jobs.store import Job
+from typing import Any
+import polars as pl
+import asyncio
+import logging
+import time
 
+logger = logging.getLogger(__name__)
 
 ALIAS = "ejecucion_presupuestal"  
+SKIP_ROWS = 3
+COMBINED_KEY = "all_sheets"
+DESTINATION_TABLE = "ejecucion_presupuestal_p"
 
 async def ejecucion_presupuestal_service(
-        file: UploadFile, 
-        db_manager: DBManager
-    ) -> dict[str, int]:
-
-    sheets_data = await load_all_sheets(
-        file= file, 
-        sheets= set(EjecucionPresupuestalTransformer.sheets.keys()), 
-        skip_rows= 3
+        path: str,
+        filename: str,
+        sha256: str,
+        db_manager: DBManager,
+        force: bool = False,
+        single_insert: bool | None = None,
+        recorder: StageRecorder | None = None
+    ) -> dict[str, UploadResult] | None:
+    """
+    Lee y carga el libro persistido en `path`.
+    Devuelve None si el mismo contenido ya se procesó (salvo `force`).
+    """
+    recorder = recorder or StageRecorder()
+    transformer_name = EjecucionPresupuestalTransformer.__name__
+    key = upload_ledger.make_key(sha256, transformer_name, DESTINATION_TABLE, ALIAS)
+
+    if settings.UPLOAD_LEDGER_ENABLED and not force and await already_uploaded(key, db_manager, ALIAS, DESTINATION_TABLE):
+        return None
+
+    with recorder.stage("read"):
+        sheets_data = await load_saved_sheets(
+            path,
+            filename,
+            set(EjecucionPresupuestalTransformer.sheets.keys()),
+            SKIP_ROWS,
+            EjecucionPresupuestalTransformer.read_schema,
+        )
+
+    with recorder.stage("upload"):
+        results = await upload_sheets(sheets_data, db_manager, single_insert, recorder)
+
+    if settings.UPLOAD_LEDGER_ENABLED:
+        rows = sum(result.rows for result in results.values())
+        await record_upload(key, sha256, transformer_name, db_manager, ALIAS, DESTINATION_TABLE, rows)
+
+    return results
+
+async def validate_ejecucion_presupuestal(path: str, filename: str) -> dict[str, Any]:
+    """
+    Validación previa sin carga: lee una muestra de `DRY_RUN_SAMPLE_ROWS` filas de cada
+    hoja, la transforma y proyecta filas y tipos de salida. No usa la base de datos.
+    """
+    start = time.perf_counter()
+    sheets_data = await executor.run_cpu(
+        read_sheets,
+        path,
+        filename,
+        set(EjecucionPresupuestalTransformer.sheets.keys()),
+        SKIP_ROWS,
+        EjecucionPresupuestalTransformer.read_schema,
+        settings.DRY_RUN_SAMPLE_ROWS,
     )
-    
-    results: dict[str, int] = {}
 
-    for sheet_name, df in sheets_data.items():
-        transformer = EjecucionPresupuestalTransformer(sheet_name=sheet_name)
-        rows = upload_dataframe(df, transformer, db_manager, ALIAS)
-        results[sheet_name] = rows
+    detail = []
+    for sheet_name, df in sheets_data.frames.items():
+        total = max(sheets_data.total_rows.get(sheet_name, df.height), df.height)
+        sample = FileSample(
+            df=df,
+            total_rows=total,
+            exact=df.height >= total,
+            warnings=sheets_data.warnings.get(sheet_name, []),
+        )
+        detail.append({
+            "sheet": sheet_name,
+            **project(EjecucionPresupuestalTransformer(sheet_name=sheet_name), sample),
+        })
+
+    columns: dict[str, str] = {}
+    for sheet in detail:
+        columns.update(sheet["columns"])
+
+    return {
+        "status": True,
+        "message": f"El archivo es válido para la carga ({len(detail)} entidades)",
+        "destination_table": DESTINATION_TABLE,
+        "rows_in": sum(sheet["rows_in"] for sheet in detail),
+        "rows_out": sum(sheet["rows_out"] for sheet in detail),
+        "exact": all(sheet["exact"] for sheet in detail),
+        "sample_rows": sum(sheet["sample_rows"] for sheet in detail),
+        "columns": columns,
+        "warnings": [warning for sheet in detail for warning in sheet["warnings"]],
+        "elapsed_seconds": round(time.perf_counter() - start, 4),
+        "detail": detail,
+    }
+
+async def upload_sheets(
+        sheets_data: LoadedSheets,
+        db_manager: DBManager,
+        single_insert: bool | None = None,
+        recorder: StageRecorder | None = None
+    ) -> dict[str, UploadResult]:
+    """
+    Transforma y carga las hojas en paralelo (hasta `EP_SHEET_PARALLELISM` a la vez),
+    cada una sobre su propia conexión del pool. Con `single_insert` las hojas
+    transformadas se concatenan y se cargan en una sola operación (clave `all_sheets`).
+    Si alguna hoja falla se espera al resto antes de lanzar `SheetUploadError` con el
+    resultado de cada una, para que ninguna siga escribiendo tras el error. El avance de
+    cada hoja se suma en `recorder`.
+    """
+    recorder = recorder or StageRecorder()
+    if single_insert is None:
+        single_insert = settings.EP_SINGLE_INSERT
 
+    semaphore = asyncio.Semaphore(settings.EP_SHEET_PARALLELISM)
+
+    if single_insert:
+        return await _upload_combined(sheets_data, db_manager, semaphore, recorder)
+
+    async def process(sheet_name: str, df: pl.DataFrame) -> UploadResult:
+        profile_scope.set(sheet_name)
+        async with semaphore:
+            transformer = EjecucionPresupuestalTransformer(sheet_name=sheet_name)
+            result = await run_upload(df, transformer, db_manager, ALIAS, on_progress=recorder.progress(sheet_name))
+
+        result.timings["read"] = sheets_data.read_seconds.get(sheet_name, 0.0)
+        return result
+
+    outcomes = await asyncio.gather(
+        *(process(sheet_name, df) for sheet_name, df in sheets_data.frames.items()),
+        return_exceptions=True,
+    )
+
+    results: dict[str, UploadResult] = {}
+    failed: dict[str, BaseException] = {}
+    for sheet_name, outcome in zip(sheets_data.frames, outcomes):
+        if isinstance(outcome, BaseException):
+            failed[sheet_name] = outcome
+        else:
+            results[sheet_name] = outcome
+
+    if failed:
+        _raise_failed_sheets(results, failed)
     return results
-    
\ No newline at end of file
+
+def _raise_failed_sheets(results: dict[str, UploadResult], failed: dict[str, BaseException]) -> None:
+    for sheet_name, result in results.items():
+        logger.info(f"[Uploader] {DESTINATION_TABLE}: sheet {sheet_name} uploaded {result.rows} rows")
+    for sheet_name, error in failed.items():
+        logger.warning(f"[Uploader] {DESTINATION_TABLE}: sheet {sheet_name} failed: {error}")
+
+    # Una cancelación no es un fallo de la hoja: se propaga tal cual
+    for error in failed.values():
+        if not isinstance(error, Exception):
+            raise error
+
+    first = next(iter(failed.values()))
+    raise SheetUploadError(
+        failed={
+            sheet_name: (
+                {"error_code": e.error_code, "message": e.message, "details": e.details}
+                if isinstance(e, AppException)
+                else {"error_code": "INTERNAL_001", "message": str(e), "details": {}}
+            )
+            for sheet_name, e in failed.items()
+        },
+        uploaded={sheet_name: result.rows for sheet_name, result in results.items()},
+        status_code=max(e.status_code if isinstance(e, AppException) else 500 for e in failed.values()),
+    ) from first
+
+def count_sheets(results: dict[str, UploadResult]) -> int:
+    """Hojas cargadas: una carga combinada (`single_insert`) cuenta todas las que reúne."""
+    return sum(len(result.sources) or 1 for result in results.values())
+
+
+def sheets_summary(results: dict[str, UploadResult]) -> list[dict]:
+    return [
+        {
+            "sheet": sheet,
+            **({"sheets": result.sources} if result.sources else {}),
+            "rows_uploaded": result.rows,
+            "rows_per_second": result.rows_per_second,
+            "timings": result.timings,
+        }
+        for sheet, result in results.items()
+    ]
+
+
+async def _upload_combined(
+        sheets_data: LoadedSheets,
+        db_manager: DBManager,
+        semaphore: asyncio.Semaphore,
+        recorder: StageRecorder
+    ) -> dict[str, UploadResult]:
+
+    async def transform(sheet_name: str, df: pl.DataFrame) -> pl.DataFrame:
+        profile_scope.set(sheet_name)
+        async with semaphore:
+            transformer = EjecucionPresupuestalTransformer(sheet_name=sheet_name)
+            transformed, _ = await transform_frame(transformer, df)
+            return transformed
+
+    frames = await asyncio.gather(
+        *(transform(sheet_name, df) for sheet_name, df in sheets_data.frames.items())
+    )
+    combined = pl.concat(frames, how="diagonal_relaxed")
+
+    transformer = EjecucionPresupuestalTransformer()
+    start = time.perf_counter()
+    result = await run_io_profiled(
+        "upload",
+        upload_dataframe,
+        combined,
+        transformer,
+        db_manager,
+        ALIAS,
+        rows_out=lambda r: r.rows,
+        fields={"transformer": type(transformer).__name__, "table": DESTINATION_TABLE, "rows_in": combined.height},
+        pre_transformed=True,
+        on_progress=recorder.progress(COMBINED_KEY),
+    )
+    observe_upload(transformer, result, time.perf_counter() - start)
+    result.sources = list(sheets_data.frames)
+    result.timings.update(
+        {f"read:{sheet_name}": seconds for sheet_name, seconds in sheets_data.read_seconds.items()}
+    )
+    return {COMBINED_KEY: result}
+
+async def _ejecucion_presupuestal_job(
+        job: Job,
+        db_manager: DBManager,
+        recorder: StageRecorder
+    ) -> dict:
+
+    with profiling(job.options.get("profile", False)) as upload_profile:
+        results = await ejecucion_presupuestal_service(
+            job.file_path,
+            job.filename,
+            job.options["sha256"],
+            db_manager,
+            force=job.options.get("force", False),
+            single_insert=job.options.get("single_insert"),
+            recorder=recorder
+        )
+
+    timings = upload_profile.as_dict() if upload_profile else None
+
+    if results is None:
+        return {"rows_uploaded": 0, "destination_table": DESTINATION_TABLE, "duplicate": True, "timings": timings}
+
+    return {
+        "rows_uploaded": sum(result.rows for result in results.values()),
+        "destination_table": DESTINATION_TABLE,
+        "sheets": count_sheets(results),
+        "detail": sheets_summary(results),
+        "timings": timings,
+    }
+
+register_job_handler("ep.upload", _ejecucion_presupuestal_job)
@@ -35,6 +35,25 @@ class EjecucionPresupuestalTransformer(BaseTransformer):
         "fecha": "fecha",
     }
 
+    # Montos presupuestales como Float64; códigos, textos y fecha como texto (tal como
+    # se cargaban), para que calamine no convierta códigos numéricos en flotantes
+    source_schema = {
+        **dict.fromkeys(
+            [
+                "uej", "nombre_uej", "rubro", "tipo", "cta", "sub_cta", "obj", "ord", "sor_ord",
+                "item", "sub_item", "fuente", "rec", "sit", "descripcion", "fecha",
+            ],
+            pl.String,
+        ),
+        **dict.fromkeys(
+            [
+                "apr._inicial", "apr._adicionada", "apr._reducida", "apr._vigente", "apr_bloqueada",
+                "cdp", "apr._disponible", "compromiso", "orden_pago", "pagos",
+            ],
+            pl.Float64,
+        ),
+    }
+
     # Única fuente de verdad para la regla de agregación
     NON_AGGREGATED_SHEETS = {"ejecuciondesagregada-minc"}
 
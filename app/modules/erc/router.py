@@ -1,115 +1,141 @@
-from fastapi import APIRouter, Depends, File, Request, UploadFile
-from  app.utils.schema import UploadResponse
-from .service import (
-    turismo_service,
-    inversion_service,
-    servicios_service,
-    bienes_service,
-    paises_service
-    )
-from app.utils.loader_file import load_file
+from fastapi import APIRouter, Depends, File, Query, Request, UploadFile
+from  app.utils.schema import UploadResponse, ValidationResponse
+from app.utils.upload_ledger import FORCE_QUERY
+from app.utils.profiling import PROFILE_QUERY, profiling
+from app.modules.jobs.router import ASYNC_QUERY, accept_job
+from .service import ERC_UPLOADS, process_erc_upload, validate_erc_upload
+from typing import Literal
+from app.utils.loader_file import get_extension, spooled_upload
 
 router = APIRouter()
 
+# `?replace_partitions=true` en las rutas cuyos transformers declaran `partition_column`
+REPLACE_PARTITIONS_QUERY = Query(
+    False,
+    description="Borra y reinserta las particiones presentes en el archivo en lugar de la carga incremental",
+)
+
 def get_db_manager(request: Request):
     return request.app.state.db_manager
 
-@router.post("/turismo",response_model=UploadResponse, description= "Ruta para actualizar los datos de turismo" )
-async def upload_turismo(
-    file: UploadFile = File(...),
-    db_manager= Depends(get_db_manager)
+async def _upload(
+    name: str,
+    file: UploadFile,
+    db_manager,
+    run_async: bool,
+    force: bool,
+    profile: bool,
+    updated_message: str,
+    replace_partitions: bool = False,
 ):
-    df = await load_file(file)
-    rows = turismo_service(df, db_manager)
-
-    if rows != 0:
-        message = "Se actualizo el registro de turismo"
+    # Primera fila del CSV contra el transformer antes de volcar el resto del archivo
+    check_header = ERC_UPLOADS[name].transformer().check_header
+
+    if run_async:
+        options = {"force": force, "profile": profile, "replace_partitions": replace_partitions}
+        return await accept_job(file, f"erc.{name}", options, check_header)
+
+    get_extension(file.filename)
+
+    with profiling(profile) as upload_profile:
+        async with spooled_upload(file, check_header) as upload:
+            result = await process_erc_upload(
+                name, upload.path, upload.filename, upload.sha256, db_manager,
+                force=force,
+                replace_partitions=replace_partitions,
+            )
+
+    timings = upload_profile.as_dict() if upload_profile else None
+    destination_table = ERC_UPLOADS[name].destination_table
+
+    if result is None:
+        return {
+            "status": True,
+            "message": "No hay cambios que subir (archivo ya procesado)",
+            "rows_uploaded": 0,
+            "destination_table": destination_table,
+            "duplicate": True,
+            "timings": timings,
+        }
+
+    if result.rows != 0:
+        message = updated_message
     else:
         message = "No hay cambios que subir"
 
     return {
         "status": True,
         "message": message,
-        "rows_uploaded": rows,
-        "destination_table": "visitas_turismo"
+        "rows_uploaded": result.rows,
+        "rows_per_second": result.rows_per_second,
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "skipped": result.skipped,
+        "duplicate_keys": result.duplicate_keys,
+        "destination_table": destination_table,
+        "detail": result.partitions or None,
+        "timings": timings,
     }
 
+@router.post("/turismo",response_model=UploadResponse, description= "Ruta para actualizar los datos de turismo" )
+async def upload_turismo(
+    file: UploadFile = File(...),
+    db_manager= Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    profile: bool = PROFILE_QUERY,
+    replace_partitions: bool = REPLACE_PARTITIONS_QUERY,
+):
+    return await _upload("turismo", file, db_manager, run_async, force, profile, "Se actualizo el registro de turismo", replace_partitions)
+
 @router.post("/inversion", response_model=UploadResponse, description="Ruta para actualizar los datos de inversion")
 async def upload_inversion(
     file: UploadFile = File(...),
-    db_manager = Depends(get_db_manager)
+    db_manager = Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    profile: bool = PROFILE_QUERY
 ):
-    df = await load_file(file)
-    rows = inversion_service(df, db_manager)
-
-    if rows != 0:
-        message = "Se actualizo el registro de inversiones"
-    else:
-        message = "No hay cambios que subir"
-
-    return {
-        "status": True,
-        "message": message,
-        "rows_uploaded": rows,
-        "destination_table": "ban_rep_inversion"
-    }
+    return await _upload("inversion", file, db_manager, run_async, force, profile, "Se actualizo el registro de inversiones")
 
 @router.post("/servicios", response_model=UploadResponse, description="Ruta para actualizar los datos de servicios")
 async def upload_servicios(
     file: UploadFile = File(...),
-    db_manager = Depends(get_db_manager)
+    db_manager = Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    profile: bool = PROFILE_QUERY,
+    replace_partitions: bool = REPLACE_PARTITIONS_QUERY,
 ):
-    df = await load_file(file)
-    rows = servicios_service(df, db_manager)
-
-    if rows != 0:
-        message = "Se actualizo el registro de servicios"
-    else:
-        message = "No hay cambios que subir"
-
-    return {
-        "status": True,
-        "message": message,
-        "rows_uploaded": rows,
-        "destination_table": "emces_servicios"
-    }
+    return await _upload("servicios", file, db_manager, run_async, force, profile, "Se actualizo el registro de servicios", replace_partitions)
 
 @router.post("/bienes", response_model=UploadResponse, description="Ruta para actualizar los datos de bienes")
 async def upload_bienes(
     file: UploadFile = File(...),
-    db_manager = Depends(get_db_manager)
+    db_manager = Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    profile: bool = PROFILE_QUERY
 ):
-    df = await load_file(file)
-    rows = bienes_service(df, db_manager)
-
-    if rows != 0:
-        message = "Se actualizo el registro de bienes"
-    else:
-        message = "No hay cambios que subir"
-
-    return {
-        "status": True,
-        "message": message,
-        "rows_uploaded": rows,
-        "destination_table": "comercio_bienes"
-    }
+    return await _upload("bienes", file, db_manager, run_async, force, profile, "Se actualizo el registro de bienes")
 
 @router.post("/paises", response_model=UploadResponse, description="Ruta para actualizar los datos de los paises")
 async def upload_paises(
     file: UploadFile = File(...),
-    db_manager = Depends(get_db_manager)
+    db_manager = Depends(get_db_manager),
+    run_async: bool = ASYNC_QUERY,
+    force: bool = FORCE_QUERY,
+    profile: bool = PROFILE_QUERY
 ):
-    df = await load_file(file)
-    rows = paises_service(df, db_manager)
-
-    if rows != 0:
-        message = "Se actualizo el registro de paises"
-    else:
-        message = "No hay cambios que subir"
-
-    return {
-        "status": True,
-        "message": message,
-        "rows_uploaded": rows,
-        "destination_table": "codigo_pais_acuerdos"
-    }
\ No newline at end of file
+    return await _upload("paises", file, db_manager, run_async, force, profile, "Se actualizo el registro de paises")
+
+@router.post(
+    "/{name}/validate",
+    response_model=ValidationResponse,
+    description="Valida un archivo sin cargarlo: encabezados, columnas requeridas y tipos sobre una muestra, con filas y tipos de salida proyectados",
+)
+async def validate_upload(
+    name: Literal["turismo", "inversion", "servicios", "bienes", "paises"],
+    file: UploadFile = File(...),
+):
+    return await validate_erc_upload(name, file)
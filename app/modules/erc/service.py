@@ -5,48 +5,222 @@ from .transformers import (
     BienesTransformer,
     PaisesTransformer,
 )
-from app.utils.uploader import upload_dataframe, full_reload_dataframe
+from app.utils.base_transformer import BaseTransformer
+from app.utils.uploader import (
+    can_stream,
+    full_reload_dataframe,
+    run_stream_upload,
+    run_upload,
+    ProgressCallback,
+    UploadResult,
+)
+from app.utils.loader_file import load_saved_file, scan_csv_file, should_stream_csv
+from app.utils.upload_ledger import already_uploaded, record_upload, upload_ledger
+from app.utils.profiling import profiling
+from app.utils.dry_run import project, sample_upload
+from app.modules.jobs.service import StageRecorder, register_job_handler
+from app.modules.jobs.store import Job
 from app.core.database import DBManager
+from app.core.settings import settings
+from dataclasses import dataclass
+from fastapi import UploadFile
+from typing import Any, Awaitable, Callable
 import polars as pl
+import time
 
 ALIAS = "erc"
 
-def turismo_service(df: pl.DataFrame, db_manager: DBManager) -> int:
-    return upload_dataframe(
+async def turismo_service(
+    df: pl.DataFrame,
+    db_manager: DBManager,
+    transformer: TurismoTransformer | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    return await run_upload(
         df,
-        TurismoTransformer(),
+        transformer or TurismoTransformer(),
         db_manager,
-        ALIAS
+        ALIAS,
+        on_progress=on_progress
     )
 
-def inversion_service(df: pl.DataFrame, db_manager: DBManager) -> int:
-    return upload_dataframe(
+async def inversion_service(
+    df: pl.DataFrame,
+    db_manager: DBManager,
+    transformer: InversionTransformer | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    return await run_upload(
         df,
-        InversionTransformer(),
+        transformer or InversionTransformer(),
         db_manager,
-        ALIAS
+        ALIAS,
+        on_progress=on_progress
     )
 
-def servicios_service(df: pl.DataFrame, db_manager: DBManager) -> int:
-    return upload_dataframe(
+async def servicios_service(
+    df: pl.DataFrame,
+    db_manager: DBManager,
+    transformer: ServiciosTransformer | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    return await run_upload(
         df,
-        ServiciosTransformer(),
+        transformer or ServiciosTransformer(),
         db_manager,
-        ALIAS
+        ALIAS,
+        on_progress=on_progress
     )
 
-def bienes_service(df: pl.DataFrame, db_manager: DBManager) -> int:
-    return upload_dataframe(
+async def bienes_service(
+    df: pl.DataFrame,
+    db_manager: DBManager,
+    transformer: BienesTransformer | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    return await run_upload(
         df,
-        BienesTransformer(),
+        transformer or BienesTransformer(),
         db_manager,
-        ALIAS
+        ALIAS,
+        on_progress=on_progress
     )
 
-def paises_service(df: pl.DataFrame, db_manager: DBManager) -> int: 
-    return full_reload_dataframe(
+async def paises_service(
+    df: pl.DataFrame,
+    db_manager: DBManager,
+    transformer: PaisesTransformer | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    return await run_upload(
         df,
-        PaisesTransformer(),
+        transformer or PaisesTransformer(),
         db_manager,
-        ALIAS
-    )
\ No newline at end of file
+        ALIAS,
+        on_progress=on_progress,
+        upload=full_reload_dataframe
+    )
+
+
+#? =========================
+#? UPLOAD PIPELINE
+#? =========================
+
+@dataclass(frozen=True)
+class ErcUpload:
+    transformer: type[BaseTransformer]
+    service: Callable[[pl.DataFrame, DBManager, BaseTransformer, ProgressCallback], Awaitable[UploadResult]]
+    destination_table: str
+    # Los CSV grandes se leen, transforman e insertan por lotes (ver `should_stream_csv`)
+    stream_csv: bool = False
+
+
+ERC_UPLOADS: dict[str, ErcUpload] = {
+    "turismo": ErcUpload(TurismoTransformer, turismo_service, "visitas_turismo", stream_csv=True),
+    "inversion": ErcUpload(InversionTransformer, inversion_service, "ban_rep_inversion"),
+    "servicios": ErcUpload(ServiciosTransformer, servicios_service, "emces_servicios", stream_csv=True),
+    "bienes": ErcUpload(BienesTransformer, bienes_service, "comercio_bienes"),
+    "paises": ErcUpload(PaisesTransformer, paises_service, "codigo_pais_acuerdos"),
+}
+
+
+async def process_erc_upload(
+    name: str,
+    path: str,
+    filename: str,
+    sha256: str,
+    db_manager: DBManager,
+    force: bool = False,
+    recorder: StageRecorder | None = None,
+    replace_partitions: bool = False,
+) -> UploadResult | None:
+    """
+    Lee el archivo persistido y lo carga con el servicio `name`.
+    Devuelve None si el mismo contenido ya se procesó para este destino (salvo `force`).
+    Con `replace_partitions` la carga borra y reinserta las particiones del archivo en
+    lugar de usar el modo por defecto del transformer.
+    """
+    spec = ERC_UPLOADS[name]
+    transformer = spec.transformer()
+    recorder = recorder or StageRecorder()
+    # El reemplazo borra filas que la carga por defecto conserva: se registra aparte en el ledger
+    ledger_name = spec.transformer.__name__
+    if replace_partitions:
+        transformer.replace_partitions()
+        ledger_name += ":replace_partition"
+    key = upload_ledger.make_key(sha256, ledger_name, spec.destination_table, ALIAS)
+
+    if settings.UPLOAD_LEDGER_ENABLED and not force and await already_uploaded(key, db_manager, ALIAS, spec.destination_table):
+        return None
+
+    if spec.stream_csv and can_stream(transformer) and should_stream_csv(path, filename):
+        with recorder.stage("stream"):
+            lf = scan_csv_file(path, spec.transformer.read_schema)
+            result = await run_stream_upload(lf, transformer, db_manager, ALIAS, on_progress=recorder.progress())
+    else:
+        with recorder.stage("read"):
+            df = await load_saved_file(path, filename, spec.transformer.read_schema)
+
+        with recorder.stage("upload"):
+            result = await spec.service(df, db_manager, transformer, recorder.progress())
+
+    if settings.UPLOAD_LEDGER_ENABLED:
+        await record_upload(key, sha256, ledger_name, db_manager, ALIAS, spec.destination_table, result.rows)
+
+    return result
+
+
+async def validate_erc_upload(name: str, file: UploadFile) -> dict[str, Any]:
+    """
+    Validación previa sin carga: lee una muestra del archivo, la transforma con el
+    transformer de `name` y proyecta filas y tipos de salida. No usa la base de datos.
+    """
+    spec = ERC_UPLOADS[name]
+    start = time.perf_counter()
+
+    sample = await sample_upload(file, spec.transformer.read_schema)
+    projection = project(spec.transformer(), sample)
+
+    return {
+        "status": True,
+        "message": "El archivo es válido para la carga",
+        **projection,
+        "elapsed_seconds": round(time.perf_counter() - start, 4),
+    }
+
+
+#? =========================
+#? JOB HANDLERS
+#? =========================
+
+def _job_handler(name: str):
+    async def handler(job: Job, db_manager: DBManager, recorder: StageRecorder) -> dict:
+        with profiling(job.options.get("profile", False)) as upload_profile:
+            result = await process_erc_upload(
+                name,
+                job.file_path,
+                job.filename,
+                job.options["sha256"],
+                db_manager,
+                force=job.options.get("force", False),
+                recorder=recorder,
+                replace_partitions=job.options.get("replace_partitions", False),
+            )
+
+        return {
+            "rows_uploaded": result.rows if result else 0,
+            "rows_per_second": result.rows_per_second if result else 0.0,
+            "inserted": result.inserted if result else 0,
+            "updated": result.updated if result else 0,
+            "skipped": result.skipped if result else 0,
+            "duplicate_keys": result.duplicate_keys if result else 0,
+            "partitions": result.partitions if result else [],
+            "destination_table": ERC_UPLOADS[name].destination_table,
+            "duplicate": result is None,
+            "timings": upload_profile.as_dict() if upload_profile else None,
+        }
+
+    return handler
+
+for _name in ERC_UPLOADS:
+    register_job_handler(f"erc.{_name}", _job_handler(_name))
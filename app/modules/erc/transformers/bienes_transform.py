@@ -1,11 +1,21 @@
-from app.core.exceptions import InvalidHeadersError, MissingSourceColumnsError
-from app.utils.base_transformer import BaseTransformer
+from app.core.exceptions import InvalidHeadersError
+from app.utils.base_transformer import BaseTransformer, Frame
+from app.utils.transform_plan import YearColumnsPlan, cached_plan, compile_year_plan
 import polars as pl
 import re
 
-YEAR_COL_PATTERN = re.compile(r"^\d{4}(-p)?$", re.IGNORECASE)
+YEAR_COL_PATTERN = re.compile(r"^(\d{4})(?P<suffix>-p)?$", re.IGNORECASE)
 
 class BienesTransformer(BaseTransformer):
+    lazy = True
+
+    incremental = True
+    key_columns = ["cod_pais", "nandina", "departamento", "flujo", "periodo", "anio"]
+    partition_column = "anio"
+    # Los años preliminares (encabezado con sufijo -p, p. ej. 2024-p) se revisan al publicarse
+    # el dato definitivo: la misma clave llega con otro valor y se actualiza con upsert
+    write_mode = "upsert"
+
     required_columns = {"cod_pais", "nandina", "departamento", "flujo", "periodo"}
     
     column_mapping = {
@@ -23,81 +33,62 @@ class BienesTransformer(BaseTransformer):
     def __init__(self):
         super().__init__(destination_table="comercio_bienes")
 
-    def _validate_headers(self, df: pl.DataFrame):
-        if not self.column_mapping:
-            return
-        
-        expected_columns = set(self.column_mapping.keys())
-        file_columns = set(df.columns)
-        
-        missing_cols = expected_columns - file_columns
-        if missing_cols:
-            raise InvalidHeadersError(list(missing_cols), list(file_columns))
-        
-    def _map_columns(self, df):
-        # Verificar que existan las columnas de mapeo requeridas
-        static_source_cols = list(self.column_mapping.keys())
-        missing = set(static_source_cols) - set(df.columns)
-
-        if missing:
-            raise MissingSourceColumnsError(list(missing))
+    @classmethod
+    def read_schema(cls, columns: tuple[str, ...]) -> dict[str, pl.DataType]:
+        # Las columnas de año (dinámicas) se leen directamente como Float64
+        plan = cached_plan(cls, columns)
+        return {**super().read_schema(columns), **dict.fromkeys(plan.year_columns, pl.Float64)}
 
-        # Identificar columnas de años (números de 4 dígitos con opcionales sufijos '-P')
-        year_cols = [c for c in df.columns if YEAR_COL_PATTERN.match(c)]
+    @classmethod
+    def compile_plan(cls, columns: tuple[str, ...]) -> YearColumnsPlan:
+        return compile_year_plan(columns, cls.column_mapping, YEAR_COL_PATTERN)
 
-        # Seleccionar solo las columnas relevantes
-        df = df.select(static_source_cols + year_cols)
+    def _validate_headers(self, df: Frame):
+        if self._plan.missing:
+            raise InvalidHeadersError(list(self._plan.missing), self._columns(df))
+        
+    def _map_columns(self, df):
+        # Columnas estáticas + columnas de años (4 dígitos con sufijo opcional '-P'), ya resueltas en el plan
+        df = df.select(self._plan.selected_columns)
 
         # Renombrar solo las estáticas (los años quedan igual)
-        df = df.rename(self.column_mapping)
-        
-        return df
+        return df.rename(self._plan.rename)
 
-    def _transform(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transform(self, df: Frame) -> Frame:
         """
         Convierte de formato pivotado (años como columnas) a formato normalizado.
         Resultado: una fila por país, año y flujo.
         """
-        # Identificar columnas de años (considerando sufijos -P)
-        year_columns = [c for c in df.columns if YEAR_COL_PATTERN.match(c)]
-
-        # Columnas de índice (no se pivotan) - incluir todas las columnas que no son años
-        index_cols = [c for c in df.columns if c not in year_columns]
+        plan: YearColumnsPlan = self._plan
 
         # Hacer unpivot para convertir años a filas
         df = df.unpivot(
-            index=index_cols,
-            on=year_columns,
+            index=list(plan.index_columns),
+            on=list(plan.year_columns),
             variable_name="anio_col",
             value_name="valor"
         )
         
-        # Extraer el año (números) de la columna fecha_col
-        # Esto maneja tanto "1994" como "2020 pre" -> se extrae "1994" o "2020"
-        df = df.with_columns(
-            pl.col("anio_col").str.extract(r"(\d{4})", 1).cast(pl.Int16).alias("anio")
-        )
-        
-        # Extraer el tipo de dato (p o vacío)
+        # Año y marca de preliminar por columna de origen, precalculados en el plan
+        # ("2024-P" -> 2024, True): un lookup en lugar de una regex por fila
         df = df.with_columns(
+            pl.col("anio_col").replace_strict(plan.years, return_dtype=pl.Int16).alias("anio"),
             pl.col("anio_col")
-            .str.contains(r"(?i)-p$")
-            .alias("es_preliminar")
+            .replace_strict({c: s is not None for c, s in plan.suffixes.items()}, return_dtype=pl.Boolean)
+            .alias("es_preliminar"),
         )
         
-        # Descartar la columna fecha_col original, ya no necesaria
+        # Descartar la columna anio_col original, ya no necesaria
         df = df.drop("anio_col")
 
-        # Limpiar valores: reemplazar coma decimal y castear
-        df = df.with_columns(
-            pl.col("valor")
-              .cast(pl.Utf8)
-              .str.replace(",", ".")
-              .cast(pl.Float64)
-              .alias("valor")
-        )
+        # Con el contrato de lectura `valor` ya llega como Float64; si el archivo no lo
+        # cumplió (cifras con coma decimal leídas como texto) se limpia aquí
+        valor = pl.col("valor")
+        if self._schema(df)["valor"] == pl.String:
+            valor = valor.str.replace(",", ".")
+        df = df.with_columns(valor.cast(pl.Float64))
 
         # Eliminar filas donde valor es null (años sin dato)
         # df = df.filter(pl.col("valor").is_not_null())
         
-        return df
\ No newline at end of file
+        return df
@@ -1,14 +1,23 @@
-from app.utils.base_transformer import BaseTransformer
-from app.core.exceptions import (
-    MissingSourceColumnsError,
-    InvalidHeadersError
-)
+from app.utils.base_transformer import BaseTransformer, Frame
+from app.utils.transform_plan import YearColumnsPlan, cached_plan, compile_year_plan
+from app.core.exceptions import InvalidHeadersError
 import polars as pl
 import re 
 
+YEAR_COL_PATTERN = re.compile(r"^(\d{4})(_?(?P<suffix>pre|pro))?$")
+
 class InversionTransformer(BaseTransformer):
+    lazy = True
+
+    incremental = True
+    key_columns = ["cod_pais", "flujo", "fecha"]
+    partition_column = "fecha"
+    # Las columnas de año con sufijo pre/pro (2020_pre, 2020pro; `tipo_dato`) no son cifras
+    # definitivas y los envíos siguientes las revisan: la misma clave llega con otro valor y se
+    # actualiza con upsert
+    write_mode = "upsert"
+
     required_columns = {"pais", "cod_pais", "flujo", "pais_aladi", "pais_banrep"}
-    required_headers = {"pais", "cod_pais", "pais_aladi", "flujo", "pais_banrep"}
 
     column_mapping = {
         "pais": "pais",
@@ -22,73 +31,57 @@ class InversionTransformer(BaseTransformer):
     def __init__(self):
         super().__init__(destination_table="ban_rep_inversion")
 
-    def _validate_headers(self, df: pl.DataFrame):
-        file_columns = set(df.columns)
-        
-        missing_required = self.required_headers - file_columns
-        if missing_required:
-            raise InvalidHeadersError(list(missing_required), list(file_columns))
+    @classmethod
+    def read_schema(cls, columns: tuple[str, ...]) -> dict[str, pl.DataType]:
+        # Las columnas de año (dinámicas) se leen directamente como Float64
+        plan = cached_plan(cls, columns)
+        return {**super().read_schema(columns), **dict.fromkeys(plan.year_columns, pl.Float64)}
+
+    @classmethod
+    def compile_plan(cls, columns: tuple[str, ...]) -> YearColumnsPlan:
+        return compile_year_plan(columns, cls.column_mapping, YEAR_COL_PATTERN)
+
+    def _validate_headers(self, df: Frame):
+        file_columns = self._columns(df)
+
+        if self._plan.missing:
+            raise InvalidHeadersError(list(self._plan.missing), file_columns)
         
-        year_cols = [c for c in df.columns if re.match(r"^\d{4}(_?(pre|pro))?$", c)]
-        if not year_cols:
+        if not self._plan.year_columns:
             raise InvalidHeadersError(
                 ["Al menos una columna de año (1994, 1995, ..., 2025, etc)"],
-                list(file_columns)
+                file_columns
             )
 
-    def _map_columns(self, df: pl.DataFrame) -> pl.DataFrame:
-        # Verificar que existan las columnas de mapeo requeridas
-        required_cols = self.required_headers
-        missing_source_cols = required_cols - set(df.columns)
-        if missing_source_cols:
-            raise MissingSourceColumnsError(list(missing_source_cols))
+    def _map_columns(self, df: Frame) -> Frame:
+        # Columnas requeridas + columnas de años (4 dígitos con sufijos opcionales 'pre'/'pro'), resueltas en el plan
+        return df.select(self._plan.selected_columns)
 
-        # Identificar columnas de años (números de 4 dígitos con opcionales sufijos 'pre'/'pro')
-        year_cols = [c for c in df.columns if re.match(r"^\d{4}(_?(pre|pro))?$", c)]
-        
-        # Columnas a mantener: las requeridas + las de años
-        cols_to_keep = list(self.required_headers) + year_cols
-        
-        # Seleccionar solo las columnas relevantes
-        df = df.select(cols_to_keep)
-        
-        return df
-
-    def _transform(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transform(self, df: Frame) -> Frame:
         """
         Convierte de formato pivotado (años como columnas) a formato normalizado.
         Resultado: una fila por país, año y flujo.
         """
-        # Identificar columnas de años (considerando sufijos pre/pro)
-        year_columns = [c for c in df.columns if re.match(r"^\d{4}(_?(pre|pro))?$", c)]
-        
-        # Columnas de índice (no se pivotan) - incluir todas las columnas que no son años
-        index_cols = [c for c in df.columns if c not in year_columns]
+        plan: YearColumnsPlan = self._plan
 
         # Hacer unpivot para convertir años a filas
         df = df.unpivot(
-            index=index_cols,
-            on=year_columns,
+            index=list(plan.index_columns),
+            on=list(plan.year_columns),
             variable_name="fecha_col",
             value_name="valor"
         )
         
-        # Extraer el año (números) de la columna fecha_col
-        # Esto maneja tanto "1994" como "2020 pre" -> se extrae "1994" o "2020"
+        # Año y tipo de dato por columna de origen, precalculados en el plan
+        # ("2020_pre" -> 2020, "pre"; sin sufijo es dato "actual")
         df = df.with_columns(
-            pl.col("fecha_col").str.extract(r"(\d{4})", 1).cast(pl.Int32).alias("fecha")
-        )
-        
-        # Opcionalmente, extraer el tipo de dato (pre, pro, o vacío)
-        df = df.with_columns(
-            pl.col("fecha_col").str.extract(r"(pre|pro)?$", 1).alias("tipo_dato")
-            .fill_null("actual")  # Si no tiene sufijo, es dato actual
+            pl.col("fecha_col").replace_strict(plan.years, return_dtype=pl.Int32).alias("fecha"),
+            pl.col("fecha_col")
+            .replace_strict({c: s or "actual" for c, s in plan.suffixes.items()}, return_dtype=pl.Utf8)
+            .alias("tipo_dato"),
         )
         
         # Descartar la columna fecha_col original, ya no necesaria
         df = df.drop("fecha_col")
         
         return df
-    
-
-    
@@ -2,6 +2,8 @@ from app.utils.base_transformer import BaseTransformer
 import polars as pl
 
 class PaisesTransformer(BaseTransformer):
+    reload_strategy = "swap"
+
     required_columns = {
         "cod_pais",
     }
@@ -1,7 +1,13 @@
-from app.utils.base_transformer import BaseTransformer
+from app.utils.base_transformer import BaseTransformer, Frame
 import polars as pl
 
 class ServiciosTransformer(BaseTransformer):
+    lazy = True
+
+    incremental = True
+    key_columns = ["flujo_comercial", "periodo_mes", "codigo_cabps", "cod_pais", "cod_depto"]
+    partition_column = "periodo_mes"
+
     required_columns = {
         "flujo_comercial",
         "periodo_mes",
@@ -10,6 +16,11 @@ class ServiciosTransformer(BaseTransformer):
         "cod_depto",
     }
 
+    source_schema = {
+        "periodo_mes": pl.Int32,
+        "usd_millones": pl.Float64,
+    }
+
     column_mapping = {
         "cod_pais":"cod_pais",
         "pais_serv":"nombre_pais",
@@ -26,7 +37,7 @@ class ServiciosTransformer(BaseTransformer):
     def __init__(self):
         super().__init__(destination_table="emces_servicios")
 
-    def _transform(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transform(self, df: Frame) -> Frame:
         group_cols = ["flujo_comercial", "periodo_mes", "codigo_cabps", "cod_pais", "cod_depto"]
         df_aggregated = df.group_by(group_cols).agg(
             pl.col("millones_dolares").sum()
@@ -1,7 +1,13 @@
-from app.utils.base_transformer import BaseTransformer
+from app.utils.base_transformer import BaseTransformer, Frame
 import polars as pl
 
 class TurismoTransformer(BaseTransformer):
+    lazy = True
+
+    incremental = True
+    key_columns = ["anio", "mes", "codigo_pais", "pais", "flujo"]
+    partition_column = "anio"
+
     required_columns = {
         "anio",
         "pais",
@@ -11,6 +17,12 @@ class TurismoTransformer(BaseTransformer):
         "flujo",
     }
 
+    source_schema = {
+        "ano": pl.Int16,
+        "mes": pl.Int8,
+        "viajeros": pl.Int64,
+    }
+
     column_mapping = {
         "ano": "anio",
         "mes": "mes",
@@ -23,7 +35,7 @@ class TurismoTransformer(BaseTransformer):
     def __init__(self):
         super().__init__(destination_table="visitas_turismo")
 
-    def _transform(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transform(self, df: Frame) -> Frame:
         group_cols = ["anio", "mes", "codigo_pais", "pais", "flujo"]
         df_aggregated = df.group_by(group_cols).agg(
             pl.col("viajeros").sum()
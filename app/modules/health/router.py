@@ -1,4 +1,7 @@
 from fastapi import APIRouter
+from app.core.executor import executor
+from app.utils.upload_ledger import upload_ledger
+from app.utils.normalization import cache_stats as normalization_cache_stats
 from app.utils.schema import HealthResponse
 
 router = APIRouter()
@@ -14,4 +17,16 @@ async def health_check():
         return HealthResponse(
             status=False,
             message=str(e),
-        )
\ No newline at end of file
+        )
+
+@router.get("/executor", description="Estado de los pools de ejecución (cola, tareas activas y tiempos de espera)")
+async def executor_stats():
+    return executor.stats()
+
+@router.get("/upload-ledger", description="Entradas y aciertos del registro de cargas ya procesadas")
+async def upload_ledger_stats():
+    return upload_ledger.stats()
+
+@router.get("/normalization", description="Aciertos de la caché de normalización de encabezados y hojas (proceso de la API; sin los hijos del pool de CPU en modo process)")
+async def normalization_stats():
+    return normalization_cache_stats()
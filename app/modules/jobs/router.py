@@ -0,0 +1,40 @@
+from dataclasses import asdict
+from typing import Literal
+from fastapi import APIRouter, Query, UploadFile
+from fastapi.responses import JSONResponse
+from app.core.exceptions import JobNotFoundError
+from app.utils.schema import JobAcceptedResponse, JobResponse
+from app.utils.intake import HeaderCheck
+from .service import enqueue_upload, job_store
+
+router = APIRouter()
+
+# Parámetro `?async=true` compartido por las rutas de carga
+ASYNC_QUERY = Query(False, alias="async", description="Encola la carga y devuelve un job id (202)")
+
+async def accept_job(
+    file: UploadFile,
+    kind: str,
+    options: dict | None = None,
+    check_header: HeaderCheck | None = None,
+) -> JSONResponse:
+    """Encola la carga y responde 202 con la URL de consulta del trabajo."""
+    job = await enqueue_upload(file, kind, options, check_header)
+    content = JobAcceptedResponse(job_id=job.id, state=job.state, status_url=f"/api/v1/jobs/{job.id}")
+    return JSONResponse(status_code=202, content=content.model_dump())
+
+@router.get("", response_model=list[JobResponse], description="Lista los trabajos de carga más recientes")
+async def list_jobs(
+    state: Literal["queued", "running", "succeeded", "failed"] | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    return [asdict(job) for job in job_store.list(state=state, limit=limit)]
+
+@router.get("/{job_id}", response_model=JobResponse, description="Estado, tiempos por etapa y resultado de un trabajo")
+async def get_job(job_id: str):
+    job = job_store.get(job_id)
+
+    if job is None:
+        raise JobNotFoundError(job_id)
+
+    return asdict(job)
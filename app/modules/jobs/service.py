@@ -0,0 +1,252 @@
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Awaitable, Callable
+import asyncio
+import logging
+import socket
+import time
+import uuid
+import os
+
+from app.core.database import DBManager
+from app.core.exceptions import AppException, DatabaseConnectionError
+from app.core.metrics import route_label
+from app.core.settings import settings
+from app.utils.intake import HeaderCheck
+from app.utils.loader_file import get_extension, spool_upload
+from fastapi import UploadFile
+from sqlalchemy.exc import DisconnectionError, OperationalError
+from .store import Job, JobStore
+
+logger = logging.getLogger(__name__)
+
+# Intervalo mínimo (segundos) entre escrituras del avance de un trabajo en el store
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+# (chunks, filas enviadas, filas totales), como el `on_progress` del uploader
+ProgressReport = Callable[[int, int, int], Any]
+
+
+class StageRecorder:
+    """
+    Acumula la duración (segundos) de cada etapa de un trabajo y, con `report`, publica
+    el avance de sus cargas (ver `progress`).
+    """
+
+    def __init__(self, report: ProgressReport | None = None):
+        self.stages: dict[str, float] = {}
+        self._report = report
+        self._progress: dict[str, tuple[int, int, int]] = {}
+        self._reported_at = 0.0
+        self._lock = Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(time.perf_counter() - start, 4)
+
+    def progress(self, source: str = "") -> ProgressReport:
+        """
+        Callback `on_progress` para la carga de `source` (p. ej. una hoja). El avance de
+        todas las cargas del trabajo se suma y se publica como mucho cada
+        `PROGRESS_INTERVAL_SECONDS`. Se llama desde el hilo de I/O o desde el event loop.
+        """
+        def on_progress(chunks: int, rows_sent: int, rows_total: int) -> None:
+            with self._lock:
+                self._progress[source] = (chunks, rows_sent, rows_total)
+                now = time.monotonic()
+                if now - self._reported_at < PROGRESS_INTERVAL_SECONDS:
+                    return
+                self._reported_at = now
+            self.flush()
+
+        return on_progress
+
+    def flush(self) -> None:
+        """Publica el último avance acumulado, sin esperar al intervalo."""
+        if self._report is None:
+            return
+        with self._lock:
+            if not self._progress:
+                return
+            chunks, rows_sent, rows_total = (sum(values) for values in zip(*self._progress.values()))
+        self._report(chunks, rows_sent, rows_total)
+
+
+# Un handler recibe (trabajo, db_manager, recorder) y devuelve un dict con al menos `rows_uploaded`.
+JobHandler = Callable[[Job, DBManager, StageRecorder], Awaitable[dict[str, Any]]]
+
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def register_job_handler(kind: str, handler: JobHandler) -> None:
+    JOB_HANDLERS[kind] = handler
+
+
+job_store = JobStore(settings.JOBS_DB_PATH)
+
+
+async def enqueue_upload(
+    file: UploadFile,
+    kind: str,
+    options: dict[str, Any] | None = None,
+    check_header: HeaderCheck | None = None,
+) -> Job:
+    """Persiste el archivo en disco y encola el trabajo; `options` se guarda junto al trabajo."""
+    get_extension(file.filename)
+
+    job_id = uuid.uuid4().hex
+    destination = Path(settings.JOBS_UPLOAD_DIR) / f"{job_id}_{Path(file.filename).name}"
+    try:
+        upload = await spool_upload(file, destination, check_header)
+    except Exception:
+        # Rechazado en el intake (tamaño, firma, encabezados): no queda archivo huérfano
+        destination.unlink(missing_ok=True)
+        raise
+
+    job = job_store.create(
+        kind,
+        file.filename,
+        upload.path,
+        options={"sha256": upload.sha256, **(options or {})},
+        job_id=job_id,
+    )
+    job_worker.notify()
+    logger.info(f"[Jobs] Job {job.id} queued ({kind}, {file.filename})")
+    return job
+
+
+def _is_transient(error: BaseException | None) -> bool:
+    """
+    Errores que justifican reintentar: caídas de conexión u operacionales de la base de
+    datos, también cuando llegan envueltos (`__cause__`) en una AppException como
+    DatabaseInsertError. Los errores de datos o del archivo se repetirían igual.
+    """
+    while error is not None:
+        if isinstance(error, (OperationalError, DisconnectionError, DatabaseConnectionError)):
+            return True
+        error = error.__cause__
+    return False
+
+
+class JobWorker:
+    """
+    Procesa trabajos de la cola con `concurrency` tareas asyncio.
+    Puede correr dentro de la API o desde `python -m app.worker`, en uno o varios procesos
+    sobre el mismo JOBS_DB_PATH: cada proceso tiene un id propio y renueva el lease de sus
+    trabajos; solo se recuperan los trabajos cuyo lease venció.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        name: str,
+        concurrency: int,
+        poll_interval: float = 2.0,
+        lease_seconds: float = settings.JOBS_LEASE_SECONDS,
+        max_attempts: int = settings.JOBS_MAX_ATTEMPTS,
+    ):
+        self._store = store
+        self._name = name
+        self._concurrency = concurrency
+        self._poll_interval = poll_interval
+        self._lease_seconds = lease_seconds
+        self._max_attempts = max_attempts
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self.id = f"{name}:{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, db_manager: DBManager):
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._loop(db_manager), name=f"{self._name}-{i}")
+            for i in range(self._concurrency)
+        ]
+        logger.info(f"[Jobs] Worker '{self.id}' started with concurrency {self._concurrency}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _expire_leases(self):
+        for job in self._store.expire_leases(self._max_attempts):
+            Path(job.file_path).unlink(missing_ok=True)
+            logger.warning(f"[Jobs] Job {job.id} failed: lease expired after {job.attempts} attempt(s)")
+
+    async def _heartbeat(self, job: Job):
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            if not self._store.heartbeat(job.id, self.id, self._lease_seconds):
+                logger.warning(f"[Jobs] Job {job.id}: lease lost by worker '{self.id}'")
+                return
+
+    async def _loop(self, db_manager: DBManager):
+        while True:
+            self._expire_leases()
+            job = self._store.claim_next(self.id, self._lease_seconds)
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.run_job(job, db_manager)
+
+    async def run_job(self, job: Job, db_manager: DBManager):
+        recorder = StageRecorder(report=lambda *progress: self._store.progress(job.id, self.id, *progress))
+        handler = JOB_HANDLERS.get(job.kind)
+        route_label.set(f"job:{job.kind}")
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job kind '{job.kind}'")
+
+            result = await handler(job, db_manager, recorder)
+            recorder.flush()
+            if self._store.succeed(job.id, self.id, result.get("rows_uploaded", 0), result, recorder.stages):
+                Path(job.file_path).unlink(missing_ok=True)
+                logger.success(f"[Jobs] Job {job.id} finished ({result.get('rows_uploaded', 0)} rows)")
+            else:
+                logger.warning(f"[Jobs] Job {job.id} finished after its lease was lost; result not recorded")
+
+        except Exception as e:
+            recorder.flush()
+            if isinstance(e, AppException):
+                error = {"error_code": e.error_code, "message": e.message, "details": e.details}
+            else:
+                error = {"error_code": "INTERNAL_001", "message": str(e), "details": {}}
+
+            if _is_transient(e) and job.attempts < self._max_attempts:
+                # El archivo se conserva para el siguiente intento
+                if not self._store.retry(job.id, self.id, error):
+                    return
+                self.notify()
+                logger.warning(
+                    f"[Jobs] Job {job.id} failed (attempt {job.attempts}/{self._max_attempts}), requeued: {error['message']}"
+                )
+            elif self._store.fail(job.id, self.id, error, recorder.stages):
+                Path(job.file_path).unlink(missing_ok=True)
+                if isinstance(e, AppException):
+                    logger.warning(f"[Jobs] Job {job.id} failed: [{e.error_code}] {e.message}")
+                else:
+                    logger.error(f"[Jobs] Job {job.id} failed", exc_info=e)
+
+        finally:
+            heartbeat.cancel()
+
+
+job_worker = JobWorker(job_store, name="api", concurrency=settings.JOBS_CONCURRENCY)
@@ -0,0 +1,259 @@
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal
+import sqlite3
+import json
+import time
+import uuid
+
+JobState = Literal["queued", "running", "succeeded", "failed"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    stages TEXT NOT NULL DEFAULT '{}',
+    rows_uploaded INTEGER,
+    result TEXT,
+    error TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    chunks INTEGER,
+    rows_sent INTEGER,
+    rows_total INTEGER
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_state_created ON jobs (state, created_at);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    filename: str
+    file_path: str
+    state: JobState
+    created_at: float
+    worker: str | None = None
+    options: dict[str, Any] = field(default_factory=dict)
+    started_at: float | None = None
+    finished_at: float | None = None
+    stages: dict[str, float] = field(default_factory=dict)
+    rows_uploaded: int | None = None
+    result: dict[str, Any] | None = None
+    error: dict[str, Any] | None = None
+    # Mientras está `running`, el worker renueva el lease; uno vencido se considera abandonado
+    lease_expires_at: float | None = None
+    attempts: int = 0
+    # Avance de la carga en curso (`on_progress` del uploader); `rows_total` es 0 si no se
+    # conoce de antemano (carga streaming)
+    chunks: int | None = None
+    rows_sent: int | None = None
+    rows_total: int | None = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        data = dict(row)
+        data["stages"] = json.loads(data["stages"] or "{}")
+        data["options"] = json.loads(data["options"] or "{}")
+        data["result"] = json.loads(data["result"]) if data["result"] else None
+        data["error"] = json.loads(data["error"]) if data["error"] else None
+        return cls(**data)
+
+
+class JobStore:
+    """
+    Almacén local (SQLite) de trabajos de carga.
+    Cada operación abre su propia conexión, por lo que es seguro usarlo desde
+    varios hilos y desde procesos distintos (API y worker).
+    """
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            yield conn
+        finally:
+            conn.close()
+
+    def create(
+        self,
+        kind: str,
+        filename: str,
+        file_path: str,
+        options: dict[str, Any] | None = None,
+        job_id: str | None = None,
+    ) -> Job:
+        job = Job(
+            id=job_id or uuid.uuid4().hex,
+            kind=kind,
+            filename=filename,
+            file_path=file_path,
+            state="queued",
+            created_at=time.time(),
+            options=options or {},
+        )
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, filename, file_path, options, state, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.id, job.kind, job.filename, job.file_path, json.dumps(job.options), job.state, job.created_at),
+            )
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def list(self, state: JobState | None = None, limit: int = 50) -> list[Job]:
+        sql = "SELECT * FROM jobs"
+        params: tuple = ()
+        if state:
+            sql += " WHERE state = ?"
+            params = (state,)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + (limit,)).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def claim_next(self, worker: str, lease_seconds: float) -> Job | None:
+        """
+        Toma el trabajo en cola más antiguo y lo marca como `running` de forma atómica,
+        con un lease de `lease_seconds` a nombre de `worker`.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE state = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET state = 'running', worker = ?, started_at = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1, stages = '{}', chunks = NULL, rows_sent = NULL, rows_total = NULL "
+                    "WHERE id = ?",
+                    (worker, now, now + lease_seconds, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return self.get(row["id"])
+
+    def heartbeat(self, job_id: str, worker: str, lease_seconds: float) -> bool:
+        """Renueva el lease; False si `worker` ya no es el dueño del trabajo."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time() + lease_seconds, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def progress(self, job_id: str, worker: str, chunks: int, rows_sent: int, rows_total: int) -> bool:
+        """Publica el avance de la carga; False si `worker` ya no es el dueño del trabajo."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET chunks = ?, rows_sent = ?, rows_total = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (chunks, rows_sent, rows_total, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def succeed(
+        self,
+        job_id: str,
+        worker: str,
+        rows_uploaded: int,
+        result: dict[str, Any],
+        stages: dict[str, float],
+    ) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'succeeded', finished_at = ?, lease_expires_at = NULL, rows_uploaded = ?, "
+                "result = ?, error = NULL, stages = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time(), rows_uploaded, json.dumps(result, default=str), json.dumps(stages), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker: str, error: dict[str, Any], stages: dict[str, float]) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'failed', finished_at = ?, lease_expires_at = NULL, error = ?, stages = ? "
+                "WHERE id = ? AND worker = ? AND state = 'running'",
+                (time.time(), json.dumps(error, default=str), json.dumps(stages), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def retry(self, job_id: str, worker: str, error: dict[str, Any]) -> bool:
+        """Devuelve a la cola un trabajo fallido por un error transitorio, conservando el último error."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'queued', worker = NULL, started_at = NULL, lease_expires_at = NULL, "
+                "error = ? WHERE id = ? AND worker = ? AND state = 'running'",
+                (json.dumps(error, default=str), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def expire_leases(self, max_attempts: int) -> "list[Job]":
+        """
+        Recupera los trabajos `running` cuyo lease venció (su worker murió o se colgó):
+        vuelven a la cola, o fallan si ya agotaron `max_attempts`. Devuelve los fallidos.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, attempts FROM jobs WHERE state = 'running' AND lease_expires_at < ?",
+                    (now,),
+                ).fetchall()
+
+                failed = [row["id"] for row in rows if row["attempts"] >= max_attempts]
+                requeued = [row["id"] for row in rows if row["attempts"] < max_attempts]
+                error = json.dumps({
+                    "error_code": "JOB_002",
+                    "message": "The worker running this job stopped renewing its lease.",
+                    "details": {"max_attempts": max_attempts},
+                })
+
+                conn.executemany(
+                    "UPDATE jobs SET state = 'queued', worker = NULL, started_at = NULL, lease_expires_at = NULL, "
+                    "error = ? WHERE id = ?",
+                    [(error, job_id) for job_id in requeued],
+                )
+                conn.executemany(
+                    "UPDATE jobs SET state = 'failed', finished_at = ?, lease_expires_at = NULL, error = ? WHERE id = ?",
+                    [(now, error, job_id) for job_id in failed],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        return [self.get(job_id) for job_id in failed]
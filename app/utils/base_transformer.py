@@ -6,28 +6,126 @@ from app.core.exceptions import (
     MissingRequiredColumnsError,
     InvalidHeadersError,
 )
+from app.utils.normalization import normalize_header, normalize_headers
+from app.utils.transform_plan import cached_plan
+from typing import Any, Literal
 import polars as pl
-import unicodedata
+import time
+
+# Las etapas reciben y devuelven un DataFrame (modo eager) o un LazyFrame (modo lazy)
+Frame = pl.DataFrame | pl.LazyFrame
+
+WriteMode = Literal["ignore", "upsert", "replace_partition"]
 
 class BaseTransformer(ABC):
     required_columns: set[str] = set()
     column_mapping: dict[str, str] = {}
 
+    # Estrategia de full_reload_dataframe: "delete" (DELETE + INSERT) o "swap" (tabla staging + rename atómico;
+    # en PostgreSQL, DELETE + carga en una sola transacción)
+    reload_strategy: Literal["delete", "swap"] = "delete"
+    # Con "swap", conserva la tabla anterior como `<tabla>__old` para rollback manual
+    keep_previous_table: bool = False
+
+    # Con `lazy = True` todas las etapas construyen un único plan LazyFrame que se
+    # ejecuta una sola vez al final (pushdown de proyección/predicados, CSE).
+    lazy: bool = False
+
+    # Con `incremental = True` upload_dataframe solo inserta filas nuevas y actualiza
+    # las modificadas según `key_columns` (clave natural). `partition_column` limita
+    # la lectura de la tabla destino a las particiones presentes en el archivo.
+    incremental: bool = False
+    key_columns: list[str] = []
+    partition_column: str | None = None
+
+    # Modo de escritura de upload_dataframe:
+    #   "ignore"            INSERT que descarta claves ya existentes
+    #   "upsert"            INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT (key_columns) DO UPDATE
+    #   "replace_partition" borra las particiones (`partition_column`) presentes y las reinserta
+    write_mode: WriteMode = "ignore"
+
+    # Contrato de tipos por encabezado de origen (normalizado) que el lector aplica al
+    # parsear (`schema_overrides` / dtypes de calamine) en lugar de inferir y castear después.
+    source_schema: dict[str, pl.DataType] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Las claves de `column_mapping` pasan por la misma normalización que los encabezados
+        if "column_mapping" in cls.__dict__:
+            cls.column_mapping = {normalize_header(k): v for k, v in cls.column_mapping.items()}
+
     def __init__(self, destination_table: str):
         self._destination_table = destination_table
+        # Plan compilado para los encabezados del frame en curso (ver `compile_plan`)
+        self._plan: Any = None
+
+    def replace_partitions(self) -> "BaseTransformer":
+        """
+        Cambia solo esta instancia (una carga concreta) a `write_mode = "replace_partition"`,
+        en lugar de la carga por defecto de la clase (p. ej. la incremental).
+        """
+        self.write_mode = "replace_partition"
+        self.incremental = False
+        return self
+
+    @classmethod
+    def read_schema(cls, columns: tuple[str, ...]) -> dict[str, pl.DataType]:
+        """Tipos a forzar al leer un archivo cuyos encabezados normalizados son `columns`."""
+        return {c: cls.source_schema[c] for c in columns if c in cls.source_schema}
+
+    @classmethod
+    def compile_plan(cls, columns: tuple[str, ...]) -> Any:
+        """
+        Resuelve una vez por firma de encabezados (ya normalizados) lo que las etapas
+        necesitan del esquema: columnas a seleccionar, renombres, spec del unpivot...
+        Se cachea por (clase, encabezados) con expulsión LRU. None = sin plan.
+        """
+        return None
 
 
     def transform(self, df: pl.DataFrame) -> pl.DataFrame:
         """
         Transforms the input DataFrame and returns the transformed DataFrame.
         """
+        return self.transform_with_timings(df)[0]
+
+    def transform_with_timings(self, df: pl.DataFrame) -> tuple[pl.DataFrame, list[dict]]:
+        """
+        Igual que `transform`, y además devuelve por etapa su tiempo de pared/CPU y las
+        filas de entrada/salida. En modo lazy las etapas solo construyen el plan (sin
+        filas) y el coste real queda en la etapa `collect`.
+        """
+        steps: list[dict] = []
         try:
-            df = self._clean(df)
-            self._validate_headers(df)
-            df = self._map_columns(df)
-            self._validate_required_columns(df)
-            df = self._transform(df)
-            return df
+            frame = self._build(df.lazy() if self.lazy else df, steps)
+            if isinstance(frame, pl.LazyFrame):
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                frame = frame.collect()
+                steps.append({
+                    "step": "collect",
+                    "wall_seconds": time.perf_counter() - wall_start,
+                    "cpu_seconds": time.process_time() - cpu_start,
+                    "rows_in": df.height,
+                    "rows_out": frame.height,
+                })
+            return frame, steps
+        except AppException:
+            raise
+
+        except Exception as e:
+            raise TransformationError(
+                message="Unexpected error during transformation.",
+                details={"original_error": str(e)},
+            ) from e
+
+    def build_plan(self, lf: pl.LazyFrame) -> pl.LazyFrame:
+        """
+        Construye el plan completo sobre `lf` (p. ej. un `pl.scan_csv`) sin materializarlo,
+        para que la carga streaming lo ejecute por lotes. Las validaciones de encabezados
+        corren aquí, antes de leer datos.
+        """
+        try:
+            return self._build(lf)
         except AppException:
             raise
 
@@ -36,23 +134,69 @@ class BaseTransformer(ABC):
                 message="Unexpected error during transformation.",
                 details={"original_error": str(e)},
             ) from e
-            
+
+    def check_header(self, columns: list[str]) -> None:
+        """
+        Valida solo los encabezados crudos de un archivo (p. ej. la primera línea de un CSV)
+        sin leer datos; lanza InvalidHeadersError igual que `transform`.
+        """
+        df = self._clean(pl.DataFrame(schema=dict.fromkeys(columns, pl.String)))
+        self._plan = cached_plan(type(self), tuple(self._columns(df)))
+        self._validate_headers(df)
+
+    def explain(self, df: pl.DataFrame, optimized: bool = True) -> str:
+        """
+        Devuelve el plan (optimizado por defecto) que ejecutaría `transform` en modo lazy.
+        Útil para depuración; no materializa el resultado.
+        """
+        return self._build(df.lazy()).explain(optimized=optimized)
+
+    def _build(self, df: Frame, steps: list[dict] | None = None) -> Frame:
+        steps = [] if steps is None else steps
+
+        def rows(frame) -> int | None:
+            return frame.height if isinstance(frame, pl.DataFrame) else None
+
+        def step(name: str, fn, frame: Frame):
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            result = fn(frame)
+            output = result if result is not None else frame
+            steps.append({
+                "step": name,
+                "wall_seconds": time.perf_counter() - wall_start,
+                "cpu_seconds": time.process_time() - cpu_start,
+                "rows_in": rows(frame),
+                "rows_out": rows(output),
+            })
+            return result
+
+        df = step("clean", self._clean, df)
+        self._plan = cached_plan(type(self), tuple(self._columns(df)))
+        step("validate_headers", self._validate_headers, df)
+        df = step("map_columns", self._map_columns, df)
+        step("validate_required_columns", self._validate_required_columns, df)
+        return step("transform", self._transform, df)
+
+    @staticmethod
+    def _columns(df: Frame) -> list[str]:
+        """Nombres de columnas sin materializar un LazyFrame."""
+        if isinstance(df, pl.LazyFrame):
+            return df.collect_schema().names()
+        return df.columns
     
-    def _clean(self, df: pl.DataFrame) -> pl.DataFrame:
-        def normalize_column_name(col: str) -> str:
-            # Remover acentos
-            col = unicodedata.normalize("NFD", col)
-            col = "".join(c for c in col if unicodedata.category(c) != "Mn")
-            # Eliminar saltos de línea y retornos de carro
-            col = col.replace("\n", " ").replace("\r", " ")
-            # Convertir a minúsculas y reemplazar espacios
-            col = col.strip().lower().replace(" ", "_")
-            return col
-        
-        new_columns = [normalize_column_name(col) for col in df.columns]
-        return df.rename(dict(zip(df.columns, new_columns)))
+    @staticmethod
+    def _schema(df: Frame) -> pl.Schema:
+        """Esquema sin materializar un LazyFrame."""
+        if isinstance(df, pl.LazyFrame):
+            return df.collect_schema()
+        return df.schema
+
+    def _clean(self, df: Frame) -> Frame:
+        # Normalización compartida y cacheada: los mismos encabezados se repiten cada mes
+        columns = self._columns(df)
+        return df.rename(dict(zip(columns, normalize_headers(columns))))
     
-    def _validate_headers(self, df: pl.DataFrame):
+    def _validate_headers(self, df: Frame):
         """
         Valida que el archivo contenga todos los encabezados (headers) esperados en la primera fila.
         Si el archivo no tiene los headers esperados, lanza InvalidHeadersError.
@@ -61,20 +205,20 @@ class BaseTransformer(ABC):
             return
         
         expected_columns = set(self.column_mapping.keys())
-        file_columns = set(df.columns)
+        file_columns = set(self._columns(df))
         
         missing_cols = expected_columns - file_columns
         if missing_cols:
             raise InvalidHeadersError(list(missing_cols), list(file_columns))
     
-    def _map_columns(self, df: pl.DataFrame):
+    def _map_columns(self, df: Frame):
         """
         Aplica el mapeo de columnas definido en `column_mapping` al DataFrame. Si no se han definido columnas requeridas, devuelve el DataFrame sin cambios. Si faltan columnas de origen para el mapeo, lanza un error.
         """
         if not self.required_columns:
             return df
         
-        missing_source_cols = set(self.column_mapping.keys()) - set(df.columns)
+        missing_source_cols = set(self.column_mapping.keys()) - set(self._columns(df))
 
         if missing_source_cols:
             raise MissingSourceColumnsError(list(missing_source_cols))
@@ -83,18 +227,19 @@ class BaseTransformer(ABC):
         return df.rename(self.column_mapping)
 
     
-    def _validate_required_columns(self, df: pl.DataFrame):
+    def _validate_required_columns(self, df: Frame):
         """
         Valida que todas las columnas requeridas estén presentes en el DataFrame.
         """
-        missing_columns = self.required_columns - set(df.columns)
+        missing_columns = self.required_columns - set(self._columns(df))
         if missing_columns:
             raise MissingRequiredColumnsError(list(missing_columns))
     
     @abstractmethod
-    def _transform(self, df: pl.DataFrame) -> pl.DataFrame:
+    def _transform(self, df: Frame) -> Frame:
         """
         Método abstracto que debe ser implementado por las clases hijas para realizar la transformación específica.
+        En modo lazy recibe y debe devolver un LazyFrame.
         """
         ...
 
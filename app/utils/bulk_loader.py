@@ -0,0 +1,395 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator, Literal
+import io
+import logging
+
+from sqlalchemy.engine import Connection
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+OnConflict = Literal["error", "ignore", "upsert"]
+
+# Alias de la fila insertada en el upsert de MySQL (`INSERT ... AS new ON DUPLICATE KEY UPDATE`)
+_ROW_ALIAS = "new"
+
+
+def _placeholders(paramstyle: str, n_cols: int, n_rows: int) -> str:
+    """Genera `(...),(...)` con el estilo de parámetros posicional del driver."""
+    if paramstyle in ("numeric", "numeric_dollar"):
+        prefix = "$" if paramstyle == "numeric_dollar" else ":"
+        rows = (
+            "(" + ", ".join(f"{prefix}{r * n_cols + c + 1}" for c in range(n_cols)) + ")"
+            for r in range(n_rows)
+        )
+        return ", ".join(rows)
+
+    marker = "?" if paramstyle == "qmark" else "%s"
+    row = "(" + ", ".join([marker] * n_cols) + ")"
+    return ", ".join([row] * n_rows)
+
+
+def _partition_filter(paramstyle: str, column: str, value) -> tuple[str, tuple]:
+    """Condición `column = <valor>` (o `IS NULL`) con el estilo de parámetros del driver."""
+    if value is None:
+        return f"{column} IS NULL", ()
+    return f"{column} = {_placeholders(paramstyle, 1, 1)[1:-1]}", (value,)
+
+
+def _prepare_frame(df: pl.DataFrame, on_conflict: OnConflict, key_columns: list[str] | None) -> pl.DataFrame:
+    if on_conflict == "upsert":
+        if not key_columns:
+            raise ValueError("on_conflict='upsert' requires key_columns")
+        # Una misma sentencia no puede actualizar dos veces la misma clave (el uploader ya
+        # las descarta y las cuenta en `duplicate_keys`; esto cubre el uso directo del loader)
+        df = df.unique(subset=key_columns, keep="last", maintain_order=True)
+    return df
+
+
+class BulkLoader(ABC):
+    """
+    Estrategia de carga masiva para un dialecto concreto.
+    Recibe el DataFrame ya transformado y lo envía por lotes sin materializarlo como dicts.
+    """
+    dialect: str = ""
+    # reload_strategy "swap": True si el dialecto reemplaza el contenido de la tabla viva
+    # en una sola transacción en lugar de cargar una tabla staging y renombrarla
+    swap_in_place: bool = False
+
+    def __init__(self, batch_size: int):
+        self.batch_size = batch_size
+
+    def load(
+        self,
+        conn: Connection,
+        table: str,
+        df: pl.DataFrame,
+        on_conflict: OnConflict = "error",
+        key_columns: list[str] | None = None,
+    ) -> int:
+        """
+        Inserta `df` en `table` usando la conexión (y transacción) recibida.
+        Con `on_conflict="upsert"` las filas cuya clave (`key_columns`) ya existe se actualizan.
+        """
+        if df.is_empty():
+            return 0
+
+        df = _prepare_frame(df, on_conflict, key_columns)
+        return self._load(conn, table, df, on_conflict, key_columns or [])
+
+    @abstractmethod
+    def _load(
+        self,
+        conn: Connection,
+        table: str,
+        df: pl.DataFrame,
+        on_conflict: OnConflict,
+        key_columns: list[str],
+    ) -> int:
+        ...
+
+    def delete_partition(self, conn: Connection, table: str, column: str, value, batch_size: int) -> int:
+        """
+        Borra las filas de `table` con `column = value` (o IS NULL).
+        `batch_size` solo se aplica en dialectos con `DELETE ... LIMIT`.
+        """
+        where, params = _partition_filter(conn.dialect.paramstyle, column, value)
+        result = conn.exec_driver_sql(f"DELETE FROM {table} WHERE {where}", params)
+        return max(result.rowcount, 0)
+
+    def create_staging_table(self, conn: Connection, table: str, staging: str) -> None:
+        """Crea `staging` vacía con la misma estructura que `table`."""
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {staging}")
+        conn.exec_driver_sql(f"CREATE TABLE {staging} AS SELECT * FROM {table} WHERE 1 = 0")
+
+    def swap_tables(self, conn: Connection, table: str, staging: str, backup: str) -> None:
+        """Publica `staging` como `table` y deja la tabla anterior como `backup`."""
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {backup}")
+        conn.exec_driver_sql(f"ALTER TABLE {table} RENAME TO {backup}")
+        conn.exec_driver_sql(f"ALTER TABLE {staging} RENAME TO {table}")
+
+    def copy_table(self, conn: Connection, table: str, backup: str) -> None:
+        """Copia los datos de `table` en `backup` (solo columnas y filas, sin defaults ni índices)."""
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {backup}")
+        conn.exec_driver_sql(f"CREATE TABLE {backup} AS SELECT * FROM {table}")
+
+    def create_temp_table(self, conn: Connection, table: str, name: str, columns: list[str]) -> None:
+        """Crea la tabla temporal `name` (de la sesión) con las columnas `columns` de `table`, vacía."""
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+        conn.exec_driver_sql(
+            f"CREATE TEMPORARY TABLE {name} AS SELECT {', '.join(columns)} FROM {table} WHERE 1 = 0"
+        )
+
+    def _null_safe_eq(self, left: str, right: str) -> str:
+        return f"{left} IS NOT DISTINCT FROM {right}"
+
+    def update_from(
+        self,
+        conn: Connection,
+        table: str,
+        source: str,
+        key_columns: list[str],
+        value_columns: list[str],
+    ) -> int:
+        """
+        Un único UPDATE de `table` con los valores de `source`, unidas por `key_columns`
+        (comparación null-safe). Solo toca, y cuenta, las filas con algún valor distinto.
+        """
+        on = " AND ".join(self._null_safe_eq(f"{table}.{c}", f"{source}.{c}") for c in key_columns)
+        differs = " OR ".join(f"NOT ({self._null_safe_eq(f'{table}.{c}', f'{source}.{c}')})" for c in value_columns)
+        assignments = ", ".join(f"{c} = {source}.{c}" for c in value_columns)
+        result = conn.exec_driver_sql(
+            f"UPDATE {table} SET {assignments} FROM {source} WHERE {on} AND ({differs})"
+        )
+        return max(result.rowcount, 0)
+
+
+class ValuesBulkLoader(BulkLoader):
+    """
+    Construye sentencias `INSERT ... VALUES (...),(...)` multi-fila convirtiendo cada
+    columna de una vez e intercalándolas en una única tupla de parámetros.
+    """
+    # Límite de parámetros por sentencia impuesto por el driver/servidor (None = sin límite)
+    max_params: int | None = None
+
+    def _insert_prefix(self, on_conflict: OnConflict) -> str:
+        return "INSERT INTO"
+
+    def _conflict_suffix(self, on_conflict: OnConflict, columns: list[str], key_columns: list[str]) -> str:
+        if on_conflict != "upsert":
+            return ""
+        # Sintaxis estándar (PostgreSQL, SQLite >= 3.24)
+        updates = [c for c in columns if c not in key_columns]
+        if not updates:
+            return f" ON CONFLICT ({', '.join(key_columns)}) DO NOTHING"
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in updates)
+        return f" ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {assignments}"
+
+    def _rows_per_statement(self, n_cols: int) -> int:
+        if self.max_params is None:
+            return self.batch_size
+        return max(1, min(self.batch_size, self.max_params // n_cols))
+
+    def _iter_batches(self, df: pl.DataFrame, rows_per_statement: int) -> Iterator[tuple[int, tuple]]:
+        """
+        Parámetros fila a fila de cada sentencia sin recorrer filas en Python: cada columna
+        se convierte de una vez (`Series.to_list`, en Rust) y se intercala en la lista plana
+        con una asignación por slice con paso (`flat[j::n_cols]`), que copia en C.
+        """
+        n_cols = df.width
+        for batch in df.iter_slices(rows_per_statement):
+            flat = [None] * (batch.height * n_cols)
+            for j, column in enumerate(batch.get_columns()):
+                flat[j::n_cols] = column.to_list()
+            yield batch.height, tuple(flat)
+
+    def iter_statements(
+        self,
+        paramstyle: str,
+        table: str,
+        df: pl.DataFrame,
+        on_conflict: OnConflict = "error",
+        key_columns: list[str] | None = None,
+    ) -> Iterator[tuple[str, tuple]]:
+        """
+        Genera las sentencias `(sql, params)` de `df` sin ejecutarlas, para poder
+        prepararlas fuera de la conexión (p. ej. mientras se envía el lote anterior).
+        """
+        if df.is_empty():
+            return
+
+        df = _prepare_frame(df, on_conflict, key_columns)
+        columns = df.columns
+        head = f"{self._insert_prefix(on_conflict)} {table} ({', '.join(columns)}) VALUES "
+        suffix = self._conflict_suffix(on_conflict, columns, key_columns or [])
+
+        statements: dict[int, str] = {}
+
+        for n_rows, params in self._iter_batches(df, self._rows_per_statement(len(columns))):
+            sql = statements.get(n_rows)
+            if sql is None:
+                sql = head + _placeholders(paramstyle, len(columns), n_rows) + suffix
+                statements[n_rows] = sql
+            yield sql, params
+
+    @staticmethod
+    def execute(conn: Connection, statements: Iterable[tuple[str, tuple]]) -> int:
+        """Ejecuta sentencias generadas por `iter_statements` y devuelve las filas afectadas."""
+        total = 0
+        for sql, params in statements:
+            result = conn.exec_driver_sql(sql, params)
+            total += max(result.rowcount, 0)
+        return total
+
+    def _load(
+        self,
+        conn: Connection,
+        table: str,
+        df: pl.DataFrame,
+        on_conflict: OnConflict,
+        key_columns: list[str],
+    ) -> int:
+        statements = self.iter_statements(conn.dialect.paramstyle, table, df, on_conflict, key_columns)
+        return self.execute(conn, statements)
+
+
+class MySQLBulkLoader(ValuesBulkLoader):
+    dialect = "mysql"
+
+    def _insert_prefix(self, on_conflict: OnConflict) -> str:
+        return "INSERT IGNORE INTO" if on_conflict == "ignore" else "INSERT INTO"
+
+    def _conflict_suffix(self, on_conflict: OnConflict, columns: list[str], key_columns: list[str]) -> str:
+        if on_conflict != "upsert":
+            return ""
+        # MySQL resuelve el conflicto con cualquier índice único; `key_columns` solo
+        # excluye la clave de la lista de columnas a actualizar. Alias de fila (MySQL >= 8.0.19)
+        # en lugar de VALUES(col), obsoleto.
+        updates = [c for c in columns if c not in key_columns] or key_columns[:1]
+        assignments = ", ".join(f"{c} = {_ROW_ALIAS}.{c}" for c in updates)
+        return f" AS {_ROW_ALIAS} ON DUPLICATE KEY UPDATE {assignments}"
+
+    def delete_partition(self, conn: Connection, table: str, column: str, value, batch_size: int) -> int:
+        # Los lotes con LIMIT corren todos dentro de la transacción de la carga (`engine.begin()`):
+        # no reducen undo ni binlog, que se confirman juntos; solo acotan cada sentencia a costa
+        # de más round trips
+        where, params = _partition_filter(conn.dialect.paramstyle, column, value)
+        sql = f"DELETE FROM {table} WHERE {where} LIMIT {batch_size}"
+        total = 0
+
+        while True:
+            deleted = max(conn.exec_driver_sql(sql, params).rowcount, 0)
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+    def create_staging_table(self, conn: Connection, table: str, staging: str) -> None:
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {staging}")
+        conn.exec_driver_sql(f"CREATE TABLE {staging} LIKE {table}")
+
+    def swap_tables(self, conn: Connection, table: str, staging: str, backup: str) -> None:
+        # RENAME TABLE con varios pares es atómico en MySQL
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {backup}")
+        conn.exec_driver_sql(f"RENAME TABLE {table} TO {backup}, {staging} TO {table}")
+
+    def create_temp_table(self, conn: Connection, table: str, name: str, columns: list[str]) -> None:
+        # Las tablas temporales de MySQL sobreviven al rollback: se limpia la de un intento fallido
+        conn.exec_driver_sql(f"DROP TEMPORARY TABLE IF EXISTS {name}")
+        conn.exec_driver_sql(
+            f"CREATE TEMPORARY TABLE {name} AS SELECT {', '.join(columns)} FROM {table} WHERE 1 = 0"
+        )
+
+    def _null_safe_eq(self, left: str, right: str) -> str:
+        return f"{left} <=> {right}"
+
+    def update_from(
+        self,
+        conn: Connection,
+        table: str,
+        source: str,
+        key_columns: list[str],
+        value_columns: list[str],
+    ) -> int:
+        on = " AND ".join(self._null_safe_eq(f"{table}.{c}", f"{source}.{c}") for c in key_columns)
+        differs = " OR ".join(f"NOT ({self._null_safe_eq(f'{table}.{c}', f'{source}.{c}')})" for c in value_columns)
+        assignments = ", ".join(f"{table}.{c} = {source}.{c}" for c in value_columns)
+        result = conn.exec_driver_sql(
+            f"UPDATE {table} JOIN {source} ON {on} SET {assignments} WHERE {differs}"
+        )
+        return max(result.rowcount, 0)
+
+
+class PostgresBulkLoader(ValuesBulkLoader):
+    """
+    Usa `COPY ... FROM STDIN` (CSV) cuando el driver lo soporta (psycopg2).
+    Para `ignore`/`upsert` copia a una tabla temporal y la vuelca con `ON CONFLICT`.
+    El "swap" reemplaza el contenido en una transacción: una tabla renombrada conservaría
+    los defaults `nextval()` de la secuencia de la original y las vistas seguirían a la
+    anterior (por OID). Con MVCC los lectores ven la versión previa hasta el commit.
+    """
+    dialect = "postgresql"
+    max_params = 65535
+    swap_in_place = True
+
+    def _conflict_suffix(self, on_conflict: OnConflict, columns: list[str], key_columns: list[str]) -> str:
+        if on_conflict == "ignore":
+            return " ON CONFLICT DO NOTHING"
+        return super()._conflict_suffix(on_conflict, columns, key_columns)
+
+    def _load(
+        self,
+        conn: Connection,
+        table: str,
+        df: pl.DataFrame,
+        on_conflict: OnConflict,
+        key_columns: list[str],
+    ) -> int:
+        cursor = conn.connection.dbapi_connection.cursor()
+
+        if not hasattr(cursor, "copy_expert"):
+            cursor.close()
+            return super()._load(conn, table, df, on_conflict, key_columns)
+
+        column_list = ", ".join(df.columns)
+        target = table
+
+        if on_conflict != "error":
+            target = f"{table}__copy"
+            conn.exec_driver_sql(f"CREATE TEMP TABLE {target} (LIKE {table} INCLUDING DEFAULTS)")
+
+        try:
+            for chunk in df.iter_slices(self.batch_size):
+                buffer = io.BytesIO()
+                chunk.write_csv(buffer, include_header=False)
+                buffer.seek(0)
+                cursor.copy_expert(f"COPY {target} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+        if on_conflict == "error":
+            return df.height
+
+        result = conn.exec_driver_sql(
+            f"INSERT INTO {table} ({column_list}) "
+            f"SELECT {column_list} FROM {target}"
+            + self._conflict_suffix(on_conflict, df.columns, key_columns)
+        )
+        conn.exec_driver_sql(f"DROP TABLE {target}")
+        return max(result.rowcount, 0)
+
+
+class SQLiteBulkLoader(ValuesBulkLoader):
+    """
+    `ON CONFLICT` (SQLite >= 3.24) para `ignore`/`upsert`; solo se omiten los conflictos
+    de unicidad, no los de NOT NULL o CHECK.
+    """
+    dialect = "sqlite"
+    # SQLITE_MAX_VARIABLE_NUMBER de las versiones anteriores a 3.32
+    max_params = 999
+
+    def _conflict_suffix(self, on_conflict: OnConflict, columns: list[str], key_columns: list[str]) -> str:
+        if on_conflict == "ignore":
+            return " ON CONFLICT DO NOTHING"
+        return super()._conflict_suffix(on_conflict, columns, key_columns)
+
+    def _null_safe_eq(self, left: str, right: str) -> str:
+        # `IS NOT DISTINCT FROM` solo existe desde SQLite 3.39
+        return f"{left} IS {right}"
+
+
+class GenericBulkLoader(ValuesBulkLoader):
+    """Fallback para dialectos sin estrategia propia."""
+    max_params = 999
+
+
+BULK_LOADERS: dict[str, type[BulkLoader]] = {
+    MySQLBulkLoader.dialect: MySQLBulkLoader,
+    PostgresBulkLoader.dialect: PostgresBulkLoader,
+    SQLiteBulkLoader.dialect: SQLiteBulkLoader,
+}
+
+
+def get_bulk_loader(dialect: str, batch_size: int) -> BulkLoader:
+    """Devuelve el loader registrado para el dialecto (`engine.dialect.name`)."""
+    loader_cls = BULK_LOADERS.get(dialect, GenericBulkLoader)
+    return loader_cls(batch_size=batch_size)
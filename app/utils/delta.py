@@ -0,0 +1,303 @@
+from dataclasses import dataclass
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from .bulk_loader import BulkLoader
+import hashlib
+import polars as pl
+import zlib
+
+# Por encima de este número de particiones se leen todas las filas sin filtrar
+MAX_PARTITION_FILTER = 1000
+
+# Módulo primo (2^31 - 1) del hash por fila: el producto de dos residuos cabe en un BIGINT
+_MODULUS = 2_147_483_647
+# Las huellas de los valores caen en [0, _SPAN) y la de NULL es _SPAN: todas distintas módulo _MODULUS
+_SPAN = _MODULUS - 1
+_NULL = _SPAN
+_WEIGHT_BASE = 1_000_003
+_MIX = 40_503
+# Resolución de la parte fraccionaria de los flotantes
+_FRACTION_SCALE = 1_000_000_000
+
+# SQLite no trae funciones de hash: se registra CRC32 en la conexión antes de consultar
+_SQLITE_CRC32 = "etl_crc32"
+
+# Hash de texto por dialecto: expresión SQL y su equivalente en Python sobre el archivo
+_STRING_HASHES = {
+    "mysql": ("CRC32({c})", lambda v: zlib.crc32(v.encode())),
+    "sqlite": (_SQLITE_CRC32 + "({c})", lambda v: zlib.crc32(v.encode())),
+    "postgresql": (
+        "('x' || substr(md5({c}), 1, 8))::bit(32)::int",
+        lambda v: int.from_bytes(hashlib.md5(v.encode()).digest()[:4], "big", signed=True),
+    ),
+}
+
+_DB_SUFFIX = "__db"
+_STAGING_SUFFIX = "__delta"
+
+
+@dataclass
+class Delta:
+    """Filas nuevas, filas existentes con valores distintos y número de filas sin cambios."""
+    new: pl.DataFrame
+    changed: pl.DataFrame
+    skipped: int
+
+
+@dataclass
+class Existing:
+    """
+    Estado de la tabla destino frente al archivo: `unchanged` son las particiones cuyo
+    checksum coincide con el del archivo (`all_unchanged` si la tabla entera coincide) y
+    `rows` las filas (clave y valores) del resto de particiones que ya existen en la tabla.
+    """
+    rows: pl.DataFrame
+    unchanged: pl.DataFrame | None = None
+    all_unchanged: bool = False
+
+
+def _floor(expr: str, dialect: str) -> str:
+    if dialect == "mysql":
+        return f"CAST(FLOOR({expr}) AS SIGNED)"
+    if dialect == "sqlite":
+        # CAST trunca hacia cero; se corrige para los negativos (floor() no siempre está compilado)
+        return f"(CAST({expr} AS INTEGER) - ({expr} < CAST({expr} AS INTEGER)))"
+    return f"CAST(FLOOR({expr}) AS BIGINT)"
+
+
+def _residue_sql(expr: str) -> str:
+    return f"((({expr}) % {_SPAN} + {_SPAN}) % {_SPAN})"
+
+
+def _residue(expr: pl.Expr) -> pl.Expr:
+    return (expr.cast(pl.Int64) % _SPAN + _SPAN) % _SPAN
+
+
+def _fingerprints(df: pl.DataFrame, columns: list[str], dialect: str) -> list[tuple[str, pl.Expr]] | None:
+    """
+    Huella entera en [0, _SPAN] de cada columna, como (expresión SQL, expresión Polars)
+    que dan exactamente el mismo valor en la base de datos y sobre el archivo: enteros y
+    booleanos por su valor, flotantes por su parte entera y su parte fraccionaria escalada,
+    y texto por un hash de sus bytes. None si algún tipo o el dialecto no lo permiten.
+    """
+    specs = []
+    for name in columns:
+        dtype = df.schema[name]
+        column = pl.col(name)
+
+        if dtype == pl.Boolean:
+            sql, expr = f"CASE WHEN {name} THEN 1 WHEN NOT {name} THEN 0 END", column.cast(pl.Int64)
+        elif dtype.is_integer():
+            sql, expr = _residue_sql(name), _residue(column)
+        elif dtype.is_float():
+            whole = _floor(name, dialect)
+            fraction = _floor(f"({name} - {whole}) * {_FRACTION_SCALE}", dialect)
+            sql = f"(({_residue_sql(whole)} * {_WEIGHT_BASE} + {fraction}) % {_SPAN})"
+            floor = column.floor()
+            expr = (
+                _residue(floor) * _WEIGHT_BASE + ((column - floor) * _FRACTION_SCALE).floor().cast(pl.Int64)
+            ) % _SPAN
+        elif dtype == pl.String and dialect in _STRING_HASHES:
+            template, hash_value = _STRING_HASHES[dialect]
+            sql = _residue_sql(template.format(c=name))
+            # El hash en Python solo se calcula una vez por valor distinto
+            values = df.get_column(name).unique().drop_nulls()
+            hashes = pl.Series([hash_value(v) for v in values.to_list()], dtype=pl.Int64)
+            expr = _residue(column.replace_strict(values, hashes, default=None, return_dtype=pl.Int64))
+        else:
+            return None
+
+        specs.append((f"COALESCE({sql}, {_NULL})", expr.fill_null(_NULL)))
+    return specs
+
+
+def _row_hash(
+    df: pl.DataFrame,
+    columns: list[str],
+    dialect: str,
+) -> tuple[str, pl.Expr] | None:
+    """
+    Hash por fila de la clave y los valores como (expresión SQL sobre la columna `x` de
+    `_row_hash_query`, expresión Polars). Cada columna pesa distinto y la fila se mezcla
+    de forma no lineal, así que la suma por partición detecta valores movidos entre claves
+    o entre columnas, no solo cambios en los totales.
+    """
+    fingerprints = _fingerprints(df, columns, dialect)
+    if fingerprints is None:
+        return None
+
+    weights = [pow(_WEIGHT_BASE, i + 1, _MODULUS) for i in range(len(fingerprints))]
+    sql = " + ".join(f"({w} * {f_sql}) % {_MODULUS}" for w, (f_sql, _) in zip(weights, fingerprints))
+    x = pl.sum_horizontal([(w * f_expr) % _MODULUS for w, (_, f_expr) in zip(weights, fingerprints)]) % _MODULUS
+    y = (x * x + _MIX) % _MODULUS
+    return f"({sql}) % {_MODULUS}", (y * y + x) % _MODULUS
+
+
+def _row_hash_query(x_sql: str, table: str, partition_column: str | None, where: str) -> str:
+    select = f"{partition_column}, " if partition_column else ""
+    group = f" GROUP BY {partition_column}" if partition_column else ""
+    inner = f"SELECT {select}{x_sql} AS x FROM {table}{where}"
+    mixed = f"SELECT {select}x, (x * x + {_MIX}) % {_MODULUS} AS y FROM ({inner}) AS a"
+    return (
+        f"SELECT {select}COUNT(*) AS n_rows, SUM((y * y + x) % {_MODULUS}) AS row_hash "
+        f"FROM ({mixed}) AS b{group}"
+    )
+
+
+def _register_functions(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        conn.connection.dbapi_connection.create_function(
+            _SQLITE_CRC32, 1, lambda v: None if v is None else zlib.crc32(str(v).encode()), deterministic=True
+        )
+
+
+def _read(conn: Connection, sql: str, partitions: list | None) -> pl.DataFrame:
+    statement = text(sql)
+    params = {}
+    if partitions is not None:
+        statement = statement.bindparams(bindparam("partitions", expanding=True))
+        params["partitions"] = partitions
+    return pl.read_database(statement, conn, execute_options={"parameters": params}, infer_schema_length=None)
+
+
+def fetch_existing(
+    conn: Connection,
+    table: str,
+    df: pl.DataFrame,
+    key_columns: list[str],
+    partition_column: str | None = None,
+) -> Existing:
+    """
+    Compara primero, por partición (p. ej. por `periodo_mes` o `anio`), el número de filas
+    y la suma de un hash por fila de la clave y los valores, calculados en la base de datos
+    y sobre el archivo; la comparación es exacta. Solo de las particiones que difieren se
+    leen las filas existentes, con el esquema de `df`. Sin `partition_column` toda la tabla
+    es una única partición. Si algún tipo de columna o el dialecto no admiten el hash, se
+    leen las filas de todas las particiones del archivo.
+    """
+    columns = df.columns
+    partitioned = partition_column is not None and partition_column in columns
+    group = partition_column if partitioned else None
+    row_hash = _row_hash(df, [c for c in columns if c != group], conn.dialect.name)
+    select = f"SELECT {', '.join(columns)} FROM {table}"
+
+    if not partitioned:
+        if row_hash is None:
+            return Existing(rows=_conform(_read(conn, select, None), df, key_columns))
+
+        _register_functions(conn)
+        stored = _read(conn, _row_hash_query(row_hash[0], table, None, ""), None)
+        stored = stored.cast({"n_rows": pl.Int64, "row_hash": pl.Int64}, strict=False)
+        n_rows, stored_hash = stored.row(0)
+        if not n_rows:
+            # Tabla vacía: todas las filas son nuevas
+            return Existing(rows=df.clear())
+        if n_rows == df.height and stored_hash == df.select(row_hash[1].sum()).item():
+            return Existing(rows=df.clear(), all_unchanged=True)
+        return Existing(rows=_conform(_read(conn, select, None), df, key_columns))
+
+    partitions = df.get_column(partition_column).unique().drop_nulls().to_list()
+    filtered = len(partitions) <= MAX_PARTITION_FILTER and df.get_column(partition_column).null_count() == 0
+    where = f" WHERE {partition_column} IN :partitions" if filtered else ""
+    candidates = df.select(partition_column).unique()
+
+    if row_hash is None:
+        unchanged = candidates.clear()
+        differing = candidates
+    else:
+        _register_functions(conn)
+        stored = _read(
+            conn, _row_hash_query(row_hash[0], table, partition_column, where), partitions if filtered else None
+        ).cast({partition_column: df.schema[partition_column], "n_rows": pl.Int64, "row_hash": pl.Int64}, strict=False)
+        computed = df.group_by(partition_column).agg(n_rows=pl.len().cast(pl.Int64), row_hash=row_hash[1].sum())
+        compared = computed.join(stored, on=partition_column, how="inner", nulls_equal=True, suffix=_DB_SUFFIX)
+
+        matches = pl.all_horizontal([
+            pl.col(alias).eq_missing(pl.col(f"{alias}{_DB_SUFFIX}")) for alias in ("n_rows", "row_hash")
+        ])
+        unchanged = compared.filter(matches).select(partition_column)
+        differing = compared.filter(~matches).select(partition_column)
+
+    if differing.is_empty():
+        return Existing(rows=df.clear(), unchanged=unchanged)
+
+    values = differing.get_column(partition_column).to_list()
+    if len(values) <= MAX_PARTITION_FILTER and None not in values:
+        rows = _read(conn, f"{select} WHERE {partition_column} IN :partitions", values)
+    else:
+        rows = _read(conn, select, None)
+
+    rows = _conform(rows, df, key_columns).join(differing, on=partition_column, how="semi", nulls_equal=True)
+    return Existing(rows=rows, unchanged=unchanged)
+
+
+def _conform(rows: pl.DataFrame, df: pl.DataFrame, key_columns: list[str]) -> pl.DataFrame:
+    return rows.cast(dict(df.schema), strict=False).unique(subset=key_columns, keep="last")
+
+
+def compute_delta(
+    df: pl.DataFrame,
+    existing: Existing,
+    key_columns: list[str],
+    partition_column: str | None = None,
+) -> Delta:
+    """
+    Las filas de particiones sin cambios se omiten sin compararlas; el resto se separa en
+    nuevas, modificadas y sin cambios con un anti-join por clave natural.
+    """
+    skipped = 0
+    if existing.all_unchanged:
+        return Delta(new=df.clear(), changed=df.clear(), skipped=df.height)
+
+    if existing.unchanged is not None and not existing.unchanged.is_empty():
+        rest = df.join(existing.unchanged, on=partition_column, how="anti", nulls_equal=True)
+        skipped = df.height - rest.height
+        df = rest
+
+    value_columns = [c for c in df.columns if c not in key_columns]
+    rows = existing.rows
+
+    new = df.join(rows, on=key_columns, how="anti", nulls_equal=True)
+
+    if not value_columns or rows.is_empty():
+        return Delta(new=new, changed=df.clear(), skipped=skipped + df.height - new.height)
+
+    matched = df.join(
+        rows.rename({c: f"{c}{_DB_SUFFIX}" for c in value_columns}),
+        on=key_columns,
+        how="inner",
+        nulls_equal=True,
+    )
+    is_changed = pl.any_horizontal(
+        [pl.col(c).ne_missing(pl.col(f"{c}{_DB_SUFFIX}")) for c in value_columns]
+    )
+    changed = matched.filter(is_changed).select(df.columns)
+
+    return Delta(new=new, changed=changed, skipped=skipped + matched.height - changed.height)
+
+
+def update_rows(
+    conn: Connection,
+    loader: BulkLoader,
+    table: str,
+    df: pl.DataFrame,
+    key_columns: list[str],
+) -> int:
+    """
+    Actualiza por clave natural (comparación null-safe) las filas de `df`: se cargan en
+    una tabla temporal y se aplican con un único UPDATE con join. Devuelve las filas
+    realmente modificadas.
+    """
+    value_columns = [c for c in df.columns if c not in key_columns]
+
+    if df.is_empty() or not value_columns:
+        return 0
+
+    staging = f"{table}{_STAGING_SUFFIX}"
+    df = df.unique(subset=key_columns, keep="last", maintain_order=True)
+
+    loader.create_temp_table(conn, table, staging, df.columns)
+    loader.load(conn, staging, df)
+    updated = loader.update_from(conn, table, staging, key_columns, value_columns)
+    conn.exec_driver_sql(f"DROP TABLE {staging}")
+    return updated
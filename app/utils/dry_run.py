@@ -0,0 +1,63 @@
+from app.core.exceptions import AppException, FileReadError
+from app.core.executor import executor
+from app.core.settings import settings
+from app.utils.base_transformer import BaseTransformer
+from app.utils.intake import check_magic_bytes
+from app.utils.loader_file import (
+    FileSample,
+    SchemaResolver,
+    get_extension,
+    read_csv_head,
+    sample_csv,
+    sample_excel,
+    spooled_upload,
+)
+from fastapi import UploadFile
+from typing import Any
+
+
+def project(transformer: BaseTransformer, sample: FileSample) -> dict[str, Any]:
+    """
+    Transforma la muestra (validación de encabezados, columnas requeridas y tipos incluidas)
+    y proyecta al archivo completo las filas de salida. Con agregaciones (`group_by`) la
+    proyección es una cota superior.
+    """
+    transformed = transformer.transform(sample.df)
+
+    if sample.exact or sample.df.is_empty():
+        rows_out = transformed.height
+    else:
+        rows_out = round(transformed.height * sample.total_rows / sample.df.height)
+
+    return {
+        "destination_table": transformer.destination_table,
+        "rows_in": sample.total_rows,
+        "rows_out": rows_out,
+        "exact": sample.exact,
+        "sample_rows": sample.df.height,
+        "columns": {name: str(dtype) for name, dtype in transformer._schema(transformed).items()},
+        "warnings": sample.warnings,
+    }
+
+
+async def sample_upload(file: UploadFile, schema_for: SchemaResolver | None = None) -> FileSample:
+    """
+    Muestra de `DRY_RUN_SAMPLE_ROWS` filas de un archivo subido. Un CSV se lee solo hasta
+    completar la muestra; un libro Excel se vuelca a disco (su índice está al final) y
+    se lee únicamente la muestra de la primera hoja.
+    """
+    extension = get_extension(file.filename)
+
+    try:
+        if extension == "csv":
+            head = await read_csv_head(file, settings.DRY_RUN_SAMPLE_ROWS, settings.DRY_RUN_MAX_HEAD_BYTES)
+            check_magic_bytes(file.filename, extension, head)
+            return sample_csv(head, file.size or len(head), schema_for)
+
+        async with spooled_upload(file) as upload:
+            return await executor.run_cpu(sample_excel, upload.path, settings.DRY_RUN_SAMPLE_ROWS, schema_for)
+
+    except AppException:
+        raise
+    except Exception as e:
+        raise FileReadError(file.filename, {"original_error": str(e)}) from e
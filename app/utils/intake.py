@@ -0,0 +1,216 @@
+from app.core.exceptions import InvalidFileContentError, UploadCapacityError, UploadTooLargeError
+from app.core.handlers import app_exception_response
+from app.core.metrics import UPLOAD_IN_FLIGHT, UPLOAD_REJECTED
+from app.core.settings import settings
+from starlette.datastructures import Headers
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable
+import polars as pl
+import asyncio
+import logging
+import io
+
+logger = logging.getLogger(__name__)
+
+# Valida los encabezados crudos de un archivo (p. ej. `BaseTransformer.check_header`)
+HeaderCheck = Callable[[list[str]], None]
+
+# Etiqueta `route` de las peticiones que no corresponden a ninguna ruta
+UNMATCHED_ROUTE = "unmatched"
+
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+# Firmas válidas por extensión; los .xls modernos a veces son libros OOXML renombrados
+MAGIC_BYTES: dict[str, tuple[bytes, ...]] = {
+    "xlsx": (ZIP_MAGIC,),
+    "xlsb": (ZIP_MAGIC,),
+    "xls": (OLE_MAGIC, ZIP_MAGIC),
+}
+
+
+def max_upload_bytes(route: str | None) -> int:
+    """Límite de tamaño de la ruta (`UPLOAD_MAX_BYTES_BY_ROUTE`) o el global."""
+    return settings.UPLOAD_MAX_BYTES_BY_ROUTE.get(route or "", settings.UPLOAD_MAX_BYTES)
+
+
+def check_magic_bytes(filename: str, extension: str, head: bytes) -> None:
+    """Rechaza archivos vacíos o cuyo contenido no corresponde a la extensión declarada."""
+    if not head:
+        raise InvalidFileContentError(filename, extension)
+
+    signatures = MAGIC_BYTES.get(extension)
+    if signatures is not None:
+        if not head.startswith(signatures):
+            raise InvalidFileContentError(filename, extension)
+        return
+
+    # CSV: texto, nunca un contenedor binario
+    if head.startswith((ZIP_MAGIC, OLE_MAGIC)) or b"\x00" in head:
+        raise InvalidFileContentError(filename, extension)
+
+
+def sniff_csv_header(head: bytes) -> list[str] | None:
+    """Encabezados de la primera línea de un CSV, o None si no caben en `head` o no se pueden leer."""
+    end = head.find(b"\n")
+    if end < 0:
+        return None
+    try:
+        return pl.read_csv(io.BytesIO(head[:end + 1]), n_rows=0, encoding="utf8-lossy").columns
+    except pl.exceptions.PolarsError:
+        return None
+
+
+def inspect_head(filename: str, extension: str, head: bytes, check_header: HeaderCheck | None = None) -> None:
+    """
+    Validaciones baratas sobre el primer bloque recibido, antes de volcar el resto:
+    firma del archivo y, en CSV, la primera fila contra el transformer de la ruta.
+    """
+    check_magic_bytes(filename, extension, head)
+
+    if check_header is not None and extension == "csv":
+        header = sniff_csv_header(head)
+        if header is not None:
+            check_header(header)
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Plantilla de la ruta que atiende la petición (p. ej. `/api/v1/jobs/{job_id}`), para
+    etiquetar métricas y elegir límites sin crear una serie por cada URL distinta.
+    """
+    app = scope.get("app")
+    partial = None
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", UNMATCHED_ROUTE)
+    return partial or UNMATCHED_ROUTE
+
+
+class UploadIntake:
+    """
+    Backpressure de las peticiones de carga (POST multipart): como mucho
+    `UPLOAD_MAX_CONCURRENT` a la vez y límite de tamaño del cuerpo. El Content-Length se
+    comprueba antes de leer nada y, además, se cuentan los bytes a medida que llegan, de
+    modo que un cuerpo mayor (o sin Content-Length) se corta con 413 en cuanto supera el
+    límite, antes de que Starlette termine de volcarlo a disco.
+    Las que no obtienen cupo en `UPLOAD_QUEUE_WAIT_SECONDS` reciben 503 con Retry-After.
+    """
+
+    def __init__(self, max_concurrent: int, wait_seconds: float, retry_after: int):
+        self._max_concurrent = max_concurrent
+        self._wait_seconds = wait_seconds
+        self._retry_after = retry_after
+        # El semáforo se crea en el loop que atiende las peticiones, no al importar
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._in_flight = 0
+
+    @staticmethod
+    def is_upload(scope: Scope) -> bool:
+        return (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and Headers(scope=scope).get("content-type", "").startswith("multipart/form-data")
+        )
+
+    def _bind(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    async def _acquire(self, semaphore: asyncio.Semaphore) -> bool:
+        if self._wait_seconds <= 0:
+            if semaphore.locked():
+                return False
+            await semaphore.acquire()
+            return True
+
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self._wait_seconds)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def dispatch(self, scope: Scope, receive: Receive, send: Send, app: ASGIApp) -> None:
+        if not self.is_upload(scope):
+            await app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        limit = max_upload_bytes(route)
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > limit:
+            UPLOAD_REJECTED.inc(route=route, reason="too_large")
+            await app_exception_response(UploadTooLargeError(limit, int(length)))(scope, receive, send)
+            return
+
+        semaphore = self._bind()
+        if not await self._acquire(semaphore):
+            UPLOAD_REJECTED.inc(route=route, reason="capacity")
+            logger.warning(f"[Intake] {route}: rejected, {self._max_concurrent} uploads in flight")
+            await app_exception_response(UploadCapacityError(self._max_concurrent, self._retry_after))(scope, receive, send)
+            return
+
+        received = 0
+        too_large: UploadTooLargeError | None = None
+        started = False
+
+        async def receive_limited() -> Message:
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = UploadTooLargeError(limit, received)
+                    raise too_large
+            return message
+
+        async def send_unless_rejected(message: Message) -> None:
+            nonlocal started
+            # Tras cortar el cuerpo se descarta la respuesta (p. ej. el 400 de parseo) de la app
+            if too_large is not None:
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        self._in_flight += 1
+        UPLOAD_IN_FLIGHT.set(self._in_flight)
+        try:
+            await app(scope, receive_limited, send_unless_rejected)
+        except Exception:
+            if too_large is None:
+                raise
+        finally:
+            self._in_flight -= 1
+            UPLOAD_IN_FLIGHT.set(self._in_flight)
+            semaphore.release()
+
+        if too_large is not None and not started:
+            UPLOAD_REJECTED.inc(route=route, reason="too_large")
+            logger.warning(f"[Intake] {route}: body cut at {received} bytes (limit {limit})")
+            await app_exception_response(too_large)(scope, receive, send)
+
+
+class UploadIntakeMiddleware:
+    """Middleware ASGI que aplica `UploadIntake` sobre el `receive` original de la petición."""
+
+    def __init__(self, app: ASGIApp, intake: UploadIntake):
+        self.app = app
+        self.intake = intake
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.intake.dispatch(scope, receive, send, self.app)
+
+
+upload_intake = UploadIntake(
+    max_concurrent=settings.UPLOAD_MAX_CONCURRENT,
+    wait_seconds=settings.UPLOAD_QUEUE_WAIT_SECONDS,
+    retry_after=settings.UPLOAD_RETRY_AFTER_SECONDS,
+)
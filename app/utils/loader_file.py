@@ -1,111 +1,495 @@
 from app.core.exceptions import (
-    UnsupportedFileFormatError, 
-    FileReadError, 
-    FileReadSheetsError, 
+    UploadTooLargeError,
+    UnsupportedFileFormatError,
+    FileReadError,
+    FileReadSheetsError,
     FileExistsError
 )
+from app.core.metrics import (
+    UPLOAD_PARSE_SECONDS,
+    UPLOAD_RECEIVED_BYTES,
+    UPLOAD_RECEIVE_BYTES_PER_SECOND,
+    UPLOAD_RECEIVE_SECONDS,
+    route_label,
+)
+from app.core.settings import settings
+from app.utils.intake import HeaderCheck, inspect_head, max_upload_bytes
+from app.utils.normalization import normalize_headers, normalize_sheet_name
+from app.utils.profiling import current_profile, run_cpu_profiled
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 from fastapi import UploadFile
+from pathlib import Path
+from typing import AsyncIterator, Callable
 import polars as pl
-import unicodedata
-import openpyxl
+import fastexcel
+import tempfile
+import hashlib
+import logging
+import time
+import os
 import io
 
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Encabezados normalizados -> tipos que el lector debe aplicar (BaseTransformer.read_schema)
+SchemaResolver = Callable[[tuple[str, ...]], dict[str, pl.DataType]]
+
+
+
+def _overrides(header: list[str], schema_for: SchemaResolver | None) -> dict[str, pl.DataType]:
+    """Contrato del transformer expresado con los nombres crudos del archivo."""
+    if schema_for is None:
+        return {}
+    normalized = normalize_headers(header)
+    schema = schema_for(tuple(normalized))
+    return {raw: schema[name] for raw, name in zip(header, normalized) if name in schema}
+
+
+def _read_csv(source: io.BytesIO | str, schema_for: SchemaResolver | None = None) -> pl.DataFrame:
+    if isinstance(source, str):
+        # Desde disco se escanea de forma perezosa (mmap) en lugar de cargar los bytes
+        read = lambda overrides: pl.scan_csv(source, schema_overrides=overrides).collect()
+        header = pl.scan_csv(source).collect_schema().names() if schema_for else []
+    else:
+        def read(overrides):
+            source.seek(0)
+            return pl.read_csv(source, schema_overrides=overrides)
+        header = pl.read_csv(source, n_rows=0).columns if schema_for else []
+
+    overrides = _overrides(header, schema_for)
+    if not overrides:
+        return read(None)
+
+    try:
+        return read(overrides)
+    except pl.exceptions.ComputeError as e:
+        # El archivo no cumple el contrato (p. ej. coma decimal): se infieren los tipos
+        logger.warning(f"[Loader] CSV does not match the declared schema, falling back to inference: {e}")
+        return read(None)
+
+
+def _drop_empty(df: pl.DataFrame) -> pl.DataFrame:
+    """Igual que `pl.read_excel`: descarta filas vacías y columnas vacías sin encabezado."""
+    empty = [c for c in df.columns if c.startswith("__UNNAMED__") and df.get_column(c).null_count() == df.height]
+    df = df.drop(empty)
+    if df.width:
+        df = df.filter(~pl.all_horizontal(pl.all().is_null()))
+    return df
+
+
+def _apply_contract(
+        df: pl.DataFrame,
+        overrides: dict[str, pl.DataType],
+        warnings: list[str] | None = None,
+    ) -> pl.DataFrame:
+    """
+    Castea (no estricto) a los tipos del contrato las columnas leídas como texto. Si el
+    cast dejaría en nulo celdas con contenido (p. ej. "1234,5", "-" o "n.d." en una columna
+    Float64) la columna se conserva como texto, igual que al inferir, y se informa en el
+    log y en `warnings`: nunca se pierden valores en silencio.
+    """
+    columns = []
+    for raw, dtype in overrides.items():
+        column = df.get_column(raw)
+        if column.dtype == dtype:
+            continue
+
+        cast = column.cast(dtype, strict=False)
+        lost = cast.null_count() - column.null_count()
+        if lost:
+            examples = column.filter(cast.is_null() & column.is_not_null()).unique(maintain_order=True).head(3)
+            logger.warning(
+                f"[Loader] Column '{raw}' does not match the declared {dtype}: "
+                f"{lost} value(s) kept as text, e.g. {examples.to_list()}"
+            )
+            if warnings is not None:
+                warnings.append(
+                    f"La columna '{raw}' no cumple el tipo {dtype}: {lost} valor(es) no numéricos "
+                    f"(p. ej. {examples.to_list()}); se conserva como texto"
+                )
+            continue
+
+        columns.append(cast)
+
+    return df.with_columns(columns) if columns else df
+
+
+def _load_sheet(
+        workbook: fastexcel.ExcelReader,
+        sheet: str | int,
+        schema_for: SchemaResolver | None = None,
+        header_row: int = 0,
+        n_rows: int | None = None,
+        warnings: list[str] | None = None,
+    ) -> pl.DataFrame:
+    """
+    Hoja con los encabezados en `header_row` (relativa al rango usado) en una sola lectura,
+    sin que la fila de encabezados pase por el cuerpo de la tabla. `n_rows` limita las
+    filas leídas. Las columnas del contrato se leen como texto y se castean después
+    (`_apply_contract`): calamine convierte en nulo, sin error, una celda de texto en una
+    columna numérica, incluso con `dtype_coercion="strict"`.
+    """
+    overrides = {}
+    if schema_for is not None:
+        header = workbook.load_sheet(sheet, header_row=header_row, n_rows=0).to_polars().columns
+        overrides = _overrides(header, schema_for)
+
+    dtypes = dict.fromkeys(overrides, "string")
+    df = workbook.load_sheet(sheet, header_row=header_row, n_rows=n_rows, dtypes=dtypes or None).to_polars()
+    return _apply_contract(df, overrides, warnings)
+
+
+def _sheet_height(workbook: fastexcel.ExcelReader, sheet: str | int, header_row: int = 0) -> int:
+    """Filas de datos de la hoja (sin el encabezado), sin convertirlas."""
+    return workbook.load_sheet(sheet, header_row=header_row, n_rows=0).total_height
+
+
+def _read_excel(source: io.BytesIO | str, schema_for: SchemaResolver | None = None) -> pl.DataFrame:
+    """Primera hoja del libro, con los tipos del contrato aplicados por calamine al leer."""
+    workbook = fastexcel.read_excel(source.getvalue() if isinstance(source, io.BytesIO) else source)
+    return _drop_empty(_load_sheet(workbook, 0, schema_for))
+
 SUPPORTED_EXTENSIONS = {
-    "csv": pl.read_csv,
-    "xlsx": pl.read_excel,
-    "xls": pl.read_excel,
-    "xlsb": pl.read_excel,
+    "csv": _read_csv,
+    "xlsx": _read_excel,
+    "xls": _read_excel,
+    "xlsb": _read_excel,
 }
 
 
-def normalize_sheet_name(name: str) -> str:
-    """Normaliza nombres de hojas: elimina espacios y acentos."""
-    # Eliminar espacios en blanco
-    name = name.strip().replace(" ", "")
-    
-    # Eliminar acentos y tildes
-    nfkd_form = unicodedata.normalize("NFKD", name)
-    normalized = "".join([c for c in nfkd_form if not unicodedata.combining(c)])
-    
-    return normalized.lower()
-
-async def load_file(file: UploadFile) -> pl.DataFrame:
-    extension = file.filename.rsplit(".", 1)[-1].lower()
+def get_extension(filename: str) -> str:
+    extension = filename.rsplit(".", 1)[-1].lower()
 
     if extension not in SUPPORTED_EXTENSIONS:
         raise UnsupportedFileFormatError(extension, list(SUPPORTED_EXTENSIONS.keys()))
 
-    content = await file.read()
+    return extension
+
+def _as_source(content: bytes | str) -> io.BytesIO | str:
+    """Los bytes se envuelven en un buffer; las rutas se pasan tal cual al lector."""
+    return io.BytesIO(content) if isinstance(content, bytes) else content
+
+def read_file(content: bytes | str, filename: str, schema_for: SchemaResolver | None = None) -> pl.DataFrame:
+    """
+    Parsea el contenido (o la ruta) de un archivo (síncrono, apto para el pool de procesos).
+    Con `schema_for` (p. ej. `Transformer.read_schema`) los tipos declarados se aplican al
+    leer en lugar de inferirlos por muestreo.
+    """
+    extension = get_extension(filename)
     reader = SUPPORTED_EXTENSIONS[extension]
 
     try:
-        return reader(io.BytesIO(content))
+        return reader(_as_source(content), schema_for)
     except Exception as e:
-        raise FileReadError(file.filename, {"original_error": str(e)}) from e
-    
+        raise FileReadError(filename, {"original_error": str(e)}) from e
 
-async def load_all_sheets(
-        file: UploadFile,
-        sheets: set[str],
-        skip_rows: int = 0,
-    ) -> dict[str, pl.DataFrame]:
-    
-    extension = file.filename.rsplit(".",1)[-1].lower()
+def should_stream_csv(path: str, filename: str) -> bool:
+    """CSV en disco a partir de `CSV_STREAMING_MIN_BYTES`: se carga por la ruta streaming."""
+    return (
+        settings.CSV_STREAMING_ENABLED
+        and get_extension(filename) == "csv"
+        and os.path.getsize(path) >= settings.CSV_STREAMING_MIN_BYTES
+    )
 
-    if extension not in SUPPORTED_EXTENSIONS:
-        raise UnsupportedFileFormatError(extension, list(SUPPORTED_EXTENSIONS.keys()))
+def scan_csv_file(path: str, schema_for: SchemaResolver | None = None) -> pl.LazyFrame:
+    """
+    CSV en disco como LazyFrame: nada se lee hasta ejecutar el plan (por lotes). Como en
+    `_read_csv`, si el archivo no cumple el contrato se escanea infiriendo los tipos; para
+    saberlo antes de enviar el primer lote se parsean en streaming solo las columnas del
+    contrato.
+    """
+    overrides = _overrides(pl.scan_csv(path).collect_schema().names(), schema_for)
+    if not overrides:
+        return pl.scan_csv(path)
+
+    lf = pl.scan_csv(path, schema_overrides=overrides)
+    try:
+        lf.select(pl.col(list(overrides)).null_count()).collect(engine="streaming")
+    except pl.exceptions.ComputeError as e:
+        logger.warning(f"[Loader] CSV does not match the declared schema, falling back to inference: {e}")
+        return pl.scan_csv(path)
+    return lf
+
+#? =========================
+#? MUESTRAS (dry run)
+#? =========================
+
+@dataclass
+class FileSample:
+    """Primeras filas de un archivo y el total de filas de datos (estimado si no `exact`)."""
+    df: pl.DataFrame
+    total_rows: int
+    exact: bool
+    warnings: list[str] = field(default_factory=list)
+
+
+async def read_csv_head(file: UploadFile, sample_rows: int, max_bytes: int) -> bytes:
+    """Encabezado y hasta `sample_rows` líneas de un CSV subido, sin leer el resto del cuerpo."""
+    buffer = bytearray()
+    while buffer.count(b"\n") <= sample_rows and len(buffer) < max_bytes:
+        chunk = await file.read(SPOOL_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+
+    end = -1
+    for _ in range(sample_rows + 1):
+        end = buffer.find(b"\n", end + 1)
+        if end < 0:
+            return bytes(buffer)
+    return bytes(buffer[:end + 1])
+
+
+def sample_csv(head: bytes, total_bytes: int, schema_for: SchemaResolver | None = None) -> FileSample:
+    """
+    Lee la muestra `head` con el contrato de tipos y estima las filas del archivo completo
+    a partir del tamaño medio de las líneas de la muestra.
+    """
+    header = pl.read_csv(io.BytesIO(head), n_rows=0).columns
+    overrides = _overrides(header, schema_for)
+    warnings = []
+
+    try:
+        df = pl.read_csv(io.BytesIO(head), schema_overrides=overrides or None)
+    except pl.exceptions.ComputeError as e:
+        warnings.append(f"El archivo no cumple el contrato de tipos; se leería infiriendo tipos: {e}")
+        df = pl.read_csv(io.BytesIO(head))
+
+    exact = len(head) >= total_bytes
+    if exact or df.is_empty():
+        return FileSample(df=df, total_rows=df.height, exact=exact, warnings=warnings)
 
-    content = await file.read()
-    buffer = io.BytesIO(content)
+    header_bytes = head.find(b"\n") + 1
+    row_bytes = (len(head) - header_bytes) / df.height
+    return FileSample(
+        df=df,
+        total_rows=round((total_bytes - header_bytes) / row_bytes),
+        exact=False,
+        warnings=warnings,
+    )
 
+
+def sample_excel(path: str, sample_rows: int, schema_for: SchemaResolver | None = None) -> FileSample:
+    """Primeras `sample_rows` filas de la primera hoja y su altura completa (síncrono)."""
+    workbook = fastexcel.read_excel(path)
+    warnings = []
+    df = _drop_empty(_load_sheet(workbook, 0, schema_for, n_rows=sample_rows, warnings=warnings))
+    total = _sheet_height(workbook, 0)
+    return FileSample(df=df, total_rows=max(total, df.height), exact=df.height >= total, warnings=warnings)
+
+@dataclass
+class LoadedSheets:
+    """Hojas leídas de un libro (por nombre normalizado) y el tiempo de lectura de cada una."""
+    frames: dict[str, pl.DataFrame]
+    read_seconds: dict[str, float] = field(default_factory=dict)
+    open_seconds: float = 0.0
+    # Con `n_rows` (muestra): filas de datos de cada hoja completa
+    total_rows: dict[str, int] = field(default_factory=dict)
+    # Columnas que no cumplieron el contrato de tipos, por hoja
+    warnings: dict[str, list[str]] = field(default_factory=dict)
+
+def read_sheets(
+        content: bytes | str,
+        filename: str,
+        sheets: set[str],
+        skip_rows: int = 0,
+        schema_for: SchemaResolver | None = None,
+        n_rows: int | None = None,
+    ) -> LoadedSheets:
+    """
+    Lee las hojas solicitadas de un libro Excel (síncrono, apto para el pool de procesos).
+    El libro se abre una sola vez con calamine (fastexcel) y todas las hojas se leen desde ese handle.
+    Los encabezados están en la fila `skip_rows` (tras las líneas de título) y se devuelven
+    con la misma normalización que `BaseTransformer._clean`. Con `n_rows` solo se lee una
+    muestra de cada hoja y `total_rows` guarda su altura completa.
+    """
+    extension = get_extension(filename)
+
+    start = time.perf_counter()
     try:
-        wb = openpyxl.load_workbook(buffer, read_only=True, data_only=True)
-        available_sheets = set(wb.sheetnames)
-        wb.close()
-        buffer.seek(0)
+        workbook = fastexcel.read_excel(content)
+        available_sheets = set(workbook.sheet_names)
     except Exception as e:
-        raise FileReadError(file.filename, {"original_error": str(e)}) from e
-    
+        raise FileReadError(filename, {"original_error": str(e)}) from e
+    open_seconds = round(time.perf_counter() - start, 4)
+
     #! Normalizar nombres de hojas disponibles y crear mapeo
     normalized_to_original = {normalize_sheet_name(name): name for name in available_sheets}
     normalized_requested = {normalize_sheet_name(name) for name in sheets}
-    
+
     #! Validación de hojas
     matched = normalized_requested & set(normalized_to_original.keys())
     missing = normalized_requested - matched
 
     if missing:
         raise FileReadSheetsError(extension, {"original_error": f"Hojas no encontradas en el archivo '%s': %s: {missing}"})
-    
+
     if not matched:
         raise FileReadError(
-            file.filename,
+            filename,
             {"original_error": f"Ninguna hoja esperada existe. Disponibles: {list(available_sheets)}"},
         )
-    
-    result: dict[str, pl.DataFrame] = {}
+
+    result = LoadedSheets(frames={}, open_seconds=open_seconds)
     for norm_name in matched:
         original_name = normalized_to_original[norm_name]
+        start = time.perf_counter()
         try:
-            df = pl.read_excel(
-                buffer, 
-                sheet_name=original_name, 
-                has_header=False
+            warnings = []
+            df = _load_sheet(
+                workbook, original_name, schema_for, header_row=skip_rows, n_rows=n_rows, warnings=warnings
             )
-            
-            # Salto lineas inciales
-            df = df.slice(skip_rows)
-            header = df.row(0)
-            header = [str(col).strip().lower() for col in header]
-            df = df.slice(1).rename(dict(zip(df.columns, header)))
-            
-            result[norm_name] = df
-            buffer.seek(0)
-        
+            if warnings:
+                result.warnings[norm_name] = warnings
+            df = df.rename(dict(zip(df.columns, normalize_headers(df.columns))))
+            if n_rows is not None:
+                result.total_rows[norm_name] = _sheet_height(workbook, original_name, skip_rows)
+
+            result.frames[norm_name] = df
+            result.read_seconds[norm_name] = round(time.perf_counter() - start, 4)
+
         except Exception as e:
             raise FileExistsError(
                 extension,
                  {"original_error": f"Error leyendo hoja '{norm_name}': {str(e)}"},
             )
-        
-    return result
\ No newline at end of file
+
+    return result
+
+async def load_file(file: UploadFile, schema_for: SchemaResolver | None = None) -> pl.DataFrame:
+    get_extension(file.filename)
+
+    async with spooled_upload(file) as upload:
+        return await _parse("file", read_file, upload.path, file.filename, schema_for)
+
+
+async def load_all_sheets(
+        file: UploadFile,
+        sheets: set[str],
+        skip_rows: int = 0,
+        schema_for: SchemaResolver | None = None,
+    ) -> LoadedSheets:
+
+    get_extension(file.filename)
+
+    async with spooled_upload(file) as upload:
+        return await _parse("sheets", read_sheets, upload.path, file.filename, sheets, skip_rows, schema_for)
+
+
+@dataclass
+class SpooledUpload:
+    """Archivo subido ya persistido en disco, con su tamaño y hash SHA-256."""
+    path: str
+    filename: str
+    size: int
+    sha256: str
+
+
+@asynccontextmanager
+async def spooled_upload(file: UploadFile, check_header: HeaderCheck | None = None) -> AsyncIterator[SpooledUpload]:
+    """
+    Vuelca el `UploadFile` a un archivo temporal por bloques y lo entrega,
+    de modo que los lectores trabajen desde disco sin duplicar el contenido en memoria.
+    El archivo se elimina al salir.
+    """
+    suffix = Path(file.filename).suffix
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=settings.UPLOAD_SPOOL_DIR)
+    os.close(fd)
+
+    try:
+        yield await spool_upload(file, path, check_header)
+    finally:
+        Path(path).unlink(missing_ok=True)
+
+
+async def spool_upload(
+        file: UploadFile,
+        destination: str | Path,
+        check_header: HeaderCheck | None = None,
+    ) -> SpooledUpload:
+    """
+    Copia el `UploadFile` a disco por bloques calculando su SHA-256 en el camino.
+    El primer bloque se inspecciona antes de seguir (firma del archivo y encabezados
+    con `check_header`). El límite de tamaño lo aplica `UploadIntake` mientras llega el
+    cuerpo; aquí solo se comprueba de nuevo para las llamadas que no pasan por HTTP.
+    """
+    extension = get_extension(file.filename)
+    max_bytes = max_upload_bytes(route_label.get())
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    written = 0
+    start = time.perf_counter()
+    with open(destination, "wb") as out:
+        while chunk := await file.read(SPOOL_CHUNK_SIZE):
+            if written == 0:
+                inspect_head(file.filename, extension, chunk, check_header)
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLargeError(max_bytes, written)
+            out.write(chunk)
+            digest.update(chunk)
+
+    if written == 0:
+        inspect_head(file.filename, extension, b"")
+
+    elapsed = time.perf_counter() - start
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add("receive", {"wall_seconds": round(elapsed, 4)}, bytes_in=written)
+
+    route = route_label.get()
+    UPLOAD_RECEIVE_SECONDS.observe(elapsed, route=route)
+    UPLOAD_RECEIVED_BYTES.inc(written, route=route)
+    if elapsed > 0:
+        UPLOAD_RECEIVE_BYTES_PER_SECOND.set(written / elapsed, route=route)
+
+    return SpooledUpload(
+        path=str(destination),
+        filename=file.filename,
+        size=written,
+        sha256=digest.hexdigest(),
+    )
+
+
+async def load_saved_file(path: str, filename: str, schema_for: SchemaResolver | None = None) -> pl.DataFrame:
+    """Equivalente a `load_file` para un archivo ya persistido en disco."""
+    return await _parse("file", read_file, path, filename, schema_for)
+
+
+async def load_saved_sheets(
+        path: str,
+        filename: str,
+        sheets: set[str],
+        skip_rows: int = 0,
+        schema_for: SchemaResolver | None = None,
+    ) -> LoadedSheets:
+    """Equivalente a `load_all_sheets` para un archivo ya persistido en disco."""
+    return await _parse("sheets", read_sheets, path, filename, sheets, skip_rows, schema_for)
+
+
+def _rows_read(result: pl.DataFrame | LoadedSheets) -> int:
+    if isinstance(result, LoadedSheets):
+        return sum(frame.height for frame in result.frames.values())
+    return result.height
+
+
+async def _parse(reader: str, fn, path: str, *args):
+    """
+    Lee en el pool de CPU registrando la duración en `upload_parse_seconds`
+    (y la etapa `read` si hay un perfil activo).
+    """
+    with UPLOAD_PARSE_SECONDS.time(route=route_label.get(), reader=reader):
+        return await run_cpu_profiled(
+            "read",
+            fn,
+            path,
+            *args,
+            rows_out=_rows_read,
+            reader=reader,
+            bytes_in=os.path.getsize(path) if current_profile.get() is not None else None,
+        )
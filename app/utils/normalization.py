@@ -0,0 +1,70 @@
+from app.core.metrics import registry
+from functools import lru_cache
+from typing import Iterable
+import unicodedata
+
+# Encabezados distintos que se recuerdan por proceso (los archivos mensuales repiten los mismos)
+CACHE_SIZE = 8192
+
+
+def _fold(name: str) -> str:
+    """Quita acentos (NFKD), saltos de línea y espacios extremos, y pasa a minúsculas."""
+    name = unicodedata.normalize("NFKD", str(name))
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = name.replace("\n", " ").replace("\r", " ")
+    return name.strip().lower()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_header(name: str) -> str:
+    """Encabezado / clave de `column_mapping`: `"Año  Base\\n"` -> `"ano__base"`."""
+    return _fold(name).replace(" ", "_")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def normalize_sheet_name(name: str) -> str:
+    """Nombre de hoja: misma normalización que los encabezados, sin espacios (`"Ejecución MINC"` -> `"ejecucionminc"`)."""
+    return _fold(name).replace(" ", "")
+
+
+def normalize_headers(names: Iterable[str]) -> list[str]:
+    return [normalize_header(name) for name in names]
+
+
+def cache_stats() -> dict:
+    """
+    Aciertos/fallos de las cachés de normalización de este proceso. Con
+    `EXECUTOR_CPU_MODE="process"` no incluyen los de los hijos del pool de CPU.
+    """
+    stats = {}
+    for name, fn in (("headers", normalize_header), ("sheet_names", normalize_sheet_name)):
+        info = fn.cache_info()
+        total = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_ratio": round(info.hits / total, 4) if total else 0.0,
+        }
+    return stats
+
+
+def clear_cache() -> None:
+    normalize_header.cache_clear()
+    normalize_sheet_name.cache_clear()
+
+
+NORMALIZATION_CACHE_HITS = registry.gauge(
+    "normalization_cache_hits", "Header/sheet-name normalization cache hits in this process (excludes CPU pool child processes)", ("cache",)
+)
+NORMALIZATION_CACHE_MISSES = registry.gauge(
+    "normalization_cache_misses", "Header/sheet-name normalization cache misses in this process (excludes CPU pool child processes)", ("cache",)
+)
+
+def _collect_cache_metrics():
+    for cache, stats in cache_stats().items():
+        NORMALIZATION_CACHE_HITS.set(stats["hits"], cache=cache)
+        NORMALIZATION_CACHE_MISSES.set(stats["misses"], cache=cache)
+
+registry.add_collector(_collect_cache_metrics)
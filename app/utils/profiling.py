@@ -0,0 +1,176 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, TypeVar
+import multiprocessing
+import os
+import threading
+import time
+
+from app.core.executor import executor
+from fastapi import Query
+
+T = TypeVar("T")
+
+# RSS actual del proceso (Linux); en otros sistemas no se mide la memoria
+_STATM_PATH = "/proc/self/statm"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# Intervalo de muestreo del RSS mientras dura una etapa medida
+RSS_SAMPLE_SECONDS = 0.01
+
+# Parámetro `?profile=true` compartido por las rutas de carga
+PROFILE_QUERY = Query(False, description="Incluye en la respuesta el desglose de tiempos por etapa")
+
+
+class Profile:
+    """Etapas medidas durante una petición con `?profile=true`."""
+
+    def __init__(self):
+        self.stages: list[dict[str, Any]] = []
+        self._start = time.perf_counter()
+
+    def add(self, stage: str, measured: dict[str, Any], **fields: Any) -> None:
+        entry = {"stage": stage}
+        scope = profile_scope.get()
+        if scope is not None:
+            entry["scope"] = scope
+        entry.update(measured)
+        entry.update({key: value for key, value in fields.items() if value is not None})
+        self.stages.append(entry)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "wall_seconds": round(time.perf_counter() - self._start, 4),
+            "stages": self.stages,
+        }
+
+
+# Perfil activo (None = deshabilitado: la instrumentación no mide nada)
+current_profile: ContextVar[Profile | None] = ContextVar("upload_profile", default=None)
+# Sub-ámbito opcional de las etapas (p. ej. la hoja de un libro procesada en paralelo)
+profile_scope: ContextVar[str | None] = ContextVar("upload_profile_scope", default=None)
+
+
+@contextmanager
+def profiling(enabled: bool) -> Iterator[Profile | None]:
+    """Activa un `Profile` para el contexto actual si `enabled`."""
+    if not enabled:
+        yield None
+        return
+
+    profile = Profile()
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+
+
+def _current_rss_bytes() -> int | None:
+    try:
+        with open(_STATM_PATH, "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _RssSampler:
+    """
+    Muestrea en un hilo el RSS actual del proceso mientras dura la etapa y guarda el
+    máximo. `ru_maxrss` no sirve: es el pico de toda la vida del proceso, y tras la
+    primera carga grande cualquier etapa posterior mediría 0.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_SECONDS):
+        self.start = _current_rss_bytes()
+        self.peak = self.start
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._run, args=(interval,), name="rss-sampler", daemon=True)
+            self._thread.start()
+
+    def _sample(self) -> None:
+        rss = _current_rss_bytes()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self._sample()
+
+    def stop(self) -> int | None:
+        """Detiene el muestreo y devuelve el pico menos el RSS inicial (None si no se mide)."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.peak - self.start
+
+
+@contextmanager
+def measure() -> Iterator[dict[str, Any]]:
+    """
+    Mide tiempo de pared, CPU y el pico de memoria (RSS muestreado) sobre el inicial.
+    La CPU es la del proceso (`process_time`), que incluye los hilos de Polars. En un
+    proceso hijo del pool de CPU es exacta; en un hilo también suma el trabajo concurrente
+    del resto del proceso, así que se marca `cpu_approximate`. El RSS es siempre el del
+    proceso, con la misma salvedad.
+    """
+    in_child = multiprocessing.parent_process() is not None
+    measured: dict[str, Any] = {}
+    sampler = _RssSampler()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield measured
+    finally:
+        measured["wall_seconds"] = round(time.perf_counter() - wall_start, 4)
+        measured["cpu_seconds"] = round(time.process_time() - cpu_start, 4)
+        if not in_child:
+            measured["cpu_approximate"] = True
+        peak_delta = sampler.stop()
+        if peak_delta is not None:
+            measured["peak_memory_delta_bytes"] = peak_delta
+
+
+def call_measured(fn: Callable[..., T], *args: Any, **kwargs: Any) -> tuple[T, dict[str, Any]]:
+    """Ejecuta `fn` dentro de `measure()`; pensado para correr en los pools del executor."""
+    with measure() as measured:
+        result = fn(*args, **kwargs)
+    return result, measured
+
+
+async def run_cpu_profiled(
+    stage: str,
+    fn: Callable[..., T],
+    *args: Any,
+    rows_out: Callable[[T], int] | None = None,
+    **fields: Any,
+) -> T:
+    """`executor.run_cpu` que, con un perfil activo, registra la etapa `stage`."""
+    profile = current_profile.get()
+    if profile is None:
+        return await executor.run_cpu(fn, *args)
+
+    result, measured = await executor.run_cpu(call_measured, fn, *args)
+    profile.add(stage, measured, rows_out=rows_out(result) if rows_out else None, **fields)
+    return result
+
+
+async def run_io_profiled(
+    stage: str,
+    fn: Callable[..., T],
+    *args: Any,
+    rows_out: Callable[[T], int] | None = None,
+    fields: dict[str, Any] | None = None,
+    **kwargs: Any,
+) -> T:
+    """`executor.run_io` que, con un perfil activo, registra la etapa `stage`."""
+    profile = current_profile.get()
+    if profile is None:
+        return await executor.run_io(fn, *args, **kwargs)
+
+    result, measured = await executor.run_io(call_measured, fn, *args, **kwargs)
+    profile.add(stage, measured, rows_out=rows_out(result) if rows_out else None, **(fields or {}))
+    return result
@@ -1,12 +1,58 @@
 from pydantic import BaseModel
+from typing import Any
 
 class UploadResponse(BaseModel):
     status: bool
     message: str
     rows_uploaded: int
     destination_table: str
+    rows_per_second: float | None = None
+    duplicate: bool = False
+    inserted: int | None = None
+    updated: int | None = None
+    skipped: int | None = None
+    # Filas con una clave repetida dentro del archivo (upsert: se escribe la última)
+    duplicate_keys: int | None = None
+    detail: list[dict] | None = None
+    timings: dict[str, Any] | None = None
+
+class ValidationResponse(BaseModel):
+    status: bool
+    message: str
+    destination_table: str
+    # Filas de datos del archivo y filas de salida proyectadas (exactas si la muestra cubrió el archivo)
+    rows_in: int
+    rows_out: int
+    exact: bool
+    sample_rows: int
+    columns: dict[str, str]
+    warnings: list[str] = []
+    elapsed_seconds: float
     detail: list[dict] | None = None
 
 class HealthResponse(BaseModel):
     status: bool
-    message: str
\ No newline at end of file
+    message: str
+
+class JobAcceptedResponse(BaseModel):
+    job_id: str
+    state: str
+    status_url: str
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    filename: str
+    state: str
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    stages: dict[str, float] = {}
+    rows_uploaded: int | None = None
+    result: dict[str, Any] | None = None
+    error: dict[str, Any] | None = None
+    attempts: int = 0
+    # Avance de la carga mientras corre (rows_total = 0 si no se conoce, p. ej. streaming)
+    chunks: int | None = None
+    rows_sent: int | None = None
+    rows_total: int | None = None
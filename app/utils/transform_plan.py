@@ -0,0 +1,73 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+import re
+
+# Firmas de encabezado distintas que se recuerdan por proceso
+PLAN_CACHE_SIZE = 128
+
+
+@dataclass(frozen=True)
+class YearColumnsPlan:
+    """
+    Resolución del esquema de un archivo con años como columnas (Bienes, Inversión),
+    calculada una vez por firma de encabezados y reutilizada en cada carga.
+    """
+    # Columnas estáticas esperadas que faltan en el archivo
+    missing: tuple[str, ...]
+    # Columnas estáticas de origen (orden de `column_mapping`) y columnas de año (orden del archivo)
+    static_columns: tuple[str, ...]
+    year_columns: tuple[str, ...]
+    rename: dict[str, str] = field(default_factory=dict)
+    # Columnas índice del unpivot (nombres ya renombrados)
+    index_columns: tuple[str, ...] = ()
+    # Columna de año -> año (int) y -> sufijo ("p", "pre", "pro" o None)
+    years: dict[str, int] = field(default_factory=dict)
+    suffixes: dict[str, str | None] = field(default_factory=dict)
+
+    @property
+    def selected_columns(self) -> list[str]:
+        return list(self.static_columns + self.year_columns)
+
+
+def compile_year_plan(
+    columns: tuple[str, ...],
+    column_mapping: dict[str, str],
+    year_pattern: re.Pattern,
+) -> YearColumnsPlan:
+    """
+    Las columnas estáticas son las claves de `column_mapping`; las de año, las que
+    cumplen `year_pattern` (año en el grupo 1, sufijo opcional en el grupo `suffix`).
+    """
+    available = set(columns)
+    year_columns, years, suffixes = [], {}, {}
+
+    for column in columns:
+        match = year_pattern.match(column)
+        if match:
+            year_columns.append(column)
+            years[column] = int(match.group(1))
+            suffix = match.group("suffix")
+            suffixes[column] = suffix.lower() if suffix else None
+
+    missing = tuple(c for c in column_mapping if c not in available)
+    present = tuple(c for c in column_mapping if c in available)
+
+    return YearColumnsPlan(
+        missing=missing,
+        static_columns=present,
+        year_columns=tuple(year_columns),
+        rename={c: column_mapping[c] for c in present if column_mapping[c] != c},
+        index_columns=tuple(column_mapping[c] for c in present),
+        years=years,
+        suffixes=suffixes,
+    )
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def cached_plan(transformer: type, columns: tuple[str, ...]) -> Any:
+    """
+    Plan de `transformer.compile_plan` para la firma `columns`, con expulsión LRU.
+    Vive en cada proceso del pool de CPU, que se reutiliza entre cargas.
+    """
+    return transformer.compile_plan(columns)
@@ -0,0 +1,222 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+import hashlib
+import sqlite3
+import logging
+import time
+
+from app.core.database import DBManager
+from app.core.executor import executor
+from app.core.settings import settings
+from fastapi import Query
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Parámetro `?force=true` compartido por las rutas de carga
+FORCE_QUERY = Query(False, description="Reprocesa el archivo aunque ya se haya cargado antes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_ledger (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    transformer TEXT NOT NULL,
+    destination_table TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    rows_uploaded INTEGER NOT NULL,
+    table_rows INTEGER,
+    created_at REAL NOT NULL,
+    last_hit_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_upload_ledger_last_hit ON upload_ledger (last_hit_at);
+CREATE INDEX IF NOT EXISTS ix_upload_ledger_destination ON upload_ledger (destination_table, alias);
+"""
+
+
+@dataclass
+class LedgerEntry:
+    key: str
+    sha256: str
+    transformer: str
+    destination_table: str
+    alias: str
+    rows_uploaded: int
+    # Filas de la tabla destino justo después de la carga (None = sin contar o no se pudieron contar)
+    table_rows: int | None
+    created_at: float
+    last_hit_at: float
+    hits: int
+
+
+class UploadLedger:
+    """
+    Registro direccionado por contenido de las cargas ya procesadas.
+    La clave es SHA-256 del archivo + transformer + tabla destino + alias; las
+    entradas expiran tras `ttl_seconds` y se descartan por LRU al superar `max_entries`.
+    Solo la última carga de cada tabla queda registrada (cualquier carga posterior
+    puede haber cambiado lo que dejó la anterior). Con `UPLOAD_LEDGER_VERIFY_ROWS` un
+    acierto se confirma además contra el número de filas actual de la tabla (`confirm`),
+    que detecta cambios hechos fuera de la API.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self._path = Path(path)
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._initialized = False
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not self._initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._initialized = True
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(sha256: str, transformer: str, destination_table: str, alias: str) -> str:
+        return hashlib.sha256(f"{sha256}|{transformer}|{destination_table}|{alias}".encode()).hexdigest()
+
+    def lookup(self, key: str) -> LedgerEntry | None:
+        """Devuelve la entrada vigente para `key` (y la marca como usada) o None."""
+        now = time.time()
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM upload_ledger WHERE key = ?", (key,)).fetchone()
+
+            if row is not None and now - row["created_at"] > self._ttl_seconds:
+                conn.execute("DELETE FROM upload_ledger WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                with self._lock:
+                    self.misses += 1
+                return None
+
+            conn.execute(
+                "UPDATE upload_ledger SET last_hit_at = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+
+        with self._lock:
+            self.hits += 1
+        return LedgerEntry(**dict(row))
+
+    def confirm(self, entry: LedgerEntry, table_rows: int | None) -> bool:
+        """
+        Confirma un acierto de `lookup` si la tabla destino sigue con las filas que dejó
+        la carga. Si no (o no se pudieron contar), descarta la entrada y cuenta un fallo.
+        """
+        if table_rows is not None and entry.table_rows == table_rows:
+            return True
+
+        logger.info(
+            f"[Ledger] {entry.destination_table}: {table_rows} rows now, {entry.table_rows} after the "
+            f"recorded upload; processing the file again"
+        )
+        with self._connect() as conn:
+            conn.execute("DELETE FROM upload_ledger WHERE key = ?", (entry.key,))
+        with self._lock:
+            self.hits -= 1
+            self.misses += 1
+        return False
+
+    def record(
+        self,
+        key: str,
+        sha256: str,
+        transformer: str,
+        destination_table: str,
+        alias: str,
+        rows_uploaded: int,
+        table_rows: int | None = None,
+    ) -> None:
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO upload_ledger "
+                "(key, sha256, transformer, destination_table, alias, rows_uploaded, table_rows, created_at, last_hit_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)",
+                (key, sha256, transformer, destination_table, alias, rows_uploaded, table_rows, now, now),
+            )
+            # Esta carga puede haber reemplazado o actualizado lo que dejaron las anteriores
+            conn.execute(
+                "DELETE FROM upload_ledger WHERE destination_table = ? AND alias = ? AND key != ?",
+                (destination_table, alias, key),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM upload_ledger WHERE created_at < ?", (now - self._ttl_seconds,))
+        conn.execute(
+            "DELETE FROM upload_ledger WHERE key NOT IN "
+            "(SELECT key FROM upload_ledger ORDER BY last_hit_at DESC LIMIT ?)",
+            (self._max_entries,),
+        )
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM upload_ledger").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+def count_rows(db_manager: DBManager, alias: str, table: str) -> int | None:
+    """Filas actuales de `table`, o None si no se pueden contar (p. ej. la tabla no existe)."""
+    try:
+        with db_manager.get_engine(alias).connect() as conn:
+            return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar_one()
+    except SQLAlchemyError as e:
+        logger.warning(f"[Ledger] Could not count rows of {table}: {e}")
+        return None
+
+
+async def already_uploaded(key: str, db_manager: DBManager, alias: str, table: str) -> bool:
+    """
+    Acierto del registro para `key`. Con `UPLOAD_LEDGER_VERIFY_ROWS` se confirma contra
+    las filas actuales de `table`; sin él no se consulta la base de datos.
+    """
+    entry = upload_ledger.lookup(key)
+    if entry is None:
+        return False
+    if not settings.UPLOAD_LEDGER_VERIFY_ROWS:
+        return True
+    return upload_ledger.confirm(entry, await executor.run_io(count_rows, db_manager, alias, table))
+
+
+async def record_upload(
+    key: str,
+    sha256: str,
+    transformer: str,
+    db_manager: DBManager,
+    alias: str,
+    table: str,
+    rows_uploaded: int,
+) -> None:
+    """Registra la carga y, con `UPLOAD_LEDGER_VERIFY_ROWS`, las filas que deja en `table`."""
+    table_rows = None
+    if settings.UPLOAD_LEDGER_VERIFY_ROWS:
+        table_rows = await executor.run_io(count_rows, db_manager, alias, table)
+    upload_ledger.record(key, sha256, transformer, table, alias, rows_uploaded, table_rows)
+
+
+upload_ledger = UploadLedger(
+    settings.UPLOAD_LEDGER_PATH,
+    ttl_seconds=settings.UPLOAD_LEDGER_TTL_SECONDS,
+    max_entries=settings.UPLOAD_LEDGER_MAX_ENTRIES,
+)
@@ -1,83 +1,808 @@
 from .base_transformer import BaseTransformer
+from .bulk_loader import BulkLoader, OnConflict, get_bulk_loader
+from .delta import compute_delta, fetch_existing, update_rows
+from .profiling import call_measured, current_profile, run_io_profiled
 from app.core.database import DBManager
-from app.core.exceptions import DatabaseInsertError
+from app.core.executor import executor
+from app.core.exceptions import AppException, ConfigurationError, DatabaseInsertError, TransformationError
+from app.core.metrics import (
+    UPLOAD_INSERT_SECONDS,
+    UPLOAD_ROWS,
+    UPLOAD_ROWS_PER_SECOND,
+    UPLOAD_TRANSFORM_SECONDS,
+    route_label,
+)
+from app.core.settings import settings
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from typing import Callable, Iterable, Iterator, Literal
 import polars as pl
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TransactionMode = Literal["chunk", "load"]
+
+# (chunk_index, rows_sent, total_rows); total_rows es 0 si se desconoce (carga streaming)
+ProgressCallback = Callable[[int, int, int], None]
+
+
+@dataclass
+class UploadResult:
+    rows: int
+    elapsed_seconds: float = 0.0
+    chunks: int = 0
+    # None = desconocido: un upsert sin delta no distingue inserciones de actualizaciones
+    inserted: int | None = 0
+    updated: int | None = 0
+    skipped: int | None = 0
+    # Con write_mode "upsert": filas del archivo cuya clave ya apareció antes en él (se
+    # escribe solo la última aparición de cada clave)
+    duplicate_keys: int = 0
+    # Con write_mode "replace_partition": borrado/inserción por partición
+    partitions: list[dict] = field(default_factory=list)
+    # Orígenes que se cargaron juntos en este resultado (p. ej. las hojas de una carga combinada)
+    sources: list[str] = field(default_factory=list)
+    # Duración (segundos) de etapas externas al uploader, p. ej. {"read": 0.42}
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return round(self.rows / self.elapsed_seconds, 2)
+
+
+def _load_in_chunks(
+        engine: Engine,
+        loader: BulkLoader,
+        table: str,
+        df: pl.DataFrame | Iterable[pl.DataFrame],
+        on_conflict: OnConflict,
+        chunk_size: int,
+        transaction: TransactionMode,
+        on_progress: ProgressCallback | None = None,
+        before_load: Callable | None = None,
+        key_columns: list[str] | None = None,
+) -> tuple[int, int]:
+    """
+    Envía `df` en lotes de `chunk_size` filas. `df` también puede ser un iterable de
+    DataFrames (lotes de una carga streaming), que se consume a medida que se envía.
+    Con `transaction="load"` todos los lotes comparten una transacción; con `"chunk"`
+    cada lote se confirma por separado (`before_load` corre en la transacción del primero,
+    así que no debe ser destructivo: las recargas completas fuerzan `"load"`).
+    Devuelve (filas afectadas, lotes enviados).
+    """
+    frames = [df] if isinstance(df, pl.DataFrame) else df
+    total = df.height if isinstance(df, pl.DataFrame) else 0
+    rows = 0
+    sent = 0
+    chunks = 0
+
+    def send(conn, chunk: pl.DataFrame):
+        nonlocal rows, sent, chunks
+        rows += loader.load(conn, table, chunk, on_conflict=on_conflict, key_columns=key_columns)
+        sent += chunk.height
+        chunks += 1
+        logger.debug(f"[Uploader] {table}: chunk {chunks} ({sent}/{total} rows)")
+        if on_progress:
+            on_progress(chunks, sent, total)
+
+    if transaction == "load":
+        with engine.begin() as conn:
+            if before_load:
+                before_load(conn)
+            for chunk in _slices(frames, chunk_size):
+                send(conn, chunk)
+        return rows, chunks
+
+    for chunk in _slices(frames, chunk_size):
+        with engine.begin() as conn:
+            if before_load and chunks == 0:
+                before_load(conn)
+            send(conn, chunk)
+
+    return rows, chunks
+
+
+def _slices(frames: Iterable[pl.DataFrame], chunk_size: int) -> Iterator[pl.DataFrame]:
+    for frame in frames:
+        yield from frame.iter_slices(chunk_size)
+
+
+def _check_write_mode(transformer: BaseTransformer) -> None:
+    mode = transformer.write_mode
+    if mode == "upsert" and not transformer.key_columns:
+        raise ConfigurationError(
+            f"{type(transformer).__name__}: write_mode 'upsert' requires key_columns",
+            {"transformer": type(transformer).__name__, "write_mode": mode},
+        )
+    if mode == "replace_partition" and not transformer.partition_column:
+        raise ConfigurationError(
+            f"{type(transformer).__name__}: write_mode 'replace_partition' requires partition_column",
+            {"transformer": type(transformer).__name__, "write_mode": mode},
+        )
+    if mode == "replace_partition" and transformer.incremental:
+        # El reemplazo borra y reinserta la partición entera: no hay delta que calcular
+        raise ConfigurationError(
+            f"{type(transformer).__name__}: write_mode 'replace_partition' cannot be combined with incremental",
+            {"transformer": type(transformer).__name__, "write_mode": mode},
+        )
+
+def _on_conflict(transformer: BaseTransformer) -> OnConflict:
+    return "upsert" if transformer.write_mode == "upsert" else "ignore"
+
+def _load_result(transformer: BaseTransformer, sent: int, affected: int, chunks: int) -> UploadResult:
+    """
+    Resultado de una carga sin delta a partir del rowcount. Con "ignore" las filas
+    afectadas son las insertadas; con "upsert" el rowcount no las separa de las
+    actualizadas (MySQL cuenta 2 por fila actualizada), así que solo se informan las enviadas.
+    """
+    if transformer.write_mode == "upsert":
+        return UploadResult(rows=sent, chunks=chunks, inserted=None, updated=None, skipped=None)
+    return UploadResult(rows=affected, chunks=chunks, inserted=affected, skipped=max(sent - affected, 0))
+
+
+def _drop_duplicate_keys(df: pl.DataFrame, transformer: BaseTransformer) -> tuple[pl.DataFrame, int]:
+    """
+    Con write_mode "upsert" una clave repetida dentro del archivo solo puede escribirse
+    una vez: se conserva su última aparición y se devuelve cuántas filas se descartaron.
+    """
+    if transformer.write_mode != "upsert" or df.is_empty():
+        return df, 0
+
+    deduped = df.unique(subset=transformer.key_columns, keep="last", maintain_order=True)
+    dropped = df.height - deduped.height
+    if dropped:
+        logger.warning(
+            f"[Uploader] {transformer.destination_table}: {dropped} row(s) repeat a key "
+            f"{transformer.key_columns} already seen in the file; kept the last occurrence"
+        )
+    return deduped, dropped
+
 
 def upload_dataframe(
         df: pl.DataFrame,
         transformer: BaseTransformer,
         db_manager: DBManager,
         db_alias: str,
-) -> int:
+        chunk_size: int | None = None,
+        transaction: TransactionMode | None = None,
+        on_progress: ProgressCallback | None = None,
+        pre_transformed: bool = False,
+) -> UploadResult:
     """
     Transforms and uploads a DataFrame to the database.
+    The bulk-load backend is selected from the engine dialect and rows are sent
+    in chunks of `chunk_size` (default `UPLOAD_CHUNK_SIZE`).
+    Conflicts are resolved according to `transformer.write_mode`.
+    With `pre_transformed=True`, `df` is assumed to be the output of `transformer.transform`.
     """
-    transformed = transformer.transform(df)
+    _check_write_mode(transformer)
+    transformed = df if pre_transformed else transformer.transform(df)
+    transformed, duplicate_keys = _drop_duplicate_keys(transformed, transformer)
     engine = db_manager.get_engine(db_alias)
 
     if transformed.is_empty():
-        return 0
-    
-    rows = transformed.to_dicts()
-    colunms = transformed.columns
-    column_list = ", ".join(colunms)
-    placeholders = ", ".join([f":{col}" for col in colunms])
-
-    sql = text(f"""
-        INSERT IGNORE INTO {transformer.destination_table}
-        ({column_list})
-        VALUES ({placeholders})
-    """)
+        return UploadResult(rows=0)
+
+    loader = get_bulk_loader(engine.dialect.name, settings.BULK_INSERT_BATCH_SIZE)
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    transaction = transaction or settings.UPLOAD_TRANSACTION_MODE
+    start = time.perf_counter()
 
     try:
-        with engine.begin() as conn:
-            result = conn.execute(sql, rows)
+        if transformer.write_mode == "replace_partition":
+            result = _replace_partitions(
+                engine, loader, transformer, transformed,
+                chunk_size=chunk_size,
+                on_progress=on_progress,
+            )
+        elif transformer.incremental and transformer.key_columns:
+            result = _upload_delta(
+                engine, loader, transformer, transformed,
+                chunk_size=chunk_size,
+                transaction=transaction,
+                on_progress=on_progress,
+            )
+        else:
+            rows, chunks = _load_in_chunks(
+                engine,
+                loader,
+                transformer.destination_table,
+                transformed,
+                on_conflict=_on_conflict(transformer),
+                chunk_size=chunk_size,
+                transaction=transaction,
+                on_progress=on_progress,
+                key_columns=transformer.key_columns,
+            )
+            result = _load_result(transformer, transformed.height, rows, chunks)
     except Exception as e:
         raise DatabaseInsertError({
             "table": transformer.destination_table,
-            "rows_attempted": len(rows),
+            "rows_attempted": transformed.height,
             "error": str(e)
         }) from e
-        
-    return result.rowcount
+
+    result.duplicate_keys = duplicate_keys
+    result.elapsed_seconds = time.perf_counter() - start
+    return result
+
+def _upload_delta(
+    engine: Engine,
+    loader: BulkLoader,
+    transformer: BaseTransformer,
+    df: pl.DataFrame,
+    chunk_size: int,
+    transaction: TransactionMode,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    """
+    Carga incremental: compara un hash de filas por partición con la tabla destino, lee las
+    filas existentes solo de las particiones que difieren, inserta las filas nuevas y
+    actualiza las que cambiaron.
+    """
+    table = transformer.destination_table
+    key_columns = transformer.key_columns
+
+    with engine.connect() as conn:
+        existing = fetch_existing(conn, table, df, key_columns, transformer.partition_column)
+
+    delta = compute_delta(df, existing, key_columns, transformer.partition_column)
+    logger.info(
+        f"[Uploader] {table} delta: {delta.new.height} new, "
+        f"{delta.changed.height} changed, {delta.skipped} unchanged"
+    )
+
+    if transformer.write_mode == "upsert":
+        # Nuevas y modificadas viajan juntas en sentencias multi-fila con upsert
+        pending = pl.concat([delta.new, delta.changed])
+        _, chunks = _load_in_chunks(
+            engine,
+            loader,
+            table,
+            pending,
+            on_conflict="upsert",
+            chunk_size=chunk_size,
+            transaction=transaction,
+            on_progress=on_progress,
+            key_columns=key_columns,
+        )
+        return UploadResult(
+            rows=pending.height,
+            chunks=chunks,
+            inserted=delta.new.height,
+            updated=delta.changed.height,
+            skipped=delta.skipped,
+        )
+
+    updated = 0
+
+    def apply_updates(conn):
+        nonlocal updated
+        updated = update_rows(conn, loader, table, delta.changed, key_columns)
+
+    if delta.new.is_empty():
+        with engine.begin() as conn:
+            apply_updates(conn)
+        inserted, chunks = 0, 0
+    else:
+        inserted, chunks = _load_in_chunks(
+            engine,
+            loader,
+            table,
+            delta.new,
+            on_conflict="ignore",
+            chunk_size=chunk_size,
+            transaction=transaction,
+            on_progress=on_progress,
+            before_load=apply_updates,
+        )
+
+    return UploadResult(
+        rows=inserted + updated,
+        chunks=chunks,
+        inserted=inserted,
+        updated=updated,
+        skipped=delta.skipped + (delta.new.height - inserted) + (delta.changed.height - updated),
+    )
+
+def _replace_partitions(
+    engine: Engine,
+    loader: BulkLoader,
+    transformer: BaseTransformer,
+    df: pl.DataFrame | Iterable[pl.DataFrame],
+    chunk_size: int,
+    on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    """
+    Reemplaza en la tabla destino cada partición (`partition_column`) presente en `df`:
+    la borra en lotes acotados y reinserta sus filas, todo en una única transacción.
+    Con un iterable de lotes (carga streaming) cada partición se borra la primera vez
+    que aparece, aunque sus filas lleguen repartidas en varios lotes.
+    Devuelve en `partitions` los tiempos de borrado e inserción de cada partición.
+    """
+    table = transformer.destination_table
+    column = transformer.partition_column
+    delete_batch = settings.REPLACE_PARTITION_DELETE_BATCH
+    frames = [df] if isinstance(df, pl.DataFrame) else df
+    total = df.height if isinstance(df, pl.DataFrame) else 0
+    rows = 0
+    sent = 0
+    chunks = 0
+    partitions: dict = {}
+
+    with engine.begin() as conn:
+        for frame in frames:
+            for part in frame.partition_by(column, maintain_order=True):
+                value = part.get_column(column)[0]
+
+                entry = partitions.get(value)
+                if entry is None:
+                    start = time.perf_counter()
+                    deleted = loader.delete_partition(conn, table, column, value, delete_batch)
+                    entry = partitions[value] = {
+                        "partition": value,
+                        "deleted": deleted,
+                        "inserted": 0,
+                        "delete_seconds": time.perf_counter() - start,
+                        "insert_seconds": 0.0,
+                    }
+
+                start = time.perf_counter()
+                for chunk in part.iter_slices(chunk_size):
+                    inserted = loader.load(conn, table, chunk, on_conflict="error")
+                    entry["inserted"] += inserted
+                    rows += inserted
+                    sent += chunk.height
+                    chunks += 1
+                    if on_progress:
+                        on_progress(chunks, sent, total)
+                entry["insert_seconds"] += time.perf_counter() - start
+
+    for entry in partitions.values():
+        entry["delete_seconds"] = round(entry["delete_seconds"], 4)
+        entry["insert_seconds"] = round(entry["insert_seconds"], 4)
+        logger.debug(
+            f"[Uploader] {table}: {column}={entry['partition']} replaced "
+            f"({entry['deleted']} deleted in {entry['delete_seconds']:.3f}s, "
+            f"{entry['inserted']} inserted in {entry['insert_seconds']:.3f}s)"
+        )
+
+    logger.info(f"[Uploader] {table}: replaced {len(partitions)} partition(s) ({rows} rows inserted)")
+
+    return UploadResult(rows=rows, chunks=chunks, inserted=rows, partitions=list(partitions.values()))
+
+def _swap_reload(
+    engine: Engine,
+    loader: BulkLoader,
+    transformer: BaseTransformer,
+    df: pl.DataFrame,
+    chunk_size: int,
+    transaction: TransactionMode,
+    on_progress: ProgressCallback | None = None,
+) -> tuple[int, int]:
+    """
+    Carga `df` en `<tabla>__staging_<id>` (un nombre por carga, para que dos recargas
+    simultáneas no compartan la staging) y la publica con un rename atómico.
+    La tabla viva no se bloquea durante la carga; la anterior queda como `<tabla>__old`
+    si `keep_previous_table` está activo, de lo contrario se elimina.
+    En dialectos con `swap_in_place` (PostgreSQL) no hay rename: la copia de respaldo,
+    el DELETE y la carga van en una sola transacción sobre la tabla viva.
+    """
+    table = transformer.destination_table
+    backup = f"{table}__old"
+
+    if loader.swap_in_place:
+        def replace(conn) -> None:
+            if transformer.keep_previous_table:
+                loader.copy_table(conn, table, backup)
+            conn.exec_driver_sql(f"DELETE FROM {table}")
+
+        rows, chunks = _load_in_chunks(
+            engine, loader, table, df,
+            on_conflict="error",
+            chunk_size=chunk_size,
+            transaction="load",
+            on_progress=on_progress,
+            before_load=replace,
+        )
+        logger.info(f"[Uploader] {table} reloaded in a single transaction ({rows} rows)")
+        return rows, chunks
+
+    staging = f"{table}__staging_{uuid.uuid4().hex[:8]}"
+
+    with engine.begin() as conn:
+        loader.create_staging_table(conn, table, staging)
+
+    try:
+        rows, chunks = _load_in_chunks(
+            engine, loader, staging, df,
+            on_conflict="error",
+            chunk_size=chunk_size,
+            transaction=transaction,
+            on_progress=on_progress,
+        )
+        with engine.begin() as conn:
+            loader.swap_tables(conn, table, staging, backup)
+    except Exception:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {staging}")
+        raise
+
+    if not transformer.keep_previous_table:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {backup}")
+
+    logger.info(f"[Uploader] {table} reloaded via staging swap ({rows} rows)")
+    return rows, chunks
+
 
 def full_reload_dataframe(
     df: pl.DataFrame,
     transformer: BaseTransformer,
     db_manager: DBManager,
-    db_alias: str
-) -> int:
-
+    db_alias: str,
+    chunk_size: int | None = None,
+    transaction: TransactionMode | None = None,
+    on_progress: ProgressCallback | None = None,
+    pre_transformed: bool = False,
+) -> UploadResult:
+    """
+    Replaces the whole destination table with the transformed DataFrame.
+    Uses the transformer's `reload_strategy`: "delete" runs DELETE + INSERT on the live
+    table, always in a single transaction (a `transaction="chunk"` request is ignored so
+    a failed load never commits the DELETE), "swap" loads a staging table and renames it
+    into place.
+    """
     engine = db_manager.get_engine(db_alias)
 
-    transformed = transformer.transform(df)
+    transformed = df if pre_transformed else transformer.transform(df)
 
     if transformed.is_empty():
-        return 0
+        return UploadResult(rows=0)
+
+    loader = get_bulk_loader(engine.dialect.name, settings.BULK_INSERT_BATCH_SIZE)
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    transaction = transaction or settings.UPLOAD_TRANSACTION_MODE
+    start = time.perf_counter()
+
+    try:
+        if transformer.reload_strategy == "swap":
+            rows, chunks = _swap_reload(
+                engine, loader, transformer, transformed,
+                chunk_size=chunk_size,
+                transaction=transaction,
+                on_progress=on_progress,
+            )
+        else:
+            if transaction == "chunk":
+                logger.info(f"[Uploader] {transformer.destination_table}: full reload runs in one transaction, ignoring transaction='chunk'")
+            delete_sql = text(f"DELETE FROM {transformer.destination_table}")
+            rows, chunks = _load_in_chunks(
+                engine,
+                loader,
+                transformer.destination_table,
+                transformed,
+                on_conflict="error",
+                chunk_size=chunk_size,
+                # El DELETE es destructivo: no se confirma sin todas las filas nuevas
+                transaction="load",
+                on_progress=on_progress,
+                before_load=lambda conn: conn.execute(delete_sql),
+            )
+    except Exception as e:
+        raise DatabaseInsertError({
+            "table": transformer.destination_table,
+            "rows_attempted": transformed.height,
+            "error": str(e)
+        }) from e
+
+    return UploadResult(rows=rows, elapsed_seconds=time.perf_counter() - start, chunks=chunks, inserted=rows)
+
 
-    rows = transformed.to_dicts()
-    columns = transformed.columns
-    column_list = ", ".join(columns)
-    placeholders = ", ".join([f":{col}" for col in columns])
 
-    delete_sql = text(f"DELETE FROM {transformer.destination_table}")
+def can_stream(transformer: BaseTransformer) -> bool:
+    # El delta incremental necesita el frame completo para leer las particiones existentes
+    return transformer.lazy and not (transformer.incremental and transformer.key_columns)
 
-    insert_sql = text(f"""
-        INSERT INTO {transformer.destination_table}
-        ({column_list})
-        VALUES ({placeholders})
-    """)
+def _check_streamable(transformer: BaseTransformer) -> None:
+    if not can_stream(transformer):
+        raise ConfigurationError(
+            f"{type(transformer).__name__}: streaming uploads require lazy = True and a non-incremental write_mode",
+            {"transformer": type(transformer).__name__, "write_mode": transformer.write_mode},
+        )
 
+def _stream_batches(plan: pl.LazyFrame, chunk_size: int) -> Iterator[pl.DataFrame]:
+    """Lotes de `plan` ejecutado en el motor streaming de Polars."""
     try:
-        with engine.begin() as conn:
-            conn.execute(delete_sql)
-            result = conn.execute(insert_sql, rows)
+        for batch in plan.collect_batches(chunk_size=chunk_size, maintain_order=False, engine="streaming"):
+            if not batch.is_empty():
+                yield batch
+    except pl.exceptions.PolarsError as e:
+        raise TransformationError(
+            message="Unexpected error during streaming transformation.",
+            details={"original_error": str(e)},
+        ) from e
+
+def upload_lazyframe(
+        lf: pl.LazyFrame,
+        transformer: BaseTransformer,
+        db_manager: DBManager,
+        db_alias: str,
+        chunk_size: int | None = None,
+        transaction: TransactionMode | None = None,
+        on_progress: ProgressCallback | None = None,
+) -> UploadResult:
+    """
+    Streaming variant of `upload_dataframe` for a source LazyFrame (e.g. `pl.scan_csv`).
+    The transformer's lazy plan runs on Polars' streaming engine and each output batch
+    of `chunk_size` rows is sent as soon as it is produced, so memory is bounded by the
+    batch size (plus group_by state), not by the file size.
+    Supports the "ignore", "upsert" and "replace_partition" write modes.
+    """
+    _check_write_mode(transformer)
+    _check_streamable(transformer)
+
+    plan = transformer.build_plan(lf)
+    engine = db_manager.get_engine(db_alias)
+    loader = get_bulk_loader(engine.dialect.name, settings.BULK_INSERT_BATCH_SIZE)
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    transaction = transaction or settings.UPLOAD_TRANSACTION_MODE
+    received = 0
+    duplicate_keys = 0
+
+    def batches() -> Iterator[pl.DataFrame]:
+        # Solo se cuentan las claves repetidas dentro de un lote; entre lotes el upsert
+        # del lote posterior sobrescribe al anterior
+        nonlocal received, duplicate_keys
+        for batch in _stream_batches(plan, chunk_size):
+            received += batch.height
+            batch, dropped = _drop_duplicate_keys(batch, transformer)
+            duplicate_keys += dropped
+            yield batch
+
+    start = time.perf_counter()
+
+    try:
+        if transformer.write_mode == "replace_partition":
+            result = _replace_partitions(
+                engine, loader, transformer, batches(),
+                chunk_size=chunk_size,
+                on_progress=on_progress,
+            )
+        else:
+            rows, chunks = _load_in_chunks(
+                engine,
+                loader,
+                transformer.destination_table,
+                batches(),
+                on_conflict=_on_conflict(transformer),
+                chunk_size=chunk_size,
+                transaction=transaction,
+                on_progress=on_progress,
+                key_columns=transformer.key_columns,
+            )
+            result = _load_result(transformer, received - duplicate_keys, rows, chunks)
+            result.duplicate_keys = duplicate_keys
+    except AppException:
+        raise
     except Exception as e:
         raise DatabaseInsertError({
             "table": transformer.destination_table,
-            "rows_attempted": len(rows),
+            "rows_attempted": received,
+            "error": str(e)
+        }) from e
+
+    result.elapsed_seconds = time.perf_counter() - start
+    logger.info(f"[Uploader] {transformer.destination_table}: streamed {received} rows in {result.chunks} chunk(s)")
+    return result
+
+async def upload_dataframe_async(
+        df: pl.DataFrame,
+        transformer: BaseTransformer,
+        db_manager: DBManager,
+        db_alias: str,
+        chunk_size: int | None = None,
+        transaction: TransactionMode | None = None,
+        on_progress: ProgressCallback | None = None,
+        pre_transformed: bool = False,
+) -> UploadResult:
+    """
+    Async variant of `upload_dataframe` over `db_manager.get_async_engine`.
+    While a chunk is being executed on the async connection, the SQL/params of the
+    next chunk are prepared in a worker thread.
+    """
+    _check_write_mode(transformer)
+
+    if transformer.write_mode == "replace_partition" or (transformer.incremental and transformer.key_columns):
+        # Estas estrategias leen/borran antes de insertar: siguen en el engine sync
+        return await executor.run_io(
+            upload_dataframe, df, transformer, db_manager, db_alias,
+            chunk_size=chunk_size,
+            transaction=transaction,
+            on_progress=on_progress,
+            pre_transformed=pre_transformed,
+        )
+
+    transformed = df if pre_transformed else await executor.run_cpu(transformer.transform, df)
+    transformed, duplicate_keys = _drop_duplicate_keys(transformed, transformer)
+
+    if transformed.is_empty():
+        return UploadResult(rows=0)
+
+    engine = db_manager.get_async_engine(db_alias)
+    loader = get_bulk_loader(engine.dialect.name, settings.BULK_INSERT_BATCH_SIZE)
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    transaction = transaction or settings.UPLOAD_TRANSACTION_MODE
+    table = transformer.destination_table
+    on_conflict = _on_conflict(transformer)
+    paramstyle = engine.dialect.paramstyle
+    slices = transformed.iter_slices(chunk_size)
+
+    def prepare_next() -> tuple[pl.DataFrame | None, list]:
+        chunk = next(slices, None)
+        if chunk is None:
+            return None, []
+        return chunk, list(
+            loader.iter_statements(paramstyle, table, chunk, on_conflict, transformer.key_columns)
+        )
+
+    total = transformed.height
+    rows = 0
+    sent = 0
+    chunks = 0
+    start = time.perf_counter()
+    pending = asyncio.ensure_future(asyncio.to_thread(prepare_next))
+
+    try:
+        async with engine.begin() if transaction == "load" else nullcontext() as shared:
+            while True:
+                chunk, statements = await pending
+                if chunk is None:
+                    break
+
+                pending = asyncio.ensure_future(asyncio.to_thread(prepare_next))
+
+                if shared is not None:
+                    rows += await shared.run_sync(loader.execute, statements)
+                else:
+                    async with engine.begin() as conn:
+                        rows += await conn.run_sync(loader.execute, statements)
+
+                sent += chunk.height
+                chunks += 1
+                logger.debug(f"[Uploader] {table}: async chunk {chunks} ({sent}/{total} rows)")
+                if on_progress:
+                    on_progress(chunks, sent, total)
+    except Exception as e:
+        pending.cancel()
+        raise DatabaseInsertError({
+            "table": table,
+            "rows_attempted": total,
             "error": str(e)
         }) from e
 
-    return result.rowcount
\ No newline at end of file
+    result = _load_result(transformer, total, rows, chunks)
+    result.elapsed_seconds = time.perf_counter() - start
+    result.duplicate_keys = duplicate_keys
+    return result
+
+
+async def transform_frame(transformer: BaseTransformer, df: pl.DataFrame) -> tuple[pl.DataFrame, list[dict]]:
+    """
+    Runs `transformer.transform` on the CPU pool and records the per-step metrics
+    (and the `transform` stage when a profile is active).
+    """
+    name = type(transformer).__name__
+    profile = current_profile.get()
+
+    if profile is None:
+        transformed, steps = await executor.run_cpu(transformer.transform_with_timings, df)
+    else:
+        (transformed, steps), measured = await executor.run_cpu(
+            call_measured, transformer.transform_with_timings, df
+        )
+        profile.add(
+            "transform",
+            measured,
+            transformer=name,
+            rows_in=df.height,
+            rows_out=transformed.height,
+            steps=[
+                {**step, "wall_seconds": round(step["wall_seconds"], 4), "cpu_seconds": round(step["cpu_seconds"], 4)}
+                for step in steps
+            ],
+        )
+
+    route = route_label.get()
+    for step in steps:
+        UPLOAD_TRANSFORM_SECONDS.observe(step["wall_seconds"], route=route, transformer=name, step=step["step"])
+
+    return transformed, steps
+
+def observe_upload(transformer: BaseTransformer, result: UploadResult, seconds: float) -> None:
+    """Records insert latency, rows and rows/sec for an upload finished in `seconds`."""
+    labels = {
+        "route": route_label.get(),
+        "transformer": type(transformer).__name__,
+        "table": transformer.destination_table,
+    }
+    UPLOAD_INSERT_SECONDS.observe(seconds, **labels)
+    UPLOAD_ROWS.inc(result.rows, **labels)
+    if seconds > 0:
+        UPLOAD_ROWS_PER_SECOND.set(result.rows / seconds, **labels)
+
+async def run_upload(
+    df: pl.DataFrame,
+    transformer: BaseTransformer,
+    db_manager: DBManager,
+    db_alias: str,
+    upload: Callable[..., UploadResult] = upload_dataframe,
+    **kwargs,
+) -> UploadResult:
+    """
+    Runs `transformer.transform` on the CPU pool and `upload` (upload_dataframe or
+    full_reload_dataframe) on the DB I/O pool, so the event loop is never blocked.
+    With `UPLOAD_ASYNC_ENGINE`, upload_dataframe goes through the async engine instead.
+    """
+    transformed, _ = await transform_frame(transformer, df)
+    start = time.perf_counter()
+    stage_fields = {
+        "transformer": type(transformer).__name__,
+        "table": transformer.destination_table,
+        "rows_in": transformed.height,
+    }
+
+    if settings.UPLOAD_ASYNC_ENGINE and upload is upload_dataframe:
+        result = await upload_dataframe_async(
+            transformed, transformer, db_manager, db_alias, pre_transformed=True, **kwargs
+        )
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add(
+                "upload",
+                {"wall_seconds": round(time.perf_counter() - start, 4)},
+                rows_out=result.rows,
+                **stage_fields,
+            )
+    else:
+        result = await run_io_profiled(
+            "upload",
+            upload, transformed, transformer, db_manager, db_alias,
+            rows_out=lambda r: r.rows,
+            fields=stage_fields,
+            pre_transformed=True,
+            **kwargs,
+        )
+
+    observe_upload(transformer, result, time.perf_counter() - start)
+    return result
+
+async def run_stream_upload(
+    lf: pl.LazyFrame,
+    transformer: BaseTransformer,
+    db_manager: DBManager,
+    db_alias: str,
+    **kwargs,
+) -> UploadResult:
+    """
+    Runs `upload_lazyframe` on the DB I/O pool: transform and insert overlap batch by
+    batch, so they are recorded as a single `stream` stage.
+    """
+    start = time.perf_counter()
+    result = await run_io_profiled(
+        "stream",
+        upload_lazyframe, lf, transformer, db_manager, db_alias,
+        rows_out=lambda r: r.rows,
+        fields={"transformer": type(transformer).__name__, "table": transformer.destination_table},
+        **kwargs,
+    )
+    observe_upload(transformer, result, time.perf_counter() - start)
+    return result
@@ -0,0 +1,50 @@
+"""
+Worker de trabajos de carga fuera del proceso de la API.
+
+    python -m app.worker
+
+Usa el mismo almacén SQLite (JOBS_DB_PATH) que la API; en ese caso conviene
+arrancar la API con JOBS_INPROCESS_WORKERS=false.
+"""
+import asyncio
+import logging
+import signal
+
+from app.core.logger import configure_logging
+from app.core.database import db_manager
+from app.core.executor import executor
+from app.core.settings import settings
+from app.modules.jobs.service import JobWorker, job_store
+
+# Registran los handlers de cada tipo de trabajo
+import app.modules.erc.service  # noqa: F401
+import app.modules.ep.service  # noqa: F401
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    worker = JobWorker(job_store, name="worker", concurrency=settings.JOBS_CONCURRENCY)
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await db_manager.warm_up_all()
+    executor.start()
+    worker.start(db_manager)
+    logger.info("Job worker ready.")
+
+    await stop.wait()
+
+    logger.info("Stopping job worker...")
+    await worker.stop()
+    executor.shutdown()
+    await db_manager.dispose_all_async()
+    logger.info("Shutdown complete.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""
+Generadores de archivos sintéticos con la forma de los archivos reales:
+
+- ERC largos (una fila por mes/año): Servicios, Turismo.
+- ERC anchos (años como columnas): Bienes, Inversión.
+- Libro de Ejecución Presupuestal con sus seis hojas.
+
+Los datos son deterministas (dependen solo de `size` y `seed`) y se generan con
+expresiones de Polars, de modo que 10M de filas no pasan por bucles de Python.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+import polars as pl
+
+# Límite de filas de una hoja de Excel
+EXCEL_MAX_ROWS = 1_048_576
+
+EP_SKIP_ROWS = 3
+
+BIENES_YEARS = [str(year) for year in range(2010, 2024)] + ["2024-P"]
+INVERSION_YEARS = [str(year) for year in range(1994, 2023)] + ["2023pre", "2024pro"]
+
+EP_SHEETS = ["INM", "MINCIT", "JCC", "Supersociedades", "Superindustria", "EjecucionDesagregada-MINC"]
+
+EP_COLUMNS = [
+    "UEJ", "Nombre UEJ", "Rubro", "Tipo", "Cta", "Sub Cta", "Obj", "Ord", "Sor Ord", "Item",
+    "Sub Item", "Fuente", "Rec", "Sit", "Descripción", "Apr. Inicial", "Apr. Adicionada",
+    "Apr. Reducida", "Apr. Vigente", "Apr Bloqueada", "CDP", "Apr. Disponible", "Compromiso",
+    "Orden Pago", "Pagos", "Fecha",
+]
+
+
+@dataclass
+class Dataset:
+    """Archivo generado y número de filas de datos que contiene."""
+    name: str
+    path: Path
+    rows: int
+
+
+def _pick(index: pl.Expr, n: int, seed: int, prime: int) -> pl.Expr:
+    """Valor pseudoaleatorio determinista en [0, n) a partir del índice de fila."""
+    return ((index * prime + seed * 7919) % n).cast(pl.Int64)
+
+
+def _radix(index: pl.Expr, sizes: list[int]) -> list[pl.Expr]:
+    """Descompone el índice en dígitos de base mixta: combinaciones únicas por fila."""
+    digits = []
+    for size in sizes:
+        digits.append((index % size).cast(pl.Int64))
+        index = index // size
+    return digits
+
+
+def servicios_frame(size: int, seed: int = 0) -> pl.DataFrame:
+    i = pl.int_range(0, size, dtype=pl.Int64)
+    flujo, mes, cabps, pais, depto = _radix(i, [2, 180, 60, 220, 33])
+    return pl.select(
+        COD_PAIS=pais + 1,
+        PAIS_SERV=pl.format("Pais {}", pais + 1),
+        PAIS_ALADI=pl.format("Aladi {}", _pick(i, 12, seed, 31)),
+        FLUJO_COMERCIAL=pl.when(flujo == 0).then(pl.lit("Exportaciones")).otherwise(pl.lit("Importaciones")),
+        PERIODO_MES=(2010 + mes // 12) * 100 + mes % 12 + 1,
+        CODIGO_CABPS=cabps + 1,
+        DESCRIPCION_CABPS=pl.format("Servicio {}", cabps + 1),
+        COD_DEPTO=depto + 1,
+        NOMBRE_DEPARTAMENTO=pl.format("Departamento {}", depto + 1),
+        USD_MILLONES=_pick(i, 100_000, seed, 104729) / 100.0,
+    )
+
+
+def turismo_frame(size: int, seed: int = 0) -> pl.DataFrame:
+    i = pl.int_range(0, size, dtype=pl.Int64)
+    flujo, mes, anio, pais = _radix(i, [2, 12, 30, 250])
+    return pl.select(
+        **{
+            "AÑO": 1995 + anio,
+            "MES": mes + 1,
+            "COD_PAIS": pais + 1,
+            "PAIS_TURISMO": pl.format("Pais {}", pais + 1),
+            "VIAJEROS": _pick(i, 50_000, seed, 7727),
+            "FLUJO_TURISMO": pl.when(flujo == 0).then(pl.lit("Entrada")).otherwise(pl.lit("Salida")),
+        }
+    )
+
+
+def bienes_frame(size: int, seed: int = 0) -> pl.DataFrame:
+    """`size` es el número de filas tras el unpivot (filas del archivo × años)."""
+    rows = max(1, size // len(BIENES_YEARS))
+    i = pl.int_range(0, rows, dtype=pl.Int64)
+    flujo, depto, nandina, pais = _radix(i, [2, 33, 5000, 220])
+    return pl.select(
+        **{
+            "COD_PAIS": pais + 1,
+            "PAIS": pl.format("Pais {}", pais + 1),
+            "NANDINA": 100_000_000 + nandina,
+            "DESCRIPCION_RESUMIDA": pl.format("Producto {}", nandina),
+            "AMBITO": pl.format("Ambito {}", _pick(i, 5, seed, 13)),
+            "MINEROS/NO_MINEROS": pl.when(_pick(i, 4, seed, 17) == 0).then(pl.lit("Mineros")).otherwise(pl.lit("No mineros")),
+            "DEPARTAMENTO": pl.format("Departamento {}", depto + 1),
+            "FLUJO": pl.when(flujo == 0).then(pl.lit("Exportaciones")).otherwise(pl.lit("Importaciones")),
+            "PERIODO": pl.lit("Anual"),
+        },
+        **{year: (_pick(i, 1_000_000, seed + n, 15485863) / 100.0).cast(pl.Utf8) for n, year in enumerate(BIENES_YEARS)},
+    )
+
+
+def inversion_frame(size: int, seed: int = 0) -> pl.DataFrame:
+    """`size` es el número de filas tras el unpivot (filas del archivo × años)."""
+    rows = max(1, size // len(INVERSION_YEARS))
+    i = pl.int_range(0, rows, dtype=pl.Int64)
+    flujo, pais = _radix(i, [2, rows // 2 + 1])
+    return pl.select(
+        PAIS=pl.format("Pais {}", pais + 1),
+        PAIS_BANREP=pl.format("Banrep {}", pais + 1),
+        COD_PAIS=pais + 1,
+        PAIS_ALADI=pl.format("Aladi {}", _pick(i, 12, seed, 31)),
+        FLUJO=pl.when(flujo == 0).then(pl.lit("IED")).otherwise(pl.lit("IDCE")),
+        **{year: _pick(i, 1_000_000, seed + n, 15485863) / 10.0 for n, year in enumerate(INVERSION_YEARS)},
+    )
+
+
+def ep_sheet_frame(size: int, seed: int = 0) -> pl.DataFrame:
+    i = pl.int_range(0, size, dtype=pl.Int64)
+    amount = lambda prime: (_pick(i, 10_000_000, seed, prime) * 1000).cast(pl.Float64)
+    return pl.select(
+        **{
+            "UEJ": pl.format("35-01-{}", _pick(i, 20, seed, 3)),
+            "Nombre UEJ": pl.format("Unidad {}", _pick(i, 20, seed, 3)),
+            "Rubro": pl.format("A-{}-{}", _pick(i, 9, seed, 5), _pick(i, 99, seed, 7)),
+            "Tipo": pl.lit("A"),
+            "Cta": _pick(i, 9, seed, 11).cast(pl.Utf8),
+            "Sub Cta": _pick(i, 9, seed, 13).cast(pl.Utf8),
+            "Obj": _pick(i, 9, seed, 17).cast(pl.Utf8),
+            "Ord": _pick(i, 9, seed, 19).cast(pl.Utf8),
+            "Sor Ord": _pick(i, 9, seed, 23).cast(pl.Utf8),
+            "Item": _pick(i, 9, seed, 29).cast(pl.Utf8),
+            "Sub Item": _pick(i, 9, seed, 31).cast(pl.Utf8),
+            "Fuente": pl.lit("Nación"),
+            "Rec": pl.format("{}", 10 + _pick(i, 20, seed, 37)),
+            "Sit": pl.lit("CSF"),
+            "Descripción": pl.format("Concepto {}", _pick(i, 500, seed, 41)),
+            "Apr. Inicial": amount(43),
+            "Apr. Adicionada": amount(47),
+            "Apr. Reducida": amount(53),
+            "Apr. Vigente": amount(59),
+            "Apr Bloqueada": amount(61),
+            "CDP": amount(67),
+            "Apr. Disponible": amount(71),
+            "Compromiso": amount(73),
+            "Orden Pago": amount(79),
+            "Pagos": amount(83),
+            "Fecha": pl.format("2024-{}-28", (_pick(i, 12, seed, 89) + 1).cast(pl.Utf8).str.zfill(2)),
+        }
+    ).select(EP_COLUMNS)
+
+
+ERC_GENERATORS: dict[str, Callable[[int, int], pl.DataFrame]] = {
+    "servicios": servicios_frame,
+    "turismo": turismo_frame,
+    "bienes": bienes_frame,
+    "inversion": inversion_frame,
+}
+
+
+def write_erc_file(name: str, size: int, directory: Path, fmt: str = "csv", seed: int = 0) -> Dataset:
+    """Escribe (o reutiliza) el archivo ERC `name` con `size` filas resultantes."""
+    path = directory / f"{name}_{size}_{seed}.{fmt}"
+    df = ERC_GENERATORS[name](size, seed)
+
+    if fmt == "xlsx" and df.height + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{name}: {df.height} filas superan el límite de una hoja de Excel")
+
+    if not path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        if fmt == "csv":
+            df.write_csv(path)
+        else:
+            _write_xlsx(path, {"Hoja1": df})
+
+    return Dataset(name=name, path=path, rows=df.height)
+
+
+def write_ep_workbook(size: int, directory: Path, seed: int = 0) -> Dataset:
+    """Escribe (o reutiliza) el libro de EP con `size` filas repartidas entre sus seis hojas."""
+    per_sheet = max(1, size // len(EP_SHEETS))
+    if per_sheet + EP_SKIP_ROWS + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"ep: {per_sheet} filas por hoja superan el límite de una hoja de Excel")
+
+    path = directory / f"ep_{size}_{seed}.xlsx"
+    if not path.exists():
+        directory.mkdir(parents=True, exist_ok=True)
+        sheets = {sheet: ep_sheet_frame(per_sheet, seed + n) for n, sheet in enumerate(EP_SHEETS)}
+        _write_xlsx(path, sheets, preamble=EP_SKIP_ROWS)
+
+    return Dataset(name="ep", path=path, rows=per_sheet * len(EP_SHEETS))
+
+
+def _write_xlsx(path: Path, sheets: dict[str, pl.DataFrame], preamble: int = 0) -> None:
+    # openpyxl en modo write_only (está en requirements; xlsxwriter no)
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, df in sheets.items():
+        sheet = workbook.create_sheet(title=title)
+        for n in range(preamble):
+            sheet.append([f"Reporte sintético - línea {n + 1}"])
+        sheet.append(df.columns)
+        for row in df.iter_rows():
+            sheet.append(row)
+    workbook.save(path)
@@ -0,0 +1,361 @@
+"""
+Benchmarks de lectura, transformación y carga sobre datos sintéticos.
+
+    python -m benchmarks.run --sizes 10k,1m --targets all
+    python -m benchmarks.run --sizes 1m,10m --targets stream
+    python -m benchmarks.run --sizes 10k --compare benchmarks/results/<anterior>.json
+
+La carga usa SQLite como sustituto local de MySQL (un archivo por alias en `--workdir`).
+Los resultados se guardan en JSON (`benchmarks/results/<commit>-<fecha>.json`) para
+compararlos entre commits.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_WORKDIR = ROOT / "data" / "benchmarks"
+DEFAULT_RESULTS = Path(__file__).resolve().parent / "results"
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+TARGETS = ("load", "transform", "upload", "ep", "stream")
+# Transformadores con ruta streaming para CSV (ErcUpload.stream_csv)
+STREAM_DATASETS = ("servicios", "turismo")
+
+
+def configure_environment(workdir: Path) -> None:
+    """
+    Settings exige las variables de la aplicación: se completan las que falten y
+    los alias `erc` / `ejecucion_presupuestal` apuntan a archivos SQLite en `workdir`.
+    Debe llamarse antes de importar `app`.
+    """
+    workdir.mkdir(parents=True, exist_ok=True)
+    databases = {
+        "erc": f"sqlite:///{workdir / 'erc.sqlite3'}?timeout=60",
+        "ejecucion_presupuestal": f"sqlite:///{workdir / 'ep.sqlite3'}?timeout=60",
+    }
+    defaults = {
+        "APPLICATION_TITLE": "benchmarks",
+        "APPLICATION_SUMMARY": "benchmarks",
+        "APPLICATION_DESCRIPTION": "benchmarks",
+        "APPLICATION_VERSION": "0",
+        "PORT": "0",
+        "APP_ENV": "DEV",
+        "CORS_ORIGINS": "[]",
+        "ALLOWED_HOST": "[]",
+        "SECURITY_API_KEY_HEADER": "X-API-Key",
+        "SECURITY_API_KEY_HEADER_DESCRIPTION": "benchmarks",
+        "SECURITY_SCHEME_NAME": "benchmarks",
+        "SECURITY_DEFAULT_API_KEY": "benchmarks",
+        "UPLOAD_LEDGER_ENABLED": "false",
+        "DB_WARMUP_CONNECTIONS": "0",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    os.environ["DATABASES"] = json.dumps(databases)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+class Bench:
+    """
+    Acumula mediciones `(target, dataset, size)` con `repeat` repeticiones cada una.
+    Las corrutinas se ejecutan siempre en el mismo loop (`run`), como en la API.
+    """
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: list[dict] = []
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def close(self) -> None:
+        self.loop.close()
+
+    def record(self, target: str, dataset: str, size: int, runs: list[float], rows: int, **extra) -> None:
+        best = min(runs)
+        entry = {
+            "target": target,
+            "dataset": dataset,
+            "size": size,
+            "rows": rows,
+            "seconds_min": round(best, 4),
+            "seconds_median": round(statistics.median(runs), 4),
+            "rows_per_second": round(rows / best, 2) if best > 0 else None,
+            "runs": [round(run, 4) for run in runs],
+            **extra,
+        }
+        self.results.append(entry)
+        print(f"  {target:<28} {dataset:<10} {size:>10,} rows  {best:>9.3f}s  {entry['rows_per_second'] or 0:>14,.0f} rows/s")
+
+    def time(self, fn, *args, setup=None, **kwargs):
+        """Ejecuta `fn` `repeat` veces (llamando antes a `setup`) y devuelve (tiempos, último resultado)."""
+        runs, result = [], None
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            runs.append(time.perf_counter() - start)
+        return runs, result
+
+
+def create_table(engine, table: str, schema, key_columns: list[str]) -> None:
+    """(Re)crea `table` en SQLite a partir del esquema (`df.schema`) del DataFrame transformado."""
+    import polars as pl
+    from sqlalchemy import text
+
+    def sql_type(dtype) -> str:
+        if dtype.is_integer() or dtype == pl.Boolean:
+            return "INTEGER"
+        if dtype.is_float():
+            return "REAL"
+        return "TEXT"
+
+    columns = ", ".join(f"{name} {sql_type(dtype)}" for name, dtype in schema.items())
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TABLE {table} ({columns})"))
+        if key_columns:
+            conn.execute(text(f"CREATE UNIQUE INDEX ux_{table}_key ON {table} ({', '.join(key_columns)})"))
+
+
+def run_erc(bench: Bench, targets: set[str], sizes: list[int], workdir: Path, fmt: str) -> None:
+    from benchmarks.generators import ERC_GENERATORS, write_erc_file
+    from app.core.database import db_manager
+    from app.modules.erc.service import ALIAS, ERC_UPLOADS
+    from app.utils.loader_file import load_saved_file, read_file
+    from app.utils.uploader import upload_dataframe
+
+    engine = db_manager.get_engine(ALIAS)
+
+    for size in sizes:
+        for name in ERC_GENERATORS:
+            try:
+                dataset = write_erc_file(name, size, workdir / "files", fmt=fmt)
+            except ValueError as e:
+                print(f"  skip {name} {size:,}: {e}")
+                continue
+
+            schema_for = ERC_UPLOADS[name].transformer.read_schema
+            runs, df = bench.time(read_file, str(dataset.path), dataset.path.name, schema_for)
+            if "load" in targets:
+                bench.record("read_file", name, size, runs, df.height, bytes=dataset.path.stat().st_size)
+                runs, _ = bench.time(read_file, str(dataset.path), dataset.path.name)
+                bench.record("read_file:inferred", name, size, runs, df.height)
+                runs, _ = bench.time(lambda: bench.run(load_saved_file(str(dataset.path), dataset.path.name, schema_for)))
+                bench.record("load_saved_file", name, size, runs, df.height)
+
+            transformer = ERC_UPLOADS[name].transformer()
+            runs, transformed = bench.time(transformer.transform, df)
+            if "transform" in targets:
+                bench.record(f"transform:{type(transformer).__name__}", name, size, runs, df.height, rows_out=transformed.height)
+
+            if "upload" in targets:
+                reset = lambda: create_table(engine, transformer.destination_table, transformed.schema, transformer.key_columns)
+                runs, result = bench.time(
+                    upload_dataframe, transformed, transformer, db_manager, ALIAS,
+                    pre_transformed=True, setup=reset,
+                )
+                bench.record(f"upload:{transformer.write_mode}", name, size, runs, transformed.height, rows_written=result.rows)
+
+                # Segunda carga del mismo archivo sobre la tabla ya poblada (delta / upsert / reemplazo)
+                runs, result = bench.time(upload_dataframe, transformed, transformer, db_manager, ALIAS, pre_transformed=True)
+                bench.record(f"upload:{transformer.write_mode}:repeat", name, size, runs, transformed.height, rows_written=result.rows)
+
+                if name in STREAM_DATASETS:
+                    # Carga con `?replace_partitions=true` sobre la tabla ya poblada
+                    replacing = ERC_UPLOADS[name].transformer().replace_partitions()
+                    runs, result = bench.time(upload_dataframe, transformed, replacing, db_manager, ALIAS, pre_transformed=True)
+                    bench.record("upload:replace_partition:repeat", name, size, runs, transformed.height, rows_written=result.rows)
+
+
+def run_ep(bench: Bench, sizes: list[int], workdir: Path) -> None:
+    from benchmarks.generators import EP_SHEETS, write_ep_workbook
+    from app.core.database import db_manager
+    from app.modules.ep.service import ALIAS, DESTINATION_TABLE, SKIP_ROWS, upload_sheets
+    from app.modules.ep.transform import EjecucionPresupuestalTransformer
+    from app.utils.loader_file import load_saved_sheets, read_sheets
+    import polars as pl
+
+    engine = db_manager.get_engine(ALIAS)
+    sheets = set(EjecucionPresupuestalTransformer.sheets.keys())
+
+    for size in sizes:
+        try:
+            dataset = write_ep_workbook(size, workdir / "files")
+        except ValueError as e:
+            print(f"  skip ep {size:,}: {e}")
+            continue
+
+        path, filename = str(dataset.path), dataset.path.name
+        schema_for = EjecucionPresupuestalTransformer.read_schema
+        runs, loaded = bench.time(read_sheets, path, filename, sheets, SKIP_ROWS, schema_for)
+        bench.record("read_sheets", "ep", size, runs, dataset.rows, sheets=len(EP_SHEETS), bytes=dataset.path.stat().st_size)
+        runs, _ = bench.time(lambda: bench.run(load_saved_sheets(path, filename, sheets, SKIP_ROWS, schema_for)))
+        bench.record("load_saved_sheets", "ep", size, runs, dataset.rows)
+
+        transformed = [
+            EjecucionPresupuestalTransformer(sheet_name=sheet).transform(df)
+            for sheet, df in loaded.frames.items()
+        ]
+        combined = pl.concat(transformed, how="diagonal_relaxed")
+        reset = lambda: create_table(engine, DESTINATION_TABLE, combined.schema, [])
+
+        for single_insert in (False, True):
+            runs, results = bench.time(
+                lambda: bench.run(upload_sheets(loaded, db_manager, single_insert)), setup=reset
+            )
+            rows = sum(result.rows for result in results.values())
+            bench.record(f"upload_sheets:{'single' if single_insert else 'parallel'}", "ep", size, runs, rows)
+
+
+def _pipeline(mode: str, name: str, path: str) -> dict:
+    """
+    Lectura + transformación + carga completas de un CSV ERC, en un proceso propio
+    para que el pico de memoria (ru_maxrss) sea solo el de este modo.
+    """
+    import resource
+    from app.core.database import db_manager
+    from app.modules.erc.service import ALIAS, ERC_UPLOADS
+    from app.utils.loader_file import read_file, scan_csv_file
+    from app.utils.uploader import upload_dataframe, upload_lazyframe
+
+    # La ruta streaming solo se usa con el reemplazo opcional (`?replace_partitions=true`)
+    transformer = ERC_UPLOADS[name].transformer().replace_partitions()
+    schema_for = ERC_UPLOADS[name].transformer.read_schema
+    start = time.perf_counter()
+    if mode == "stream":
+        result = upload_lazyframe(scan_csv_file(path, schema_for), transformer, db_manager, ALIAS)
+    else:
+        df = read_file(path, Path(path).name, schema_for)
+        result = upload_dataframe(df, transformer, db_manager, ALIAS)
+    seconds = time.perf_counter() - start
+
+    return {
+        "seconds": seconds,
+        "rows": result.rows,
+        "peak_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+
+
+def run_stream(bench: Bench, sizes: list[int], workdir: Path) -> None:
+    """Compara la ruta eager (read_csv + transform + upload) con la streaming (scan_csv + lotes)."""
+    from concurrent.futures import ProcessPoolExecutor
+    from benchmarks.generators import write_erc_file
+    from app.core.database import db_manager
+    from app.modules.erc.service import ALIAS, ERC_UPLOADS
+    from app.utils.loader_file import scan_csv_file
+    import multiprocessing
+
+    engine = db_manager.get_engine(ALIAS)
+    context = multiprocessing.get_context("spawn")
+
+    for size in sizes:
+        for name in STREAM_DATASETS:
+            dataset = write_erc_file(name, size, workdir / "files", fmt="csv")
+            transformer = ERC_UPLOADS[name].transformer()
+            schema = transformer.build_plan(scan_csv_file(str(dataset.path), transformer.read_schema)).collect_schema()
+
+            for mode in ("eager", "stream"):
+                runs, measured = [], {}
+                for _ in range(bench.repeat):
+                    create_table(engine, transformer.destination_table, schema, transformer.key_columns)
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        measured = pool.submit(_pipeline, mode, name, str(dataset.path)).result()
+                    runs.append(measured["seconds"])
+                bench.record(
+                    f"pipeline:{mode}", name, size, runs, dataset.rows,
+                    rows_written=measured["rows"],
+                    peak_rss_bytes=measured["peak_rss_bytes"],
+                    bytes=dataset.path.stat().st_size,
+                )
+
+
+def compare(current: list[dict], baseline_path: Path) -> None:
+    """Imprime la relación de tiempos (actual / base) de las mediciones comunes."""
+    baseline = json.loads(baseline_path.read_text())
+    previous = {(r["target"], r["dataset"], r["size"]): r for r in baseline["results"]}
+
+    print(f"\nComparación con {baseline_path.name} ({baseline.get('commit')}):")
+    for result in current:
+        key = (result["target"], result["dataset"], result["size"])
+        if key not in previous or not previous[key]["seconds_min"]:
+            continue
+        ratio = result["seconds_min"] / previous[key]["seconds_min"]
+        flag = "  <-- más lento" if ratio > 1.10 else ""
+        print(f"  {key[0]:<28} {key[1]:<10} {key[2]:>10,}  x{ratio:.2f}{flag}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10k", help=f"Tamaños separados por coma ({', '.join(SIZES)})")
+    parser.add_argument("--targets", default="all", help=f"Grupos separados por coma ({', '.join(TARGETS)}) o 'all'")
+    parser.add_argument("--format", choices=("csv", "xlsx"), default="csv", help="Formato de los archivos ERC")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones de cada medición")
+    parser.add_argument("--workdir", type=Path, default=DEFAULT_WORKDIR, help="Archivos generados y bases SQLite")
+    parser.add_argument("--output", type=Path, default=None, help="Archivo JSON de resultados")
+    parser.add_argument("--compare", type=Path, default=None, help="JSON de una ejecución anterior")
+    args = parser.parse_args(argv)
+
+    sizes = [SIZES[size.strip().lower()] for size in args.sizes.split(",")]
+    targets = set(TARGETS) if args.targets == "all" else {t.strip() for t in args.targets.split(",")}
+
+    configure_environment(args.workdir)
+    sys.path.insert(0, str(ROOT))
+
+    import polars as pl
+    from app.core.executor import executor
+
+    bench = Bench(repeat=args.repeat)
+    commit = git_commit()
+    print(f"Benchmarks @ {commit} (polars {pl.__version__}), sizes={args.sizes}, targets={sorted(targets)}")
+
+    executor.start()
+    try:
+        if targets & {"load", "transform", "upload"}:
+            run_erc(bench, targets, sizes, args.workdir, args.format)
+        if "ep" in targets:
+            run_ep(bench, sizes, args.workdir)
+        if "stream" in targets:
+            run_stream(bench, sizes, args.workdir)
+    finally:
+        executor.shutdown()
+        bench.close()
+
+    output = args.output or DEFAULT_RESULTS / f"{commit}-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "polars": pl.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "results": bench.results,
+    }, indent=2, default=str))
+    print(f"\nResultados guardados en {output}")
+
+    if args.compare:
+        compare(bench.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from pathlib import Path
+import os
+import tempfile
+
+# Settings obligatorios para importar `app` sin un .env
+_SCRATCH = Path(tempfile.mkdtemp(prefix="etl-tests-"))
+_ENV = {
+    "APPLICATION_TITLE": "test",
+    "APPLICATION_SUMMARY": "test",
+    "APPLICATION_DESCRIPTION": "test",
+    "APPLICATION_VERSION": "0",
+    "PORT": "8000",
+    "APP_ENV": "DEV",
+    "CORS_ORIGINS": "[]",
+    "ALLOWED_HOST": "[]",
+    "SECURITY_API_KEY_HEADER": "X-API-Key",
+    "SECURITY_API_KEY_HEADER_DESCRIPTION": "test",
+    "SECURITY_SCHEME_NAME": "test",
+    "SECURITY_DEFAULT_API_KEY": "test",
+    "DATABASES": f'{{"test": "sqlite:///{_SCRATCH / "default.sqlite3"}"}}',
+    "DB_WARMUP_CONNECTIONS": "0",
+    "UPLOAD_LEDGER_PATH": str(_SCRATCH / "ledger.sqlite3"),
+    "JOBS_DB_PATH": str(_SCRATCH / "jobs.sqlite3"),
+    "JOBS_UPLOAD_DIR": str(_SCRATCH / "uploads"),
+}
+for _name, _value in _ENV.items():
+    os.environ.setdefault(_name, _value)
+
+import asyncio
+import pytest
+from sqlalchemy import text
+
+from app.core.database import DBManager
+from app.core.settings import DatabaseConfig, settings
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """`DBManager` sobre una base SQLite propia del test, con el alias `test`."""
+    monkeypatch.setitem(settings.DATABASES, "test", DatabaseConfig(uri=f"sqlite:///{tmp_path / 'test.sqlite3'}"))
+    manager = DBManager()
+
+    with manager.get_engine("test").begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE items (code TEXT PRIMARY KEY, periodo INTEGER NOT NULL, amount REAL)"
+        ))
+
+    yield manager
+
+    for engine in manager._engines.values():
+        engine.dispose()
+    for engine in manager._async_engines.values():
+        asyncio.run(engine.dispose())
@@ -0,0 +1,112 @@
+from sqlalchemy import text
+import polars as pl
+import pytest
+
+from app.utils.base_transformer import BaseTransformer
+from app.utils.delta import compute_delta, fetch_existing
+from app.utils.uploader import upload_dataframe
+
+KEYS = ["cod", "anio"]
+SCHEMA = {"cod": pl.String, "anio": pl.Int64, "nombre": pl.String, "valor": pl.Float64, "activo": pl.Boolean}
+
+
+class SalesTransformer(BaseTransformer):
+    key_columns = KEYS
+    partition_column = "anio"
+    incremental = True
+
+    def _transform(self, df):
+        return df
+
+
+def frame(*rows: tuple) -> pl.DataFrame:
+    return pl.DataFrame(rows, schema=SCHEMA, orient="row")
+
+
+BASE = frame(
+    ("a", 2023, "COLOMBIA", 300.0, True),
+    ("b", 2023, "PERU", 200.0, False),
+    ("c", 2024, "CHILE", 1e10, None),
+    ("d", 2024, None, -12.375, True),
+)
+
+
+@pytest.fixture
+def sales(db):
+    with db.get_engine("test").begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE sales (cod TEXT, anio INTEGER, nombre TEXT, valor REAL, activo BOOLEAN, "
+            "PRIMARY KEY (cod, anio))"
+        ))
+    upload_dataframe(BASE, SalesTransformer("sales"), db, "test", pre_transformed=True)
+    return db
+
+
+def existing(db, df: pl.DataFrame, partition_column: str | None = "anio"):
+    with db.get_engine("test").connect() as conn:
+        return fetch_existing(conn, "sales", df, KEYS, partition_column)
+
+
+def stored(db) -> list[tuple]:
+    with db.get_engine("test").connect() as conn:
+        return [tuple(r) for r in conn.execute(text("SELECT cod, nombre, valor FROM sales ORDER BY cod"))]
+
+
+@pytest.mark.parametrize("partition_column", ["anio", None], ids=["partitioned", "whole_table"])
+def test_identical_file_is_skipped_without_reading_rows(sales, partition_column):
+    found = existing(sales, BASE, partition_column)
+
+    assert found.rows.is_empty()
+    delta = compute_delta(BASE, found, KEYS, partition_column)
+    assert (delta.new.height, delta.changed.height, delta.skipped) == (0, 0, 4)
+
+
+@pytest.mark.parametrize(
+    "revised, changed",
+    [
+        (BASE.with_columns(valor=pl.when(pl.col("cod") == "c").then(1e10 + 5).otherwise("valor")), ["c"]),
+        # Se mueven 100 entre dos claves: las sumas por columna no cambian
+        (BASE.with_columns(valor=pl.when(pl.col("cod") == "a").then(200.0).when(pl.col("cod") == "b")
+                           .then(300.0).otherwise("valor")), ["a", "b"]),
+        # Misma longitud de texto
+        (BASE.with_columns(nombre=pl.when(pl.col("cod") == "a").then(pl.lit("COLOMBIE"))
+                           .otherwise("nombre")), ["a"]),
+        (BASE.with_columns(nombre=pl.when(pl.col("cod") == "d").then(pl.lit("")).otherwise("nombre")), ["d"]),
+    ],
+    ids=["large_float", "moved_value", "same_length_text", "null_to_empty"],
+)
+def test_revisions_are_detected(sales, revised, changed):
+    found = existing(sales, revised)
+
+    delta = compute_delta(revised, found, KEYS, "anio")
+
+    assert sorted(delta.changed.get_column("cod").to_list()) == changed
+    assert delta.new.is_empty()
+    assert delta.skipped == 4 - len(changed)
+
+
+def test_unchanged_partitions_are_not_read(sales):
+    revised = BASE.with_columns(valor=pl.when(pl.col("cod") == "c").then(1.0).otherwise("valor"))
+
+    found = existing(sales, revised)
+
+    assert found.unchanged.get_column("anio").to_list() == [2023]
+    assert sorted(found.rows.get_column("cod").to_list()) == ["c", "d"]
+
+
+def test_incremental_upload_updates_and_inserts(sales):
+    revised = pl.concat([
+        BASE.with_columns(nombre=pl.when(pl.col("cod") == "a").then(pl.lit("COLOMBIE")).otherwise("nombre")),
+        frame(("e", 2024, "ECUADOR", 5.0, False)),
+    ])
+
+    result = upload_dataframe(revised, SalesTransformer("sales"), sales, "test", pre_transformed=True)
+
+    assert (result.inserted, result.updated, result.skipped) == (1, 1, 3)
+    assert stored(sales) == [
+        ("a", "COLOMBIE", 300.0),
+        ("b", "PERU", 200.0),
+        ("c", "CHILE", 1e10),
+        ("d", None, -12.375),
+        ("e", "ECUADOR", 5.0),
+    ]
@@ -0,0 +1,32 @@
+import asyncio
+import polars as pl
+import pytest
+
+from app.core.exceptions import DatabaseInsertError, SheetUploadError
+from app.modules.ep import service
+from app.utils.loader_file import LoadedSheets
+from app.utils.uploader import UploadResult
+
+
+def test_failed_sheet_waits_for_the_others_and_reports_each(monkeypatch):
+    finished = []
+
+    async def fake_upload(df, transformer, db_manager, alias, **kwargs):
+        sheet = df.get_column("sheet")[0]
+        if sheet == "b":
+            raise DatabaseInsertError({"table": service.DESTINATION_TABLE})
+        await asyncio.sleep(0.05)
+        finished.append(sheet)
+        return UploadResult(rows=df.height)
+
+    monkeypatch.setattr(service, "run_upload", fake_upload)
+    sheets = LoadedSheets(frames={name: pl.DataFrame({"sheet": [name, name]}) for name in ("a", "b", "c")})
+
+    with pytest.raises(SheetUploadError) as raised:
+        asyncio.run(service.upload_sheets(sheets, db_manager=None, single_insert=False))
+
+    assert sorted(finished) == ["a", "c"]
+    assert raised.value.details["uploaded_sheets"] == {"a": 2, "c": 2}
+    assert raised.value.details["failed_sheets"]["b"]["error_code"] == "DB_002"
+    assert raised.value.status_code == 500
+    assert isinstance(raised.value.__cause__, DatabaseInsertError)
@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+import asyncio
+import pytest
+
+from app.app import app
+from app.core.settings import settings
+from app.utils.intake import upload_intake
+
+ROUTE = "/api/v1/erc/turismo"
+HEADERS = {"X-API-Key": "test"}
+BOUNDARY = "etl-test"
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(app.state, "db_manager", db, raising=False)
+    return TestClient(app)
+
+
+def multipart_chunks(filename: str, size: int):
+    """Cuerpo multipart entregado por partes: sin Content-Length, como un upload chunked."""
+    yield (
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode()
+    for _ in range(size // 512):
+        yield b"x" * 512
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def assert_error(response, status: int, error_code: str) -> None:
+    assert response.status_code == status
+    assert response.json()["error_code"] == error_code
+
+
+def test_content_length_over_limit_is_rejected_before_reading(client, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+
+    response = client.post(ROUTE, headers=HEADERS, files={"file": ("turismo.csv", b"x" * 4096)})
+
+    assert_error(response, 413, "FILE_005")
+    assert response.json()["details"]["received_bytes"] > 1024
+
+
+def test_chunked_body_over_route_limit_is_cut(client, monkeypatch):
+    monkeypatch.setitem(settings.UPLOAD_MAX_BYTES_BY_ROUTE, ROUTE, 1024)
+
+    response = client.post(
+        ROUTE,
+        headers={**HEADERS, "Content-Type": f"multipart/form-data; boundary={BOUNDARY}"},
+        content=multipart_chunks("turismo.csv", 8192),
+    )
+
+    assert "content-length" not in response.request.headers
+    assert_error(response, 413, "FILE_005")
+
+
+def test_saturated_intake_answers_503_with_retry_after(client, monkeypatch):
+    # Todos los cupos ocupados y sin espera (`UPLOAD_QUEUE_WAIT_SECONDS=0`)
+    monkeypatch.setattr(upload_intake, "_bind", lambda: asyncio.Semaphore(0))
+    monkeypatch.setattr(upload_intake, "_wait_seconds", 0)
+
+    response = client.post(ROUTE, headers=HEADERS, files={"file": ("turismo.csv", b"a,b\n1,2\n")})
+
+    assert_error(response, 503, "UPLOAD_001")
+    assert response.headers["retry-after"] == str(settings.UPLOAD_RETRY_AFTER_SECONDS)
+
+
+def test_bad_magic_bytes_are_rejected(client):
+    response = client.post(ROUTE, headers=HEADERS, files={"file": ("turismo.xlsx", b"not a workbook" * 10)})
+
+    assert_error(response, 415, "FILE_006")
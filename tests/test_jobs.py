@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError, OperationalError
+import asyncio
+import pytest
+
+from app.app import app
+from app.core.exceptions import DatabaseInsertError, TransformationError
+from app.modules.jobs.service import JOB_HANDLERS, JobWorker, StageRecorder, _is_transient, job_store
+from app.modules.jobs.store import JobStore
+
+
+def wrapped(cause: Exception) -> DatabaseInsertError:
+    try:
+        raise DatabaseInsertError({"table": "items"}) from cause
+    except DatabaseInsertError as e:
+        return e
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    [
+        (wrapped(OperationalError("INSERT", {}, Exception("server has gone away"))), True),
+        (OperationalError("SELECT 1", {}, Exception("connection refused")), True),
+        (wrapped(IntegrityError("INSERT", {}, Exception("NOT NULL constraint failed"))), False),
+        (DatabaseInsertError({"table": "items"}), False),
+        (TransformationError("bad file"), False),
+        (ValueError("bad value"), False),
+    ],
+    ids=["wrapped_operational", "operational", "wrapped_integrity", "insert_error", "transform", "value_error"],
+)
+def test_only_connectivity_errors_are_retried(error, transient):
+    assert _is_transient(error) is transient
+
+
+def test_recorder_sums_progress_of_all_sources():
+    reports = []
+    recorder = StageRecorder(report=lambda *progress: reports.append(progress))
+
+    recorder.progress("a")(1, 10, 30)
+    # Dentro del intervalo: se acumula sin publicar
+    recorder.progress("b")(2, 5, 20)
+    recorder.flush()
+
+    assert reports == [(1, 10, 30), (3, 15, 50)]
+
+
+def test_worker_stores_upload_progress(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    worker = JobWorker(store, name="test", concurrency=1)
+
+    async def handler(job, db_manager, recorder):
+        on_progress = recorder.progress()
+        on_progress(1, 100, 250)
+        on_progress(3, 250, 250)
+        return {"rows_uploaded": 250}
+
+    monkeypatch.setitem(JOB_HANDLERS, "test.progress", handler)
+    path = tmp_path / "items.csv"
+    path.write_text("code\n")
+    store.create("test.progress", "items.csv", str(path))
+
+    asyncio.run(worker.run_job(store.claim_next(worker.id, 60), db_manager=None))
+
+    [job] = store.list()
+    assert (job.state, job.chunks, job.rows_sent, job.rows_total) == ("succeeded", 3, 250, 250)
+
+
+def test_get_job_exposes_progress():
+    job = job_store.create("test.progress", "items.csv", "/nonexistent/items.csv")
+    job_store.claim_next("api-test", 60)
+    assert job_store.progress(job.id, "api-test", 2, 40, 100)
+    assert not job_store.progress(job.id, "other-worker", 5, 100, 100)
+
+    response = TestClient(app).get(f"/api/v1/jobs/{job.id}", headers={"X-API-Key": "test"})
+
+    assert response.status_code == 200
+    assert {k: response.json()[k] for k in ("state", "chunks", "rows_sent", "rows_total")} == {
+        "state": "running", "chunks": 2, "rows_sent": 40, "rows_total": 100,
+    }
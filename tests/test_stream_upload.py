@@ -0,0 +1,73 @@
+from sqlalchemy import text
+import polars as pl
+
+from app.utils.base_transformer import BaseTransformer
+from app.utils.loader_file import scan_csv_file
+from app.utils.uploader import upload_dataframe, upload_lazyframe
+
+
+class StreamItemsTransformer(BaseTransformer):
+    lazy = True
+    key_columns = ["code"]
+    partition_column = "periodo"
+    source_schema = {"periodo": pl.Int64, "amount": pl.Int64}
+
+    def _transform(self, df):
+        return df
+
+
+class ReplaceItemsTransformer(StreamItemsTransformer):
+    write_mode = "replace_partition"
+
+
+def write_csv(tmp_path, *lines: str) -> str:
+    path = tmp_path / "items.csv"
+    path.write_text("\n".join(["code,periodo,amount", *lines]) + "\n")
+    return str(path)
+
+
+def stored(db) -> list[tuple]:
+    with db.get_engine("test").connect() as conn:
+        return [tuple(r) for r in conn.execute(text("SELECT code, periodo, amount FROM items ORDER BY code"))]
+
+
+def seed(db) -> None:
+    df = pl.DataFrame(
+        [("a", 202401, 1.0), ("b", 202401, 2.0), ("c", 202402, 3.0)],
+        schema={"code": pl.String, "periodo": pl.Int64, "amount": pl.Float64},
+        orient="row",
+    )
+    upload_dataframe(df, StreamItemsTransformer("items"), db, "test", pre_transformed=True)
+
+
+def test_stream_ignore_keeps_existing_keys(db, tmp_path):
+    seed(db)
+    path = write_csv(tmp_path, "a,202401,9", "d,202402,4", "e,202403,5")
+    transformer = StreamItemsTransformer("items")
+
+    result = upload_lazyframe(scan_csv_file(path, transformer.read_schema), transformer, db, "test", chunk_size=1)
+
+    assert (result.inserted, result.skipped) == (2, 1)
+    assert stored(db) == [("a", 202401, 1.0), ("b", 202401, 2.0), ("c", 202402, 3.0), ("d", 202402, 4.0), ("e", 202403, 5.0)]
+
+
+def test_stream_replace_partition_only_touches_file_partitions(db, tmp_path):
+    seed(db)
+    path = write_csv(tmp_path, "a,202401,9", "d,202401,4")
+    transformer = ReplaceItemsTransformer("items")
+
+    result = upload_lazyframe(scan_csv_file(path, transformer.read_schema), transformer, db, "test", chunk_size=1)
+
+    assert [(p["partition"], p["deleted"], p["inserted"]) for p in result.partitions] == [(202401, 2, 2)]
+    assert stored(db) == [("a", 202401, 9.0), ("c", 202402, 3.0), ("d", 202401, 4.0)]
+
+
+def test_stream_falls_back_to_inference_when_file_breaks_contract(db, tmp_path):
+    # `amount` se declara entero pero el archivo trae decimales, como en la lectura eager
+    path = write_csv(tmp_path, "a,202401,1", "b,202401,3.5")
+    transformer = StreamItemsTransformer("items")
+
+    result = upload_lazyframe(scan_csv_file(path, transformer.read_schema), transformer, db, "test")
+
+    assert result.inserted == 2
+    assert stored(db) == [("a", 202401, 1.0), ("b", 202401, 3.5)]
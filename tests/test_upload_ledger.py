@@ -0,0 +1,67 @@
+from sqlalchemy import text
+import asyncio
+import pytest
+
+from app.core.settings import settings
+from app.utils import upload_ledger as ledger_module
+from app.utils.upload_ledger import UploadLedger, already_uploaded, record_upload
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = UploadLedger(str(tmp_path / "ledger.sqlite3"), ttl_seconds=3600, max_entries=100)
+    monkeypatch.setattr(ledger_module, "upload_ledger", ledger)
+    return ledger
+
+
+def insert(db, *codes: str) -> None:
+    with db.get_engine("test").begin() as conn:
+        for code in codes:
+            conn.execute(text("INSERT INTO items (code, periodo) VALUES (:code, 202401)"), {"code": code})
+
+
+def record(db, key: str) -> None:
+    asyncio.run(record_upload(key, key, "ItemsTransformer", db, "test", "items", 1))
+
+
+def hit(db, key: str) -> bool:
+    return asyncio.run(already_uploaded(key, db, "test", "items"))
+
+
+@pytest.fixture
+def verify_rows(monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_LEDGER_VERIFY_ROWS", True)
+
+
+def test_hit_does_not_query_the_table_by_default(db, ledger, monkeypatch):
+    insert(db, "a")
+    record(db, "file-a")
+    monkeypatch.setattr(ledger_module, "count_rows", lambda *args: pytest.fail("COUNT(*) without UPLOAD_LEDGER_VERIFY_ROWS"))
+
+    assert hit(db, "file-a")
+
+
+def test_hit_when_table_unchanged(db, ledger, verify_rows):
+    insert(db, "a")
+    record(db, "file-a")
+
+    assert hit(db, "file-a")
+    assert ledger.stats()["hits"] == 1
+
+
+def test_miss_when_table_changed_since_upload(db, ledger, verify_rows):
+    insert(db, "a")
+    record(db, "file-a")
+    insert(db, "b")
+
+    assert not hit(db, "file-a")
+    assert ledger.stats() == {"entries": 0, "hits": 0, "misses": 1}
+
+
+def test_later_upload_to_same_table_invalidates_earlier_ones(db, ledger):
+    insert(db, "a")
+    record(db, "file-a")
+    record(db, "file-b")
+
+    assert not hit(db, "file-a")
+    assert hit(db, "file-b")
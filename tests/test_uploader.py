@@ -0,0 +1,184 @@
+from sqlalchemy import text
+import asyncio
+import polars as pl
+import pytest
+
+from app.core.exceptions import DatabaseInsertError
+from app.utils.base_transformer import BaseTransformer
+from app.utils.bulk_loader import MySQLBulkLoader, SQLiteBulkLoader, get_bulk_loader
+from app.utils.uploader import full_reload_dataframe, upload_dataframe, upload_dataframe_async
+
+
+class ItemsTransformer(BaseTransformer):
+    key_columns = ["code"]
+
+    def _transform(self, df):
+        return df
+
+
+class UpsertItemsTransformer(ItemsTransformer):
+    write_mode = "upsert"
+
+
+class PartitionedItemsTransformer(ItemsTransformer):
+    partition_column = "periodo"
+
+
+class SwapItemsTransformer(ItemsTransformer):
+    reload_strategy = "swap"
+    keep_previous_table = True
+
+
+def frame(*rows: tuple) -> pl.DataFrame:
+    return pl.DataFrame(rows, schema={"code": pl.String, "periodo": pl.Int64, "amount": pl.Float64}, orient="row")
+
+
+def stored(db) -> list[tuple]:
+    with db.get_engine("test").connect() as conn:
+        return [tuple(r) for r in conn.execute(text("SELECT code, periodo, amount FROM items ORDER BY code"))]
+
+
+def upload(db, df: pl.DataFrame, transformer: BaseTransformer, use_async: bool):
+    if use_async:
+        return asyncio.run(upload_dataframe_async(df, transformer, db, "test", pre_transformed=True))
+    return upload_dataframe(df, transformer, db, "test", pre_transformed=True)
+
+
+def test_sqlite_has_its_own_loader():
+    assert isinstance(get_bulk_loader("sqlite", 100), SQLiteBulkLoader)
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_upload_inserts_rows(db, use_async):
+    df = frame(("a", 202401, 1.5), ("b", 202401, None), ("c", 202402, 3.0))
+
+    result = upload(db, df, ItemsTransformer("items"), use_async)
+
+    assert result.inserted == 3
+    assert result.skipped == 0
+    assert stored(db) == [("a", 202401, 1.5), ("b", 202401, None), ("c", 202402, 3.0)]
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_ignore_skips_existing_keys(db, use_async):
+    transformer = ItemsTransformer("items")
+    upload(db, frame(("a", 202401, 1.0), ("b", 202401, 2.0)), transformer, use_async)
+
+    result = upload(db, frame(("a", 202401, 9.0), ("c", 202402, 3.0)), transformer, use_async)
+
+    assert result.inserted == 1
+    assert result.skipped == 1
+    assert stored(db) == [("a", 202401, 1.0), ("b", 202401, 2.0), ("c", 202402, 3.0)]
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_upsert_updates_existing_keys(db, use_async):
+    transformer = UpsertItemsTransformer("items")
+    upload(db, frame(("a", 202401, 1.0), ("b", 202401, 2.0)), transformer, use_async)
+
+    upload(db, frame(("a", 202402, 9.0), ("c", 202402, 3.0)), transformer, use_async)
+
+    assert stored(db) == [("a", 202402, 9.0), ("b", 202401, 2.0), ("c", 202402, 3.0)]
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_upsert_does_not_report_rowcount_as_inserts(db, use_async):
+    transformer = UpsertItemsTransformer("items")
+    upload(db, frame(("a", 202401, 1.0)), transformer, use_async)
+
+    result = upload(db, frame(("a", 202402, 9.0), ("b", 202402, 3.0)), transformer, use_async)
+
+    assert result.rows == 2
+    assert (result.inserted, result.updated, result.skipped) == (None, None, None)
+
+
+def test_mysql_upsert_uses_row_alias():
+    [(sql, _)] = MySQLBulkLoader(100).iter_statements("format", "items", frame(("a", 202401, 1.0)), "upsert", ["code"])
+
+    assert sql.endswith(" AS new ON DUPLICATE KEY UPDATE periodo = new.periodo, amount = new.amount")
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_upsert_reports_repeated_keys_in_file(db, use_async):
+    df = frame(("a", 202401, 1.0), ("b", 202401, 2.0), ("a", 202402, 5.0))
+
+    result = upload(db, df, UpsertItemsTransformer("items"), use_async)
+
+    assert result.duplicate_keys == 1
+    assert stored(db) == [("a", 202402, 5.0), ("b", 202401, 2.0)]
+
+
+def test_ignore_does_not_hide_other_constraint_errors(db):
+    with pytest.raises(Exception):
+        upload_dataframe(frame(("a", None, 1.0)), ItemsTransformer("items"), db, "test", pre_transformed=True)
+
+    assert stored(db) == []
+
+
+@pytest.mark.parametrize("in_place", [False, True], ids=["rename", "in_place"])
+def test_swap_reload_replaces_contents_and_keeps_backup(db, monkeypatch, in_place):
+    monkeypatch.setattr(SQLiteBulkLoader, "swap_in_place", in_place)
+    transformer = SwapItemsTransformer("items")
+    upload_dataframe(frame(("a", 202401, 1.0), ("b", 202401, 2.0)), transformer, db, "test", pre_transformed=True)
+
+    result = full_reload_dataframe(frame(("c", 202402, 3.0)), transformer, db, "test", pre_transformed=True)
+
+    assert result.inserted == 1
+    assert stored(db) == [("c", 202402, 3.0)]
+    with db.get_engine("test").connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM items__old")).scalar() == 2
+        tables = conn.execute(text("SELECT name FROM sqlite_master WHERE name LIKE 'items__staging%'")).all()
+    assert tables == []
+
+
+def test_full_reload_failure_keeps_previous_rows(db):
+    transformer = ItemsTransformer("items")
+    upload_dataframe(frame(("a", 202401, 1.0)), transformer, db, "test", pre_transformed=True)
+
+    with pytest.raises(DatabaseInsertError):
+        full_reload_dataframe(
+            frame(("b", 202402, 2.0), ("c", None, 3.0)), transformer, db, "test",
+            chunk_size=1, transaction="chunk", pre_transformed=True,
+        )
+
+    assert stored(db) == [("a", 202401, 1.0)]
+
+
+def test_replace_partitions_deletes_and_reinserts_file_partitions(db):
+    upload_dataframe(
+        frame(("a", 202401, 1.0), ("b", 202401, 2.0), ("c", 202402, 3.0)),
+        PartitionedItemsTransformer("items"), db, "test", pre_transformed=True,
+    )
+
+    transformer = PartitionedItemsTransformer("items").replace_partitions()
+    result = upload_dataframe(frame(("a", 202401, 9.0), ("d", 202401, 4.0)), transformer, db, "test", pre_transformed=True)
+
+    assert result.inserted == 2
+    [entry] = result.partitions
+    assert (entry["partition"], entry["deleted"], entry["inserted"]) == (202401, 2, 2)
+    assert entry["delete_seconds"] >= 0 and entry["insert_seconds"] >= 0
+    assert stored(db) == [("a", 202401, 9.0), ("c", 202402, 3.0), ("d", 202401, 4.0)]
+
+
+def test_replace_partitions_is_opt_in_per_instance():
+    transformer = PartitionedItemsTransformer("items").replace_partitions()
+
+    assert (transformer.write_mode, transformer.incremental) == ("replace_partition", False)
+    assert PartitionedItemsTransformer.write_mode == "ignore"
+
+
+def test_replace_partitions_rolls_back_on_failure(db):
+    upload_dataframe(
+        frame(("a", 202401, 1.0), ("c", 202402, 3.0)),
+        PartitionedItemsTransformer("items"), db, "test", pre_transformed=True,
+    )
+    transformer = PartitionedItemsTransformer("items").replace_partitions()
+
+    # `c` ya existe en 202402, que el archivo no reemplaza: la inserción en 202403 falla
+    with pytest.raises(DatabaseInsertError):
+        upload_dataframe(
+            frame(("b", 202401, 2.0), ("c", 202403, 5.0)), transformer, db, "test",
+            chunk_size=1, pre_transformed=True,
+        )
+
+    assert stored(db) == [("a", 202401, 1.0), ("c", 202402, 3.0)]